@@ -1,15 +1,25 @@
 from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
 import database
+import snapshot
+from teams import TEAM_COLORS, RACE_TOURNAMENTS
 import bcrypt
+import numpy as np
 import os
+from functools import lru_cache
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', os.urandom(24))
 
 PASSWORD_HASH = b"$2b$12$UxfOKV7MadrhIWPhy1Sozu3r0fhwr8pgshjd9t08XhSEvA791fWZO"
 
-# Initialize database on startup
-database.init_db()
+# Make sure the published database has the current schema on startup.
+# Requests then read it through database.get_read_connection().
+database.ensure_schema()
+
+# Memory-map the columnar snapshot the updater writes after each run
+# (building it now if it's missing or stale). The main page and /api/data
+# are served from it without touching SQLite.
+snapshot.ensure_snapshot()
 
 # Check if using PostgreSQL
 USE_POSTGRES = os.environ.get('DATABASE_URL') is not None
@@ -25,1330 +35,1519 @@ def execute_db(conn, query, params=()):
         return conn.execute(query, params)
 
 
-def rank_leaderboard(leaderboard_data, score_key):
-    """
-    Assigns ranks to a leaderboard list, handling ties correctly.
-    Players with the same score get the same rank and same rank color.
-    """
-    if not leaderboard_data:
-        return []
-    
-    ranked_list = []
-    
-    # Sort the data in descending order of the score
-    sorted_data = sorted(leaderboard_data, key=lambda x: x[score_key], reverse=True)
-    
-    if sorted_data:
-        current_rank = 1
-        prev_score = None
-        count_at_rank = 0
-        
-        for i, item in enumerate(sorted_data):
-            # Check for a tie with the previous entry
-            if prev_score is not None and item[score_key] != prev_score:
-                # New score, update rank (skip numbers based on how many had previous score)
-                current_rank = i + 1
-            
-            prev_score = item[score_key]
-            
-            # Determine rank class for coloring
-            if current_rank == 1:
-                rank_class = 'gold'
-            elif current_rank == 2:
-                rank_class = 'silver'
-            elif current_rank == 3:
-                rank_class = 'bronze'
-            else:
-                rank_class = ''
-            
-            ranked_list.append({
-                'rank': current_rank, 
-                'rank_class': rank_class,
-                **item
-            })
-                
-    return ranked_list
+# Highlight colours of the top three ranks
+RANK_CLASSES = {1: 'gold', 2: 'silver', 3: 'bronze'}
 
-@app.route('/')
-def index():
-    selected_view = request.args.get('view', 'gradient')
-    selected_player = request.args.get('player', 'all')
-    selected_team1 = request.args.get('team1', 'all')
-    selected_team2 = request.args.get('team2', 'all')
-    timeline_value = int(request.args.get('timeline', 100))
-    
-    conn = database.get_db_connection()
-    
-    # Get date range
-    date_range = conn.execute('SELECT MIN(match_date) as min_date, MAX(match_date) as max_date FROM matches').fetchone()
-    min_date = date_range['min_date'] or '2023-01-01'
-    max_date = date_range['max_date'] or '2026-12-31'
-    
-    # Calculate cutoff date based on timeline slider
-    if timeline_value < 100:
-        from datetime import datetime, timedelta
-        start = datetime.strptime(min_date, '%Y-%m-%d')
-        end = datetime.strptime(max_date, '%Y-%m-%d')
-        diff = (end - start).days
-        cutoff_days = int(diff * timeline_value / 100)
-        cutoff_date = (start + timedelta(days=cutoff_days)).strftime('%Y-%m-%d')
-    else:
-        cutoff_date = None
+
+def extract_opponent(description, team, unique_teams):
+    """
+    Work out a player's opponent from a match description.
+    Description format: "Tournament Stage Type Team1 vs Team2"
+    """
+    if not description or not team or ' vs ' not in description:
+        return None
+    
+    parts = description.split(' vs ')
+    team2 = parts[1].strip()
+    before_vs = parts[0].strip()
+    
+    # Player is on team1, opponent is team2
+    if team != team2:
+        return team2
+    
+    # If player's team matches team2, find opponent in before_vs by matching
+    # known team names at the end (check longest matches first)
+    words = before_vs.split()
+    for num_words in range(min(4, len(words)), 0, -1):
+        potential_team = ' '.join(words[-num_words:])
+        if potential_team in unique_teams and potential_team != team:
+            return potential_team
+    return None
+
+
+def get_timeline_cutoff(min_date, max_date, timeline_value):
+    """Convert the timeline slider position (0-100) into a cutoff date."""
+    if timeline_value >= 100:
+        return None
+    from datetime import datetime, timedelta
+    start = datetime.strptime(min_date, '%Y-%m-%d')
+    end = datetime.strptime(max_date, '%Y-%m-%d')
+    diff = (end - start).days
+    cutoff_days = int(diff * timeline_value / 100)
+    return (start + timedelta(days=cutoff_days)).strftime('%Y-%m-%d')
+
+
+# Results kept per worker by each filter-keyed builder (dashboard, cubes,
+# grids, leaderboards, ...). Every worker holds its own copies and one entry
+# can be hundreds of KB of JSON-ready dicts, so this stays small; the
+# builders are fast enough on the snapshot that a miss is cheap.
+FILTER_CACHE_SIZE = 8
+
+
+# Row filters accepted by /api/data, / and /api/cube. Each may be repeated
+# (?player=a&player=b); values of one filter are OR'ed, filters AND'ed.
+FILTER_PARAMS = ('player', 'team1', 'team2', 'map', 'event')
+
+
+def parse_filters(getlist):
+    """
+    Turn filter parameters into a hashable tuple of (name, values) pairs,
+    leaving out filters that are absent or 'all'. getlist(name) returns the
+    values given for a parameter.
+    """
+    filters = []
+    for name in FILTER_PARAMS:
+        values = sorted({v for v in getlist(name) if v and v != 'all'})
+        if values:
+            filters.append((name, tuple(values)))
+    return tuple(filters)
+
+
+def request_filters(prefix=''):
+    """
+    Read the row filters from the query string (see parse_filters). With a
+    prefix (e.g. 'a.'), reads a.player, a.team1, ... instead.
+    """
+    return parse_filters(lambda name: request.args.getlist(prefix + name))
+
+
+def filter_mask(snap, filters, cutoff_date):
+    """
+    Boolean mask over the snapshot rows for a set of filters (see
+    request_filters) and an optional timeline cutoff.
     
-    # Build filter conditions
-    conditions = []
-    params = []
+    Every filter value maps to a cached per-value row mask on the snapshot,
+    so a request is a few vectorized AND/ORs.
+    """
+    mask = np.ones(snap.size, dtype=bool)
+    for name, values in filters:
+        if name == 'player':
+            mask &= snap.values_mask('player', [snap.code('player', v) for v in values])
+        elif name == 'team1':
+            mask &= snap.values_mask('team', [snap.code('team', v) for v in values])
+        elif name == 'team2':
+            # Same semantics as description LIKE '%team2%'
+            matching = set()
+            for v in values:
+                matching.update(snap.codes_containing('description', v))
+            mask &= snap.values_mask('description', matching)
+        elif name == 'map':
+            mask &= snap.values_mask('map', [snap.code('map', v) for v in values])
+        elif name == 'event':
+            mask &= snap.values_mask('event', [snap.code('event', v) for v in values])
+    if cutoff_date:
+        mask &= (snap.date_codes >= 0) & (snap.date_codes <= snap.date_cutoff_code(cutoff_date))
+    return mask
+
+
+# Recent scorigamis per page (limit parameter default and cap)
+RECENT_SCORIGAMIS = 50
+RECENT_SCORIGAMIS_MAX = 500
+
+
+def describe_row(snap, i):
+    """A snapshot row as the dict recent scorigami lists show."""
+    teams = snap.values('team')
+    dates = snap.values('date')
+    team = teams[snap.team_codes[i]] or None
+    description = snap.values('description')[snap.description_codes[i]]
+    return {
+        'id': int(snap.id[i]),
+        'kills': int(snap.kills[i]),
+        'deaths': int(snap.deaths[i]),
+        'player': snap.values('player')[snap.player_codes[i]],
+        'map': snap.values('map')[snap.map_codes[i]],
+        'team': team,
+        'opponent': extract_opponent(description, team, snap.value_set('team')),
+        'result': snap.values('result')[snap.result_codes[i]] or None,
+        'match_date': dates[snap.date_codes[i]] if snap.date_codes[i] >= 0 else None,
+        'description': description
+    }
+
+
+def scorigami_page_start(snap, keys, tie_ids, before):
+    """
+    Index a recent-scorigami page starts at, for a before cursor.
     
-    if selected_player != 'all':
-        conditions.append('player = ?')
-        params.append(selected_player)
+    keys are the order's negated date codes (ascending, undated last) and
+    tie_ids(lo, hi) the ascending ids that order the entries of one date.
+    """
+    if not before:
+        return 0
+    date, _, entry_id = before.partition(',')
+    if entry_id.isdigit():
+        # Resume after the cursor entry: same date with a higher id, or older
+        date_key = -snap.code('date', date) if date else 1
+        lo = int(np.searchsorted(keys, date_key, side='left'))
+        hi = int(np.searchsorted(keys, date_key, side='right'))
+        return lo + int(np.searchsorted(tie_ids(lo, hi), int(entry_id), side='right'))
+    # Highest date code before the date (dates are sorted)
+    date_code = int(np.searchsorted(snap.date_values, date, side='left')) - 1
+    return int(np.searchsorted(keys, -date_code, side='left'))
+
+
+def recent_scorigamis_page(snap, limit=RECENT_SCORIGAMIS, before=None):
+    """
+    One page of recent scorigamis (K/D combos that have occurred once
+    globally), most recent first.
     
-    if selected_team1 != 'all':
-        conditions.append('team = ?')
-        params.append(selected_team1)
+    before is a cursor: the next_cursor of the previous page ("date,id",
+    date empty for undated rows) or a bare YYYY-MM-DD for scorigamis
+    strictly before that date. The start is found by binary search over the
+    precomputed order, so a page costs O(limit) however many there are.
     
-    if selected_team2 != 'all':
-        conditions.append('description LIKE ?')
-        params.append(f'%{selected_team2}%')
+    Returns:
+        Tuple of (scorigamis, next_cursor or None on the last page)
+    """
+    keys = snap.scorigami_date_keys
+    start = scorigami_page_start(snap, keys, lambda lo, hi: snap.id[snap.scorigami_rows[lo:hi]], before)
+    rows = snap.scorigami_rows[start:start + limit].tolist()
+    page = [describe_row(snap, i) for i in rows]
+    next_cursor = None
+    if rows and start + limit < len(keys):
+        last = page[-1]
+        next_cursor = f"{last['match_date'] or ''},{last['id']}"
+    return page, next_cursor
+
+
+def request_recent_scorigamis(snap, page=recent_scorigamis_page):
+    """Recent scorigamis page for the request's limit / before parameters."""
+    limit = min(max(request.args.get('limit', RECENT_SCORIGAMIS, type=int), 1), RECENT_SCORIGAMIS_MAX)
+    return page(snap, limit, request.args.get('before'))
+
+
+@lru_cache(maxsize=FILTER_CACHE_SIZE)
+def build_dashboard(generation, filters, timeline_value):
+    """
+    Compute the main page's grid and totals for a set of filters.
     
-    if cutoff_date:
-        conditions.append('match_date <= ?')
-        params.append(cutoff_date)
+    Runs entirely on the memory-mapped snapshot: filters become boolean
+    masks over the row arrays and every aggregate is a bincount, so the
+    work per request is vectorized and the Python-level loop is over the
+    occupied cells only. A cell's per-row details are built when the cell
+    is opened (cell_details). Cached per data generation and filters.
+    """
+    snap = snapshot.get_snapshot()
+    dates = snap.values('date')
     
-    # Get scores with filters
-    where_clause = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+    min_date = dates[0] if dates else '2023-01-01'
+    max_date = dates[-1] if dates else '2026-12-31'
+    cutoff_date = get_timeline_cutoff(min_date, max_date, timeline_value)
     
-    query = f'''
-        SELECT kills, deaths, player, map, team, result, match_date, description
-        FROM matches
-        {where_clause}
-    '''
-    rows = conn.execute(query, params).fetchall()
+    rows = np.flatnonzero(filter_mask(snap, filters, cutoff_date))
+    n_cells = len(snap.cell_count)
+    cells = snap.cell[rows]
+    win_code = snap.code('result', 'Win')
+    counts = np.bincount(cells, minlength=n_cells)
+    wins = np.bincount(cells, weights=snap.result_codes[rows] == win_code, minlength=n_cells)
+    with_result = np.bincount(cells, weights=snap.result_codes[rows] != snap.code('result', ''), minlength=n_cells)
     
     # Group by kills, deaths
     scores = {}
-    for row in rows:
-        key = (row['kills'], row['deaths'])
-        if key not in scores:
-            scores[key] = {'count': 0, 'matches': [], 'wins': 0, 'total_with_result': 0}
-        
-        scores[key]['count'] += 1
-        
-        # Track wins for win percentage
-        if row['result']:
-            scores[key]['total_with_result'] += 1
-            if row['result'] == 'Win':
-                scores[key]['wins'] += 1
-        
-        formatted = f"{row['player']} on {row['map']}"
-        if row['result']:
-            formatted += f" | {row['result']}"
-        if row['match_date']:
-            formatted += f" | {row['match_date']}"
-        if row['team']:
-            formatted += f"\nTeam: {row['team']}"
-        if row['description']:
-            formatted += f"\n{row['description']}"
-        
-        if formatted not in scores[key]['matches']:
-            scores[key]['matches'].append(formatted)
-    
-    # Calculate win percentages and finalize
-    for key in scores:
-        scores[key]['details'] = '\n\n'.join(scores[key]['matches'])
-        if scores[key]['total_with_result'] > 0:
-            scores[key]['win_pct'] = (scores[key]['wins'] / scores[key]['total_with_result']) * 100
-        else:
-            scores[key]['win_pct'] = None
+    cell_kills = snap.cell_kills.tolist()
+    cell_deaths = snap.cell_deaths.tolist()
+    for cell in np.flatnonzero(counts).tolist():
+        total_with_result = int(with_result[cell])
+        scores[(cell_kills[cell], cell_deaths[cell])] = {
+            'count': int(counts[cell]),
+            'win_pct': float(wins[cell] / total_with_result) * 100 if total_with_result > 0 else None
+        }
     
-    max_count = max([info['count'] for info in scores.values()]) if scores else 1
+    max_count = int(counts.max()) if scores else 1
+    
+    # Scorigamis (filtered)
+    overall_scorigamis = [(cell_kills[c], cell_deaths[c]) for c in np.flatnonzero(counts == 1).tolist()]
+    
+    # Totals
+    total_kills = int(snap.kills[rows].sum(dtype=np.int64))
+    total_deaths = int(snap.deaths[rows].sum(dtype=np.int64))
+    
+    return {
+        'scores': scores,
+        'max_count': max_count,
+        'overall_scorigamis': overall_scorigamis,
+        'total_kills': total_kills,
+        'total_deaths': total_deaths,
+        'min_date': min_date,
+        'max_date': max_date,
+    }
+
+
+def cell_details(snap, filters, timeline_value, kills, deaths):
+    """
+    Rows of one K/D cell under a set of filters, as the grid tooltip's
+    text: one block per distinct row (player on map | result | date, team,
+    event), in row order. Empty if no row has that line.
+    """
+    keys = snap.cell_kills.astype(np.int32) * 1024 + snap.cell_deaths
+    key = kills * 1024 + deaths
+    cell = int(np.searchsorted(keys, key))
+    if not 0 <= kills < 1024 or not 0 <= deaths < 1024 or cell >= len(keys) or keys[cell] != key:
+        return ''
+    dates = snap.values('date')
+    cutoff_date = get_timeline_cutoff(dates[0], dates[-1], timeline_value) if dates else None
+    rows = np.flatnonzero(filter_mask(snap, filters, cutoff_date) & (snap.cell == cell))
+    
+    players = snap.values('player')
+    teams = snap.values('team')
+    maps = snap.values('map')
+    descriptions = snap.values('description')
+    results = snap.values('result')
+    # dict keeps first-seen order and drops duplicates
+    matches = {}
+    for i in rows.tolist():
+        formatted = f"{players[snap.player_codes[i]]} on {maps[snap.map_codes[i]]}"
+        result = results[snap.result_codes[i]]
+        if result:
+            formatted += f" | {result}"
+        if snap.date_codes[i] >= 0:
+            formatted += f" | {dates[snap.date_codes[i]]}"
+        team = teams[snap.team_codes[i]]
+        if team:
+            formatted += f"\nTeam: {team}"
+        description = descriptions[snap.description_codes[i]]
+        if description:
+            formatted += f"\n{description}"
+        matches[formatted] = None
+    return '\n\n'.join(matches)
+
+
+# Leaderboards: response key -> score key of its entries
+LEADERBOARDS = {
+    'leaderboard_total_kills': 'total_kills',
+    'leaderboard_exclusive': 'exclusive_scores',
+    'leaderboard_maps_played': 'total_matches',
+    'leaderboard_kd': 'kill_death_difference',
+}
+
+# Leaderboard entries per page (limit parameter default and cap)
+LEADERBOARD_SIZE = 100
+LEADERBOARD_MAX = 1000
+
+
+@lru_cache(maxsize=FILTER_CACHE_SIZE)
+def build_leaderboards(generation, filters, timeline_value):
+    """
+    Sort the four player leaderboards for a set of filters.
+    
+    Each board is (player codes, negated scores) in leaderboard order:
+    score descending, then name - the player vocabulary is sorted, so codes
+    break ties by name. Negated scores ascend, so ranks are binary searches.
+    Cached per data generation and filters; pages are slices of these.
+    """
+    snap = snapshot.get_snapshot()
+    dates = snap.values('date')
+    min_date = dates[0] if dates else '2023-01-01'
+    max_date = dates[-1] if dates else '2026-12-31'
+    cutoff_date = get_timeline_cutoff(min_date, max_date, timeline_value)
+    
+    rows = np.flatnonzero(filter_mask(snap, filters, cutoff_date))
+    n_players = len(snap.values('player'))
+    row_players = snap.player_codes[rows]
+    maps_played = np.bincount(row_players, minlength=n_players).astype(np.int64)
+    player_kills = np.bincount(row_players, weights=snap.kills[rows], minlength=n_players).astype(np.int64)
+    player_deaths = np.bincount(row_players, weights=snap.deaths[rows], minlength=n_players).astype(np.int64)
+    
+    # Scorigami Leaders: K/D combos only one player has ever achieved,
+    # counted per player within the filtered rows
+    cells = snap.cell[rows]
+    exclusive_cells = np.unique(cells[snap.cell_players[cells] == 1])
+    exclusive_scores = np.bincount(snap.cell_owner[exclusive_cells], minlength=n_players).astype(np.int64)
+    
+    def board(values, present):
+        codes = np.flatnonzero(present)
+        order = codes[np.lexsort((codes, -values[codes]))]
+        return order, -values[order]
+    
+    played = maps_played > 0
+    return {
+        'leaderboard_total_kills': board(player_kills, played),
+        'leaderboard_exclusive': board(exclusive_scores, exclusive_scores > 0),
+        'leaderboard_maps_played': board(maps_played, played),
+        'leaderboard_kd': board(player_kills - player_deaths, played),
+    }
+
+
+def leaderboard_page(snap, board, key, limit=LEADERBOARD_SIZE, offset=0, around=None):
+    """
+    One page of a sorted leaderboard (see build_leaderboards) as ranked
+    entries. Ties share a rank and the next rank skips (1, 1, 3), found by
+    binary search over the sorted scores rather than re-sorting.
+    
+    around=player centres the page on that player (if on the board).
     
-    # Get scorigamis (filtered)
-    scorigami_query = f'''
-        SELECT kills, deaths
-        FROM matches
-        {where_clause}
-        GROUP BY kills, deaths
-        HAVING COUNT(*) = 1
-    '''
-    overall_scorigamis_raw = conn.execute(scorigami_query, params).fetchall()
-    overall_scorigamis = {(s['kills'], s['deaths']) for s in overall_scorigamis_raw}
-    
-    # Get unique players and teams
-    unique_players = conn.execute('SELECT DISTINCT player FROM matches ORDER BY LOWER(player)').fetchall()
-    unique_teams_raw = conn.execute('SELECT DISTINCT team FROM matches WHERE team IS NOT NULL AND team != "" ORDER BY team').fetchall()
-    unique_teams = [row['team'] for row in unique_teams_raw]
-    
-    # Get ALL recent scorigamis ordered by match date (most recent unique kill/death combinations)
-    # These are matches where the kills/deaths combo has only occurred once globally
-    recent_scorigamis_query = '''
-        SELECT m.kills, m.deaths, m.player, m.map, m.team, m.result, m.match_date, m.description
-        FROM matches m
-        INNER JOIN (
-            SELECT kills, deaths
-            FROM matches
-            GROUP BY kills, deaths
-            HAVING COUNT(*) = 1
-        ) unique_scores ON m.kills = unique_scores.kills AND m.deaths = unique_scores.deaths
-        ORDER BY m.match_date DESC
-    '''
-    recent_scorigamis_raw = conn.execute(recent_scorigamis_query).fetchall()
-    
-    recent_scorigamis = []
-    for row in recent_scorigamis_raw:
-        # Extract opponent team from description
-        # Description format: "Tournament Stage Type Team1 vs Team2"
-        opponent = None
-        if row['description'] and row['team']:
-            desc = row['description']
-            if ' vs ' in desc:
-                parts = desc.split(' vs ')
-                if len(parts) > 1:
-                    team2 = parts[1].strip()
-                    before_vs = parts[0].strip()
-                    
-                    # If player's team matches team2, find opponent in before_vs
-                    if row['team'] == team2:
-                        # Try to match known team names at the end of before_vs
-                        words = before_vs.split()
-                        found_opponent = None
-                        
-                        # Try to find a known team name (check longest matches first)
-                        for num_words in range(min(4, len(words)), 0, -1):
-                            potential_team = ' '.join(words[-num_words:])
-                            if potential_team in unique_teams and potential_team != row['team']:
-                                found_opponent = potential_team
-                                break
-                        
-                        opponent = found_opponent
-                    else:
-                        # Player is on team1, opponent is team2
-                        opponent = team2
-        
-        recent_scorigamis.append({
-            'kills': row['kills'],
-            'deaths': row['deaths'],
-            'player': row['player'],
-            'map': row['map'],
-            'team': row['team'],
-            'opponent': opponent,
-            'result': row['result'],
-            'match_date': row['match_date'],
-            'description': row['description']
+    Returns:
+        Tuple of (entries, start offset, board size)
+    """
+    codes, negated = board
+    start = offset
+    if around is not None:
+        code = snap.code('player', around)
+        positions = np.flatnonzero(codes == code) if code >= 0 else []
+        if len(positions):
+            start = int(positions[0]) - limit // 2
+    start = min(max(start, 0), max(len(codes) - limit, 0)) if around is not None else max(start, 0)
+    
+    page_codes = codes[start:start + limit]
+    ranks = np.searchsorted(negated, negated[start:start + limit], side='left') + 1
+    players = snap.values('player')
+    entries = []
+    for code, score, rank in zip(page_codes.tolist(), (-negated[start:start + limit]).tolist(), ranks.tolist()):
+        entries.append({
+            'rank': rank,
+            'rank_class': RANK_CLASSES.get(rank, ''),
+            'player': players[code],
+            key: score
         })
+    return entries, start, int(len(codes))
+
+
+def dashboard_leaderboards(snap, filters, timeline_value, limit=LEADERBOARD_SIZE):
+    """The top of every leaderboard, as the main page and /api/data show them."""
+    boards = build_leaderboards(snap.generation, filters, timeline_value)
+    return {name: leaderboard_page(snap, boards[name], key, limit)[0] for name, key in LEADERBOARDS.items()}
+
+@app.route('/')
+def index():
+    selected_view = request.args.get('view', 'gradient')
+    selected_player = request.args.get('player', 'all')
+    selected_team1 = request.args.get('team1', 'all')
+    selected_team2 = request.args.get('team2', 'all')
+    timeline_value = int(request.args.get('timeline', 100))
     
-    # Get totals
-    total_query = 'SELECT SUM(kills) as total_kills, SUM(deaths) as total_deaths FROM matches' + where_clause
-    totals = conn.execute(total_query, params).fetchone()
-    total_kills = totals['total_kills'] if totals and totals['total_kills'] else 0
-    total_deaths = totals['total_deaths'] if totals and totals['total_deaths'] else 0
-    
-    # Leaderboards (filtered)
-    leaderboard_total_kills = rank_leaderboard(conn.execute(f'''
-        SELECT player, SUM(kills) as total_kills
-        FROM matches {where_clause} GROUP BY player ORDER BY total_kills DESC
-    ''', params).fetchall(), 'total_kills')
-    
-    # Scorigami Leaders: players with unique K/D combos that no other player has (within filtered data)
-    # First find all K/D combos that only one player has achieved
-    if conditions:
-        leaderboard_exclusive = rank_leaderboard(conn.execute(f'''
-            SELECT player, COUNT(DISTINCT kills || '-' || deaths) as exclusive_scores
-            FROM matches m1
-            {where_clause}
-            AND NOT EXISTS (
-                SELECT 1 FROM matches m2 
-                WHERE m2.kills = m1.kills AND m2.deaths = m1.deaths AND m2.player != m1.player
-            )
-            GROUP BY player ORDER BY exclusive_scores DESC
-        ''', params).fetchall(), 'exclusive_scores')
-    else:
-        leaderboard_exclusive = rank_leaderboard(conn.execute('''
-            SELECT player, COUNT(DISTINCT kills || '-' || deaths) as exclusive_scores
-            FROM matches m1
-            WHERE NOT EXISTS (
-                SELECT 1 FROM matches m2 
-                WHERE m2.kills = m1.kills AND m2.deaths = m1.deaths AND m2.player != m1.player
-            )
-            GROUP BY player ORDER BY exclusive_scores DESC
-        ''').fetchall(), 'exclusive_scores')
-    
-    leaderboard_maps_played = rank_leaderboard(conn.execute(f'''
-        SELECT player, COUNT(*) as total_matches
-        FROM matches {where_clause} GROUP BY player ORDER BY total_matches DESC
-    ''', params).fetchall(), 'total_matches')
-    
-    leaderboard_kd = rank_leaderboard(conn.execute(f'''
-        SELECT player, SUM(kills) - SUM(deaths) AS kill_death_difference
-        FROM matches {where_clause} GROUP BY player ORDER BY kill_death_difference DESC
-    ''', params).fetchall(), 'kill_death_difference')
-    
-    conn.close()
+    filters = request_filters()
+    snap = snapshot.get_snapshot()
+    data = build_dashboard(snap.generation, filters, timeline_value)
+    leaderboards = dashboard_leaderboards(snap, filters, timeline_value)
+    recent_scorigamis, recent_cursor = request_recent_scorigamis(snap)
     
     return render_template('index.html', 
-        scores=scores, 
-        max_count=max_count,
-        leaderboard_total_kills=leaderboard_total_kills, 
-        leaderboard_exclusive=leaderboard_exclusive,
-        leaderboard_maps_played=leaderboard_maps_played,
-        leaderboard_kd=leaderboard_kd,
-        unique_players=unique_players, 
-        unique_teams=unique_teams,
+        scores=data['scores'], 
+        max_count=data['max_count'],
+        leaderboard_total_kills=leaderboards['leaderboard_total_kills'], 
+        leaderboard_exclusive=leaderboards['leaderboard_exclusive'],
+        leaderboard_maps_played=leaderboards['leaderboard_maps_played'],
+        leaderboard_kd=leaderboards['leaderboard_kd'],
+        unique_players=snap.sorted_values('player'), 
+        unique_teams=snap.sorted_values('team'),
         selected_view=selected_view,
         selected_player=selected_player, 
         selected_team1=selected_team1,
         selected_team2=selected_team2,
         timeline_value=timeline_value,
-        min_date=min_date,
-        max_date=max_date,
-        total_kills=total_kills,
-        total_deaths=total_deaths,
-        overall_scorigamis=overall_scorigamis,
-        recent_scorigamis=recent_scorigamis
+        min_date=data['min_date'],
+        max_date=data['max_date'],
+        total_kills=data['total_kills'],
+        total_deaths=data['total_deaths'],
+        overall_scorigamis=set(data['overall_scorigamis']),
+        recent_scorigamis=recent_scorigamis,
+        recent_cursor=recent_cursor
     )
 
 @app.route('/api/data')
 def api_data():
-    """JSON API endpoint for filtered data - enables AJAX updates without page reload."""
-    selected_view = request.args.get('view', 'gradient')
-    selected_player = request.args.get('player', 'all')
-    selected_team1 = request.args.get('team1', 'all')
-    selected_team2 = request.args.get('team2', 'all')
+    """
+    JSON API endpoint for filtered data - enables AJAX updates without page reload.
+    player, team1, team2, map and event can each be given several times.
+    Recent scorigamis are paged with limit and before=<recent_cursor>.
+    """
     timeline_value = int(request.args.get('timeline', 100))
     
-    conn = database.get_db_connection()
-    
-    # Get date range
-    date_range = conn.execute('SELECT MIN(match_date) as min_date, MAX(match_date) as max_date FROM matches').fetchone()
-    min_date = date_range['min_date'] or '2023-01-01'
-    max_date = date_range['max_date'] or '2026-12-31'
-    
-    # Calculate cutoff date based on timeline slider
-    if timeline_value < 100:
-        from datetime import datetime, timedelta
-        start = datetime.strptime(min_date, '%Y-%m-%d')
-        end = datetime.strptime(max_date, '%Y-%m-%d')
-        diff = (end - start).days
-        cutoff_days = int(diff * timeline_value / 100)
-        cutoff_date = (start + timedelta(days=cutoff_days)).strftime('%Y-%m-%d')
-    else:
-        cutoff_date = None
+    filters = request_filters()
+    snap = snapshot.get_snapshot()
+    data = build_dashboard(snap.generation, filters, timeline_value)
+    recent_scorigamis, recent_cursor = request_recent_scorigamis(snap)
+    return jsonify(dict(dashboard_grid_json(data), **dashboard_leaderboards(snap, filters, timeline_value),
+                        recent_scorigamis=recent_scorigamis, recent_cursor=recent_cursor))
+
+
+@lru_cache(maxsize=4)
+def build_first_occurrences(generation):
+    """
+    Every K/D cell's first occurrence, in date order, and the cumulative
+    distinct-cell series. Read straight off the snapshot's first-occurrence
+    arrays; cached per data generation.
+    """
+    snap = snapshot.get_snapshot()
+    players = snap.values('player')
+    maps = snap.values('map')
+    dates = snap.values('date')
+    
+    cells = np.flatnonzero(snap.cell_first >= 0)
+    first_rows = snap.cell_first[cells]
+    undated = np.iinfo(np.int32).max
+    first_dates = np.where(snap.date_codes[first_rows] >= 0, snap.date_codes[first_rows], undated)
+    order = np.lexsort((snap.id[first_rows], first_dates))
+    
+    first = []
+    for c, i in zip(cells[order].tolist(), first_rows[order].tolist()):
+        first.append({
+            'kills': int(snap.cell_kills[c]),
+            'deaths': int(snap.cell_deaths[c]),
+            'count': int(snap.cell_count[c]),
+            'player': players[snap.player_codes[i]],
+            'map': maps[snap.map_codes[i]],
+            'match_date': dates[snap.date_codes[i]] if snap.date_codes[i] >= 0 else None,
+        })
     
-    # Build filter conditions
-    conditions = []
-    params = []
+    return {
+        'cells': first,
+        'series': {
+            'dates': [dates[d] for d in snap.first_date_codes.tolist()],
+            'distinct_cells': snap.first_cumulative.tolist(),
+        },
+        'total_cells': int(len(cells)),
+    }
+
+@app.route('/api/first-occurrences')
+def api_first_occurrences():
+    """
+    JSON API endpoint for when each K/D cell was first achieved, plus the
+    number of distinct cells over time. With date=YYYY-MM-DD, also returns
+    distinct_cells_on_date: how many cells had occurred by that date.
+    """
+    snap = snapshot.get_snapshot()
+    data = build_first_occurrences(snap.generation)
+    date = request.args.get('date')
+    if date:
+        # Cells first seen on or before the date (binary search over the series)
+        position = int(np.searchsorted(snap.first_date_codes, snap.date_cutoff_code(date), side='right'))
+        data = dict(data, date=date,
+                    distinct_cells_on_date=int(snap.first_cumulative[position - 1]) if position else 0)
+    return jsonify(data)
+
+
+@lru_cache(maxsize=512)
+def build_player_profile(generation, name):
+    """
+    Everything the player page shows for one player, or None if unknown.
     
-    if selected_player != 'all':
-        conditions.append('player = ?')
-        params.append(selected_player)
+    Works on the player's own rows only (one slice of the snapshot's
+    player-sorted row index), so the cost depends on how many maps the
+    player has, not on the table size. Cached per data generation and player.
+    """
+    snap = snapshot.get_snapshot()
+    code = snap.code('player', name)
+    if code < 0 or not name:
+        return None
+    teams = snap.values('team')
+    maps = snap.values('map')
+    dates = snap.values('date')
+    
+    rows = snap.rows_of('player', name)
+    kills = snap.kills[rows].astype(np.int64)
+    deaths = snap.deaths[rows].astype(np.int64)
+    date_codes = snap.date_codes[rows]
+    wins = snap.result_codes[rows] == snap.code('result', 'Win')
+    
+    # Grid cells, and the ones no other player has
+    cells, counts = np.unique(snap.cell[rows], return_counts=True)
+    exclusive = cells[snap.cell_owner[cells] == code]
+    
+    # K-D timeline: cumulative K-D after each date played
+    dated = date_codes >= 0
+    timeline_dates, date_index = np.unique(date_codes[dated], return_inverse=True)
+    daily_kd = np.bincount(date_index, weights=kills[dated] - deaths[dated], minlength=len(timeline_dates))
+    
+    # Team history: each team with its first and last date, in first-seen order
+    undated = np.iinfo(np.int32).max
+    sort_dates = np.where(dated, date_codes, undated)
+    team_history = []
+    for team_code in np.unique(snap.team_codes[rows]).tolist():
+        on_team = snap.team_codes[rows] == team_code
+        first, last = int(sort_dates[on_team].min()), int(date_codes[on_team].max())
+        team_history.append({
+            'team': teams[team_code] or None,
+            'maps_played': int(on_team.sum()),
+            'first_date': dates[first] if first != undated else None,
+            'last_date': dates[last] if last >= 0 else None,
+        })
+    team_history.sort(key=lambda t: (t['first_date'] is None, t['first_date'] or ''))
+    
+    # Per-map splits
+    map_codes, map_index = np.unique(snap.map_codes[rows], return_inverse=True)
+    map_kills = np.bincount(map_index, weights=kills, minlength=len(map_codes)).astype(np.int64)
+    map_deaths = np.bincount(map_index, weights=deaths, minlength=len(map_codes)).astype(np.int64)
+    map_played = np.bincount(map_index, minlength=len(map_codes))
+    map_wins = np.bincount(map_index, weights=wins, minlength=len(map_codes)).astype(np.int64)
+    splits = [{
+        'map': maps[m],
+        'maps_played': int(played),
+        'kills': int(k),
+        'deaths': int(d),
+        'kd': int(k - d),
+        'wins': int(w),
+    } for m, played, k, d, w in zip(map_codes.tolist(), map_played.tolist(), map_kills.tolist(),
+                                    map_deaths.tolist(), map_wins.tolist())]
+    by_kd = sorted(splits, key=lambda split: (-split['kd'], split['map']))
+    
+    return {
+        'player': name,
+        'maps_played': int(len(rows)),
+        'total_kills': int(kills.sum()),
+        'total_deaths': int(deaths.sum()),
+        'cells': [[int(snap.cell_kills[c]), int(snap.cell_deaths[c]), n]
+                  for c, n in zip(cells.tolist(), counts.tolist())],
+        'exclusive_cells': [[int(snap.cell_kills[c]), int(snap.cell_deaths[c])] for c in exclusive.tolist()],
+        'timeline': {
+            'dates': [dates[d] for d in timeline_dates.tolist()],
+            'kd': np.cumsum(daily_kd).astype(np.int64).tolist(),
+        },
+        'teams': team_history,
+        'maps': splits,
+        'best_map': by_kd[0]['map'] if by_kd else None,
+        'worst_map': by_kd[-1]['map'] if by_kd else None,
+    }
+
+@app.route('/api/player/<path:name>')
+def api_player(name):
+    """JSON API endpoint for a player's profile: grid cells, exclusive cells, K-D timeline, teams and map splits."""
+    snap = snapshot.get_snapshot()
+    profile = build_player_profile(snap.generation, name)
+    if profile is None:
+        return jsonify({'error': f"Unknown player '{name}'"}), 404
+    return jsonify(profile)
+
+
+def dashboard_grid_json(data):
+    """The grid part of a build_dashboard result, with JSON-friendly keys."""
+    # Convert scores dict keys to strings for JSON
+    scores_json = {}
+    for (k, d), info in data['scores'].items():
+        scores_json[f"{k},{d}"] = info
     
-    if selected_team1 != 'all':
-        conditions.append('team = ?')
-        params.append(selected_team1)
+    return {
+        'scores': scores_json,
+        'max_count': data['max_count'],
+        'overall_scorigamis': [[k, d] for k, d in data['overall_scorigamis']],
+        'total_kills': data['total_kills'],
+        'total_deaths': data['total_deaths'],
+    }
+
+
+@app.route('/api/leaderboards')
+def api_leaderboards():
+    """
+    JSON API endpoint for paged leaderboards, same filters as /api/data.
+    board picks one (total_kills, exclusive, maps_played, kd; default all),
+    limit/offset page it and around=player centres the page on a player.
+    """
+    snap = snapshot.get_snapshot()
+    filters = request_filters()
+    timeline_value = int(request.args.get('timeline', 100))
+    limit = min(max(request.args.get('limit', LEADERBOARD_SIZE, type=int), 1), LEADERBOARD_MAX)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    around = request.args.get('around')
+    
+    names = list(LEADERBOARDS)
+    board_name = request.args.get('board')
+    if board_name:
+        if f'leaderboard_{board_name}' not in LEADERBOARDS:
+            return jsonify({'error': f"Unknown board '{board_name}'",
+                            'boards': [name[len('leaderboard_'):] for name in LEADERBOARDS]}), 404
+        names = [f'leaderboard_{board_name}']
+    
+    boards = build_leaderboards(snap.generation, filters, timeline_value)
+    result = {}
+    for name in names:
+        entries, start, total = leaderboard_page(snap, boards[name], LEADERBOARDS[name], limit, offset, around)
+        result[name] = {'entries': entries, 'offset': start, 'total': total}
+    return jsonify(result)
+
+
+# Stat-pair grids served by /api/cube/<name>: (x axis, y axis) snapshot
+# columns. Any integer row column works; adding a grid is one entry here.
+STAT_CUBES = {
+    'kills-deaths': ('kills', 'deaths'),
+    'kills-assists': ('kills', 'assists'),
+    'first-kills-deaths': ('first_kills', 'first_deaths'),
+    'acs-adr': ('acs', 'adr'),
+}
+
+
+@lru_cache(maxsize=FILTER_CACHE_SIZE)
+def build_stat_cube(generation, x_column, y_column, filters, timeline_value):
+    """
+    Count rows per (x, y) stat pair for a set of filters.
     
-    if selected_team2 != 'all':
-        conditions.append('description LIKE ?')
-        params.append(f'%{selected_team2}%')
+    Same filters, timeline and bincount aggregation as the K/D grid, for any
+    pair of integer columns. Rows missing either stat (-1) are left out.
+    Results are cached per data generation, pair and filters.
+    """
+    snap = snapshot.get_snapshot()
+    dates = snap.values('date')
+    min_date = dates[0] if dates else '2023-01-01'
+    max_date = dates[-1] if dates else '2026-12-31'
+    cutoff_date = get_timeline_cutoff(min_date, max_date, timeline_value)
+    
+    x_values = getattr(snap, x_column)
+    y_values = getattr(snap, y_column)
+    mask = filter_mask(snap, filters, cutoff_date) & (x_values >= 0) & (y_values >= 0)
+    rows = np.flatnonzero(mask)
+    
+    # Sparse cube: only the (x, y) cells that occur
+    keys, cells = np.unique(x_values[rows].astype(np.int64) * 65536 + y_values[rows], return_inverse=True)
+    counts = np.bincount(cells, minlength=len(keys))
+    result_codes = snap.result_codes[rows]
+    wins = np.bincount(cells, weights=result_codes == snap.code('result', 'Win'), minlength=len(keys))
+    with_result = np.bincount(cells, weights=result_codes != snap.code('result', ''), minlength=len(keys))
     
-    if cutoff_date:
-        conditions.append('match_date <= ?')
-        params.append(cutoff_date)
+    scores = {}
+    for key, count, win, total in zip(keys.tolist(), counts.tolist(), wins.tolist(), with_result.tolist()):
+        scores[f"{key // 65536},{key % 65536}"] = {
+            'count': count,
+            'win_pct': win / total * 100 if total > 0 else None
+        }
     
-    # Get scores with filters
-    where_clause = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+    return {
+        'x': x_column,
+        'y': y_column,
+        'scores': scores,
+        'max_count': int(counts.max()) if len(keys) else 1,
+        'overall_scorigamis': [[int(k // 65536), int(k % 65536)] for k in keys[counts == 1].tolist()],
+        'total_rows': int(len(rows)),
+        'min_date': min_date,
+        'max_date': max_date,
+    }
+
+@app.route('/api/cube/<name>')
+def api_cube(name):
+    """JSON API endpoint for a configured stat-pair grid (see STAT_CUBES), same filters as /api/data."""
+    if name not in STAT_CUBES:
+        return jsonify({'error': f"Unknown grid '{name}'", 'grids': sorted(STAT_CUBES)}), 404
+    x_column, y_column = STAT_CUBES[name]
+    snap = snapshot.get_snapshot()
+    return jsonify(build_stat_cube(snap.generation, x_column, y_column, request_filters(),
+                                   int(request.args.get('timeline', 100))))
+
+
+@lru_cache(maxsize=FILTER_CACHE_SIZE)
+def build_map_grids(generation, filters, timeline_value):
+    """
+    K/D grid for every map at once.
     
-    query = f'''
-        SELECT kills, deaths, player, map, team, result, match_date, description
-        FROM matches
-        {where_clause}
-    '''
-    rows = conn.execute(query, params).fetchall()
+    One bincount over (map code, K/D cell) for the filtered rows gives the
+    full maps x cells count matrix; each map then keeps only its non-zero
+    cells. Cached per data generation and filters.
+    """
+    snap = snapshot.get_snapshot()
+    maps = snap.values('map')
+    dates = snap.values('date')
+    min_date = dates[0] if dates else '2023-01-01'
+    max_date = dates[-1] if dates else '2026-12-31'
+    cutoff_date = get_timeline_cutoff(min_date, max_date, timeline_value)
+    
+    rows = np.flatnonzero(filter_mask(snap, filters, cutoff_date))
+    n_cells = len(snap.cell_count)
+    keys = snap.map_codes[rows].astype(np.int64) * n_cells + snap.cell[rows]
+    counts = np.bincount(keys, minlength=len(maps) * n_cells).reshape(len(maps), n_cells)
+    
+    grids = {}
+    for map_code in np.flatnonzero(counts.any(axis=1)).tolist():
+        cells = np.flatnonzero(counts[map_code])
+        grids[maps[map_code] or 'Unknown'] = {
+            'kills': snap.cell_kills[cells].tolist(),
+            'deaths': snap.cell_deaths[cells].tolist(),
+            'counts': counts[map_code, cells].tolist(),
+            'max_count': int(counts[map_code].max()),
+            'total': int(counts[map_code].sum()),
+        }
+    return {'maps': grids, 'min_date': min_date, 'max_date': max_date}
+
+@app.route('/api/grids/by-map')
+def api_grids_by_map():
+    """
+    JSON API endpoint for per-map K/D grids (small multiples), same filters
+    as /api/data. Sparse: each map lists its non-empty cells as parallel
+    kills/deaths/counts arrays.
+    """
+    snap = snapshot.get_snapshot()
+    return jsonify(build_map_grids(snap.generation, request_filters(), int(request.args.get('timeline', 100))))
+
+
+@lru_cache(maxsize=FILTER_CACHE_SIZE)
+def build_grid_frames(generation, filters):
+    """
+    Per-date K/D grid increments for a set of filters, for timeline playback.
     
-    # Group by kills, deaths
-    scores = {}
-    for row in rows:
-        key = (row['kills'], row['deaths'])
-        if key not in scores:
-            scores[key] = {'count': 0, 'matches': [], 'wins': 0, 'total_with_result': 0}
-        
-        scores[key]['count'] += 1
-        
-        # Track wins for win percentage
-        if row['result']:
-            scores[key]['total_with_result'] += 1
-            if row['result'] == 'Win':
-                scores[key]['wins'] += 1
-        
-        formatted = f"{row['player']} on {row['map']}"
-        if row['result']:
-            formatted += f" | {row['result']}"
-        if row['match_date']:
-            formatted += f" | {row['match_date']}"
-        if row['team']:
-            formatted += f"\nTeam: {row['team']}"
-        if row['description']:
-            formatted += f"\n{row['description']}"
-        
-        if formatted not in scores[key]['matches']:
-            scores[key]['matches'].append(formatted)
-    
-    # Calculate win percentages and finalize
-    for key in scores:
-        scores[key]['details'] = '\n\n'.join(scores[key]['matches'])
-        if scores[key]['total_with_result'] > 0:
-            scores[key]['win_pct'] = (scores[key]['wins'] / scores[key]['total_with_result']) * 100
+    Filtered rows are keyed by (date code, cell) and counted in one pass;
+    the sorted keys come out date-major, so each date's frame is a
+    contiguous slice. Cached per data generation and filters.
+    """
+    snap = snapshot.get_snapshot()
+    dates = snap.values('date')
+    n_cells = len(snap.cell_count)
+    
+    rows = np.flatnonzero(filter_mask(snap, filters, None))
+    # Undated rows (code -1) sort first as their own frame
+    keys = (snap.date_codes[rows].astype(np.int64) + 1) * n_cells + snap.cell[rows]
+    keys, counts = np.unique(keys, return_counts=True)
+    frame_dates = keys // n_cells - 1
+    cells = keys % n_cells
+    kills = snap.cell_kills[cells].tolist()
+    deaths = snap.cell_deaths[cells].tolist()
+    counts = counts.tolist()
+    
+    frames = {}
+    undated = []
+    bounds = np.flatnonzero(np.diff(frame_dates)) + 1
+    for start, end in zip([0] + bounds.tolist(), bounds.tolist() + [len(keys)]):
+        if start == end:
+            continue
+        frame = [[kills[i], deaths[i], counts[i]] for i in range(start, end)]
+        date_code = int(frame_dates[start])
+        if date_code < 0:
+            undated = frame
         else:
-            scores[key]['win_pct'] = None
+            frames[dates[date_code]] = frame
     
-    max_count = max([info['count'] for info in scores.values()]) if scores else 1
+    return {
+        'dates': list(frames),
+        'frames': frames,
+        'undated': undated,
+        'total_rows': int(len(rows)),
+    }
+
+@app.route('/api/grid-frames')
+def api_grid_frames():
+    """
+    JSON API endpoint for grid playback: date -> [[kills, deaths, +count], ...]
+    for the rows added on each date (in date order), same filters as
+    /api/data without timeline. Rows with no date are listed under undated.
+    """
+    snap = snapshot.get_snapshot()
+    return jsonify(build_grid_frames(snap.generation, request_filters()))
+
+
+@lru_cache(maxsize=FILTER_CACHE_SIZE)
+def build_comparison(generation, filters_a, timeline_a, filters_b, timeline_b):
+    """
+    Compare the K/D grids of two filter sets.
     
-    # Get scorigamis (filtered)
-    scorigami_query = f'''
-        SELECT kills, deaths
-        FROM matches
-        {where_clause}
-        GROUP BY kills, deaths
-        HAVING COUNT(*) = 1
-    '''
-    overall_scorigamis_raw = conn.execute(scorigami_query, params).fetchall()
-    overall_scorigamis = [[s['kills'], s['deaths']] for s in overall_scorigamis_raw]
-    
-    # Get unique players and teams
-    unique_players = conn.execute('SELECT DISTINCT player FROM matches ORDER BY LOWER(player)').fetchall()
-    unique_teams_raw = conn.execute('SELECT DISTINCT team FROM matches WHERE team IS NOT NULL AND team != "" ORDER BY team').fetchall()
-    unique_teams = [row['team'] for row in unique_teams_raw]
-    
-    # Get ALL recent scorigamis ordered by match date (most recent unique kill/death combinations)
-    recent_scorigamis_query = '''
-        SELECT m.kills, m.deaths, m.player, m.map, m.team, m.result, m.match_date, m.description
-        FROM matches m
-        INNER JOIN (
-            SELECT kills, deaths
-            FROM matches
-            GROUP BY kills, deaths
-            HAVING COUNT(*) = 1
-        ) unique_scores ON m.kills = unique_scores.kills AND m.deaths = unique_scores.deaths
-        ORDER BY m.match_date DESC
-    '''
-    recent_scorigamis_raw = conn.execute(recent_scorigamis_query).fetchall()
-    
-    recent_scorigamis = []
-    for row in recent_scorigamis_raw:
-        # Extract opponent team from description
-        opponent = None
-        if row['description'] and row['team']:
-            desc = row['description']
-            if ' vs ' in desc:
-                parts = desc.split(' vs ')
-                if len(parts) > 1:
-                    team2 = parts[1].strip()
-                    before_vs = parts[0].strip()
-                    
-                    if row['team'] == team2:
-                        words = before_vs.split()
-                        found_opponent = None
-                        
-                        for num_words in range(min(4, len(words)), 0, -1):
-                            potential_team = ' '.join(words[-num_words:])
-                            if potential_team in unique_teams and potential_team != row['team']:
-                                found_opponent = potential_team
-                                break
-                        
-                        opponent = found_opponent
-                    else:
-                        opponent = team2
-        
-        recent_scorigamis.append({
-            'kills': row['kills'],
-            'deaths': row['deaths'],
-            'player': row['player'],
-            'map': row['map'],
-            'team': row['team'],
-            'opponent': opponent,
-            'result': row['result'],
-            'match_date': row['match_date'],
-            'description': row['description']
-        })
+    Both masks are evaluated over the same snapshot and counted in one pass
+    over the union of their rows, with each side as bincount weights.
+    Cached per data generation and both filter sets.
+    """
+    snap = snapshot.get_snapshot()
+    dates = snap.values('date')
+    min_date = dates[0] if dates else '2023-01-01'
+    max_date = dates[-1] if dates else '2026-12-31'
     
-    # Get totals
-    total_query = 'SELECT SUM(kills) as total_kills, SUM(deaths) as total_deaths FROM matches' + where_clause
-    totals = conn.execute(total_query, params).fetchone()
-    total_kills = totals['total_kills'] if totals and totals['total_kills'] else 0
-    total_deaths = totals['total_deaths'] if totals and totals['total_deaths'] else 0
-    
-    # Leaderboards (filtered)
-    leaderboard_total_kills = rank_leaderboard(conn.execute(f'''
-        SELECT player, SUM(kills) as total_kills
-        FROM matches {where_clause} GROUP BY player ORDER BY total_kills DESC
-    ''', params).fetchall(), 'total_kills')
-    
-    # Scorigami Leaders
-    if conditions:
-        leaderboard_exclusive = rank_leaderboard(conn.execute(f'''
-            SELECT player, COUNT(DISTINCT kills || '-' || deaths) as exclusive_scores
-            FROM matches m1
-            {where_clause}
-            AND NOT EXISTS (
-                SELECT 1 FROM matches m2 
-                WHERE m2.kills = m1.kills AND m2.deaths = m1.deaths AND m2.player != m1.player
-            )
-            GROUP BY player ORDER BY exclusive_scores DESC
-        ''', params).fetchall(), 'exclusive_scores')
-    else:
-        leaderboard_exclusive = rank_leaderboard(conn.execute('''
-            SELECT player, COUNT(DISTINCT kills || '-' || deaths) as exclusive_scores
-            FROM matches m1
-            WHERE NOT EXISTS (
-                SELECT 1 FROM matches m2 
-                WHERE m2.kills = m1.kills AND m2.deaths = m1.deaths AND m2.player != m1.player
-            )
-            GROUP BY player ORDER BY exclusive_scores DESC
-        ''').fetchall(), 'exclusive_scores')
-    
-    leaderboard_maps_played = rank_leaderboard(conn.execute(f'''
-        SELECT player, COUNT(*) as total_matches
-        FROM matches {where_clause} GROUP BY player ORDER BY total_matches DESC
-    ''', params).fetchall(), 'total_matches')
-    
-    leaderboard_kd = rank_leaderboard(conn.execute(f'''
-        SELECT player, SUM(kills) - SUM(deaths) AS kill_death_difference
-        FROM matches {where_clause} GROUP BY player ORDER BY kill_death_difference DESC
-    ''', params).fetchall(), 'kill_death_difference')
-    
-    conn.close()
+    mask_a = filter_mask(snap, filters_a, get_timeline_cutoff(min_date, max_date, timeline_a))
+    mask_b = filter_mask(snap, filters_b, get_timeline_cutoff(min_date, max_date, timeline_b))
+    rows = np.flatnonzero(mask_a | mask_b)
+    n_cells = len(snap.cell_count)
+    cells = snap.cell[rows]
+    counts_a = np.bincount(cells, weights=mask_a[rows], minlength=n_cells).astype(np.int64)
+    counts_b = np.bincount(cells, weights=mask_b[rows], minlength=n_cells).astype(np.int64)
     
-    # Convert scores dict keys to strings for JSON
-    scores_json = {}
-    for (k, d), info in scores.items():
-        scores_json[f"{k},{d}"] = {
-            'count': info['count'],
-            'details': info['details'],
-            'win_pct': info['win_pct']
+    cell_kills = snap.cell_kills.tolist()
+    cell_deaths = snap.cell_deaths.tolist()
+    
+    def cell_list(selected):
+        return [[cell_kills[c], cell_deaths[c]] for c in np.flatnonzero(selected).tolist()]
+    
+    scores = {}
+    for c in np.flatnonzero((counts_a > 0) | (counts_b > 0)).tolist():
+        a, b = int(counts_a[c]), int(counts_b[c])
+        scores[f"{cell_kills[c]},{cell_deaths[c]}"] = {'a': a, 'b': b, 'diff': a - b}
+    
+    return {
+        'scores': scores,
+        'only_a': cell_list((counts_a > 0) & (counts_b == 0)),
+        'only_b': cell_list((counts_b > 0) & (counts_a == 0)),
+        'max_count_a': int(counts_a.max()) if len(rows) else 0,
+        'max_count_b': int(counts_b.max()) if len(rows) else 0,
+        'total_a': int(counts_a.sum()),
+        'total_b': int(counts_b.sum()),
+    }
+
+@app.route('/api/compare')
+def api_compare():
+    """
+    JSON API endpoint comparing two filter sets cell by cell. Each side takes
+    the /api/data filters prefixed with a. or b. (a.player=X&b.player=Y);
+    a.timeline / b.timeline default to timeline.
+    """
+    timeline_value = request.args.get('timeline', 100, type=int)
+    snap = snapshot.get_snapshot()
+    return jsonify(build_comparison(
+        snap.generation,
+        request_filters('a.'), request.args.get('a.timeline', timeline_value, type=int),
+        request_filters('b.'), request.args.get('b.timeline', timeline_value, type=int)))
+
+
+def describe_game(snap, g):
+    """Game as a dict, for first occurrences and recent scorigamis."""
+    teams = snap.values('team')
+    date_code = snap.game_date_codes[g]
+    return {
+        'id': int(snap.game_id[g]),
+        'team1': teams[snap.game_team1_codes[g]] or None,
+        'team2': teams[snap.game_team2_codes[g]] or None,
+        'team1_score': int(snap.game_team1_score[g]),
+        'team2_score': int(snap.game_team2_score[g]),
+        'map': snap.values('map')[snap.game_map_codes[g]],
+        'match_date': snap.values('date')[date_code] if date_code >= 0 else None,
+        'description': snap.values('description')[snap.game_description_codes[g]],
+    }
+
+
+def round_grid_games(snap, selected_team1, selected_team2, timeline_value):
+    """Games (snapshot game indexes) the round-score grid counts for a set of filters."""
+    dates = snap.values('date')
+    cutoff_date = get_timeline_cutoff(dates[0], dates[-1], timeline_value) if dates else None
+    mask = np.ones(len(snap.game_id), dtype=bool)
+    for selected in (selected_team1, selected_team2):
+        if selected != 'all':
+            code = snap.code('team', selected)
+            mask &= (snap.game_team1_codes == code) | (snap.game_team2_codes == code)
+    if cutoff_date:
+        mask &= (snap.game_date_codes >= 0) & (snap.game_date_codes <= snap.date_cutoff_code(cutoff_date))
+    return np.flatnonzero(mask)
+
+
+@lru_cache(maxsize=FILTER_CACHE_SIZE)
+def build_round_grid(generation, selected_team1, selected_team2, timeline_value):
+    """
+    Compute the round-score grid for a set of filters.
+    
+    The game-level counterpart of build_dashboard: each scored map is one
+    entry keyed by (winning, losing) round score. team1 keeps games the team
+    played, team2 keeps games against that opponent. Like the dashboard,
+    cells carry counts and their first game; a cell's games are listed by
+    round_cell_details when it's opened, and recent scorigamis are paged by
+    round_scorigamis_page. Results are cached per data generation and
+    filters, so the generation argument only keys the cache.
+    """
+    snap = snapshot.get_snapshot()
+    dates = snap.values('date')
+    min_date = dates[0] if dates else '2023-01-01'
+    max_date = dates[-1] if dates else '2026-12-31'
+    
+    games = round_grid_games(snap, selected_team1, selected_team2, timeline_value)
+    n_cells = len(snap.round_cell_count)
+    cells = snap.game_cell[games]
+    counts = np.bincount(cells, minlength=n_cells)
+    cell_winning = snap.round_cell_winning.tolist()
+    cell_losing = snap.round_cell_losing.tolist()
+    
+    # First occurrence per cell within the filter: earliest date, then game
+    # id (undated games last)
+    undated = np.iinfo(np.int32).max
+    game_dates = np.where(snap.game_date_codes[games] >= 0, snap.game_date_codes[games], undated)
+    order = games[np.lexsort((snap.game_id[games], game_dates))]
+    first_cells, first_index = np.unique(snap.game_cell[order], return_index=True)
+    
+    scores = {}
+    for cell, g in zip(first_cells.tolist(), order[first_index].tolist()):
+        scores[f"{cell_winning[cell]},{cell_losing[cell]}"] = {
+            'count': int(counts[cell]),
+            'first': describe_game(snap, g)
+        }
+    
+    return {
+        'scores': scores,
+        'max_count': int(counts.max()) if scores else 1,
+        'overall_scorigamis': [[cell_winning[c], cell_losing[c]] for c in np.flatnonzero(counts == 1).tolist()],
+        'total_games': int(len(games)),
+        'min_date': min_date,
+        'max_date': max_date,
+    }
+
+
+@lru_cache(maxsize=4)
+def round_scorigami_order(generation):
+    """
+    Games whose round score has occurred exactly once overall, most recent
+    first (undated last, ties by game id), with their negated date codes as
+    the ascending keys recent pages are searched on.
+    """
+    snap = snapshot.get_snapshot()
+    games = snap.round_cell_first[snap.round_cell_count == 1]
+    games = games[games >= 0]
+    keys = -snap.game_date_codes[games]
+    order = np.lexsort((snap.game_id[games], keys))
+    return games[order], keys[order]
+
+
+def round_scorigamis_page(snap, limit=RECENT_SCORIGAMIS, before=None):
+    """
+    One page of recent round-score scorigamis, like recent_scorigamis_page
+    (the cursor's id is the game id).
+    
+    Returns:
+        Tuple of (scorigamis, next_cursor or None on the last page)
+    """
+    games, keys = round_scorigami_order(snap.generation)
+    start = scorigami_page_start(snap, keys, lambda lo, hi: snap.game_id[games[lo:hi]], before)
+    page = [dict(describe_game(snap, g),
+                 winning_score=int(snap.round_cell_winning[snap.game_cell[g]]),
+                 losing_score=int(snap.round_cell_losing[snap.game_cell[g]]))
+            for g in games[start:start + limit].tolist()]
+    next_cursor = None
+    if page and start + limit < len(keys):
+        last = page[-1]
+        next_cursor = f"{last['match_date'] or ''},{last['id']}"
+    return page, next_cursor
+
+
+def round_cell_details(snap, selected_team1, selected_team2, timeline_value, winning, losing):
+    """Games in one round-score cell under a set of filters, as tooltip text (see cell_details)."""
+    games = round_grid_games(snap, selected_team1, selected_team2, timeline_value)
+    cells = snap.game_cell[games]
+    matching = (snap.round_cell_winning[cells] == winning) & (snap.round_cell_losing[cells] == losing)
+    matches = {}
+    for g in games[matching].tolist():
+        info = describe_game(snap, g)
+        formatted = f"{info['team1']} {info['team1_score']}-{info['team2_score']} {info['team2']} on {info['map']}"
+        if info['match_date']:
+            formatted += f" | {info['match_date']}"
+        if info['description']:
+            formatted += f"\n{info['description']}"
+        matches[formatted] = None
+    return '\n\n'.join(matches)
+
+@app.route('/api/rounds')
+def api_rounds():
+    """
+    JSON API endpoint for the round-score grid (map scores like 13-11), same filters as /api/data.
+    Recent round-score scorigamis are paged with limit and before=<recent_cursor>.
+    """
+    selected_team1 = request.args.get('team1', 'all')
+    selected_team2 = request.args.get('team2', 'all')
+    timeline_value = int(request.args.get('timeline', 100))
+    
+    snap = snapshot.get_snapshot()
+    recent_scorigamis, recent_cursor = request_recent_scorigamis(snap, round_scorigamis_page)
+    return jsonify(dict(build_round_grid(snap.generation, selected_team1, selected_team2, timeline_value),
+                        recent_scorigamis=recent_scorigamis, recent_cursor=recent_cursor))
+
+
+def describe_team_entry(snap, e):
+    """Team-map entry as a dict, for first occurrences and recent scorigamis."""
+    teams = snap.values('team')
+    date_code = snap.team_map_date_codes[e]
+    return {
+        'id': int(e),
+        'team': teams[snap.team_map_team_codes[e]] or None,
+        'opponent': teams[snap.team_map_opponent_codes[e]] or None,
+        'kills': int(snap.team_map_kills[e]),
+        'deaths': int(snap.team_map_deaths[e]),
+        'map': snap.values('map')[snap.team_map_map_codes[e]],
+        'result': snap.values('result')[snap.team_map_result_codes[e]] or None,
+        'match_date': snap.values('date')[date_code] if date_code >= 0 else None,
+        'description': snap.values('description')[snap.team_map_description_codes[e]],
+    }
+
+
+@lru_cache(maxsize=4)
+def team_scorigami_order(generation):
+    """
+    Team-map entries whose K/D line has occurred exactly once overall, most
+    recent first (undated last, ties by entry), with their negated date
+    codes as the ascending keys recent pages are searched on.
+    """
+    snap = snapshot.get_snapshot()
+    entries = np.flatnonzero(snap.team_map_cell_count[snap.team_map_cell] == 1)
+    keys = -snap.team_map_date_codes[entries]
+    order = np.argsort(keys, kind='stable')
+    return entries[order], keys[order]
+
+
+def team_scorigamis_page(snap, limit=RECENT_SCORIGAMIS, before=None):
+    """
+    One page of recent team scorigamis, like recent_scorigamis_page. The
+    cursor's id is the team-map entry's position in the snapshot, so it is
+    only meaningful within one data generation; a bare date always works.
+    
+    Returns:
+        Tuple of (scorigamis, next_cursor or None on the last page)
+    """
+    entries, keys = team_scorigami_order(snap.generation)
+    start = scorigami_page_start(snap, keys, lambda lo, hi: entries[lo:hi], before)
+    page = [describe_team_entry(snap, e) for e in entries[start:start + limit].tolist()]
+    next_cursor = None
+    if page and start + limit < len(keys):
+        last = page[-1]
+        next_cursor = f"{last['match_date'] or ''},{last['id']}"
+    return page, next_cursor
+
+
+def team_grid_entries(snap, selected_team1, selected_team2, timeline_value):
+    """Team-map entries the team grid counts for a set of filters."""
+    dates = snap.values('date')
+    cutoff_date = get_timeline_cutoff(dates[0], dates[-1], timeline_value) if dates else None
+    mask = np.ones(len(snap.team_map_cell), dtype=bool)
+    if selected_team1 != 'all':
+        mask &= snap.team_map_team_codes == snap.code('team', selected_team1)
+    if selected_team2 != 'all':
+        mask &= snap.team_map_opponent_codes == snap.code('team', selected_team2)
+    if cutoff_date:
+        mask &= (snap.team_map_date_codes >= 0) & (snap.team_map_date_codes <= snap.date_cutoff_code(cutoff_date))
+    return np.flatnonzero(mask)
+
+
+@lru_cache(maxsize=FILTER_CACHE_SIZE)
+def build_team_grid(generation, selected_team1, selected_team2, timeline_value):
+    """
+    Compute the team-level K/D grid for a set of filters.
+    
+    Each entry is one team on one map: its players' summed kills against
+    their summed deaths (team_map_stats). team1 keeps the team's maps,
+    team2 its maps against that opponent. Served from the snapshot with
+    masks and a bincount, cached per data generation and filters. A cell's
+    entries are listed by team_cell_details when it's opened.
+    """
+    snap = snapshot.get_snapshot()
+    dates = snap.values('date')
+    min_date = dates[0] if dates else '2023-01-01'
+    max_date = dates[-1] if dates else '2026-12-31'
+    
+    entries = team_grid_entries(snap, selected_team1, selected_team2, timeline_value)
+    n_cells = len(snap.team_map_cell_count)
+    cells = snap.team_map_cell[entries]
+    counts = np.bincount(cells, minlength=n_cells)
+    result_codes = snap.team_map_result_codes[entries]
+    wins = np.bincount(cells, weights=result_codes == snap.code('result', 'Win'), minlength=n_cells)
+    with_result = np.bincount(cells, weights=result_codes != snap.code('result', ''), minlength=n_cells)
+    cell_kills = snap.team_map_cell_kills.tolist()
+    cell_deaths = snap.team_map_cell_deaths.tolist()
+    
+    # First occurrence per cell within the filter (undated entries last)
+    undated = np.iinfo(np.int32).max
+    entry_dates = np.where(snap.team_map_date_codes[entries] >= 0, snap.team_map_date_codes[entries], undated)
+    order = entries[np.argsort(entry_dates, kind='stable')]
+    first_cells, first_index = np.unique(snap.team_map_cell[order], return_index=True)
+    
+    scores = {}
+    for cell, e in zip(first_cells.tolist(), order[first_index].tolist()):
+        total_with_result = int(with_result[cell])
+        scores[f"{cell_kills[cell]},{cell_deaths[cell]}"] = {
+            'count': int(counts[cell]),
+            'win_pct': float(wins[cell] / total_with_result) * 100 if total_with_result > 0 else None,
+            'first': describe_team_entry(snap, e)
         }
     
+    return {
+        'scores': scores,
+        'max_count': int(counts.max()) if scores else 1,
+        'overall_scorigamis': [[cell_kills[c], cell_deaths[c]] for c in np.flatnonzero(counts == 1).tolist()],
+        'total_kills': int(snap.team_map_kills[entries].sum(dtype=np.int64)),
+        'total_deaths': int(snap.team_map_deaths[entries].sum(dtype=np.int64)),
+        'min_date': min_date,
+        'max_date': max_date,
+    }
+
+
+def team_cell_details(snap, selected_team1, selected_team2, timeline_value, kills, deaths):
+    """Team-map entries in one team K/D cell under a set of filters, as tooltip text (see cell_details)."""
+    entries = team_grid_entries(snap, selected_team1, selected_team2, timeline_value)
+    cells = snap.team_map_cell[entries]
+    matching = (snap.team_map_cell_kills[cells] == kills) & (snap.team_map_cell_deaths[cells] == deaths)
+    matches = {}
+    for e in entries[matching].tolist():
+        info = describe_team_entry(snap, e)
+        formatted = f"{info['team']} vs {info['opponent']} on {info['map']}"
+        if info['result']:
+            formatted += f" | {info['result']}"
+        if info['match_date']:
+            formatted += f" | {info['match_date']}"
+        if info['description']:
+            formatted += f"\n{info['description']}"
+        matches[formatted] = None
+    return '\n\n'.join(matches)
+
+@app.route('/api/team-grid')
+def api_team_grid():
+    """
+    JSON API endpoint for the team-level K/D grid (team kills vs deaths per map).
+    Recent team scorigamis are paged with limit and before=<recent_cursor>.
+    """
+    selected_team1 = request.args.get('team1', 'all')
+    selected_team2 = request.args.get('team2', 'all')
+    timeline_value = int(request.args.get('timeline', 100))
+    
+    snap = snapshot.get_snapshot()
+    recent_scorigamis, recent_cursor = request_recent_scorigamis(snap, team_scorigamis_page)
+    return jsonify(dict(build_team_grid(snap.generation, selected_team1, selected_team2, timeline_value),
+                        recent_scorigamis=recent_scorigamis, recent_cursor=recent_cursor))
+
+
+@lru_cache(maxsize=FILTER_CACHE_SIZE)
+def build_head_to_head(generation, date_from, date_to):
+    """
+    Team x team matrix of maps played, maps won and aggregate K-D.
+    
+    Built from the team-map entries (team_map_stats, kept at ingest) under
+    canonical team names. Entries are indexed by date, so a date range is
+    one slice, counted with a bincount per measure over team-pair keys:
+    O(entries in range + teams^2). Cached per data generation and range.
+    """
+    snap = snapshot.get_snapshot()
+    names = snap.h2h_team_values.tolist()
+    n_teams = len(names)
+    
+    # Date range -> slice of the date-sorted entries (undated ones only
+    # count when the range is open on both ends)
+    lo, hi = 0, len(snap.h2h_order)
+    if date_from or date_to:
+        # First date code on or after date_from (0 skips the undated)
+        first_code = int(np.searchsorted(snap.date_values, date_from, side='left')) if date_from else 0
+        lo = int(np.searchsorted(snap.h2h_dates, first_code, side='left'))
+    if date_to:
+        hi = int(np.searchsorted(snap.h2h_dates, snap.date_cutoff_code(date_to), side='right'))
+    entries = snap.h2h_order[lo:max(lo, hi)]
+    
+    team = snap.h2h_team[entries]
+    opponent = snap.h2h_opponent[entries]
+    both = (team >= 0) & (opponent >= 0)
+    entries, team, opponent = entries[both], team[both], opponent[both]
+    keys = team.astype(np.int64) * n_teams + opponent
+    size = n_teams * n_teams
+    played = np.bincount(keys, minlength=size).reshape(n_teams, n_teams)
+    won = np.bincount(keys, weights=snap.team_map_result_codes[entries] == snap.code('result', 'Win'),
+                      minlength=size).astype(np.int64).reshape(n_teams, n_teams)
+    kd = np.bincount(keys, weights=snap.team_map_kills[entries].astype(np.int64) - snap.team_map_deaths[entries],
+                     minlength=size).astype(np.int64).reshape(n_teams, n_teams)
+    
+    # Only teams with a map in range; the matrices are rows x columns of those
+    present = np.flatnonzero(played.any(axis=1) | played.any(axis=0))
+    grid = np.ix_(present, present)
+    return {
+        'teams': [names[t] for t in present.tolist()],
+        'maps_played': played[grid].tolist(),
+        'maps_won': won[grid].tolist(),
+        'kd': kd[grid].tolist(),
+        'date_from': date_from,
+        'date_to': date_to,
+    }
+
+@app.route('/api/head-to-head')
+def api_head_to_head():
+    """
+    JSON API endpoint for the head-to-head team matrix. maps_played[i][j]
+    is how many maps teams[i] played against teams[j], maps_won[i][j] how
+    many teams[i] won and kd[i][j] teams[i]'s kills minus deaths in them.
+    Optional from / to (YYYY-MM-DD) limit it to a date range; anything else
+    is a 400 rather than a silently empty matrix.
+    """
+    from datetime import datetime
+    
+    bounds = []
+    for name in ('from', 'to'):
+        value = request.args.get(name) or None
+        if value is not None:
+            try:
+                valid = datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d') == value
+            except ValueError:
+                valid = False
+            if not valid:
+                return jsonify({'error': f"Invalid '{name}' date '{value}', expected YYYY-MM-DD"}), 400
+        bounds.append(value)
+    date_from, date_to = bounds
+    if date_from and date_to and date_from > date_to:
+        return jsonify({'error': f"'from' ({date_from}) is after 'to' ({date_to})"}), 400
+    
+    snap = snapshot.get_snapshot()
+    return jsonify(build_head_to_head(snap.generation, date_from, date_to))
+
+
+# /api/suggest kinds -> snapshot columns
+SUGGEST_COLUMNS = {'player': 'player', 'team': 'team', 'map': 'map'}
+
+
+@app.route('/api/suggest')
+def api_suggest():
+    """Autocomplete: values of a kind (player/team/map) starting with q, most frequent first."""
+    kind = request.args.get('kind', 'player')
+    if kind not in SUGGEST_COLUMNS:
+        return jsonify({'error': f"Unknown kind '{kind}'", 'kinds': sorted(SUGGEST_COLUMNS)}), 400
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+    snap = snapshot.get_snapshot()
     return jsonify({
-        'scores': scores_json,
-        'max_count': max_count,
-        'overall_scorigamis': overall_scorigamis,
-        'leaderboard_total_kills': leaderboard_total_kills,
-        'leaderboard_exclusive': leaderboard_exclusive,
-        'leaderboard_maps_played': leaderboard_maps_played,
-        'leaderboard_kd': leaderboard_kd,
-        'total_kills': total_kills,
-        'total_deaths': total_deaths,
-        'recent_scorigamis': recent_scorigamis,
-        'unique_players': [p['player'] for p in unique_players],
-        'unique_teams': unique_teams
+        'kind': kind,
+        'suggestions': snap.suggest(SUGGEST_COLUMNS[kind], request.args.get('q', ''), limit)
     })
 
 
+@app.route('/api/search')
+def api_search():
+    """
+    Full-text search over matches (player, team, map, event). Paginated with
+    page/per_page over the newest database.SEARCH_CANDIDATES hits; capped is
+    true when the query matched more rows than that and older ones are left out.
+    """
+    text = request.args.get('q', '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+    
+    results, has_more, capped = database.search_matches(text, limit=per_page, offset=(page - 1) * per_page)
+    return jsonify({
+        'query': text,
+        'page': page,
+        'per_page': per_page,
+        'has_more': has_more,
+        'capped': capped,
+        'candidates': database.SEARCH_CANDIDATES,
+        'results': results
+    })
+
+
+@lru_cache(maxsize=4)
+def _json_body(builder, generation):
+    """Serialized output of a per-generation builder, cached with it."""
+    # Same compact output as jsonify
+    return app.json.dumps(builder(generation), separators=(',', ':'))
+
+
+def json_response(builder, generation):
+    """
+    JSON response for a builder that depends only on the data generation.
+    Serializing a race payload costs more than building it, so the body is
+    cached too and repeat requests only copy bytes.
+    """
+    return app.response_class(_json_body(builder, generation) + '\n', mimetype='application/json')
+
+
 @app.route('/api/kd-race')
 def api_kd_race():
     """API endpoint for K-D race chart data - returns cumulative K-D over time for top players."""
-    from collections import defaultdict
-    import re
-    
-    # Configuration
-    track_n_players = 250  # Track top 250 players by maps played
-    
-    # Team name mapping - maps alternate names to canonical name (same as team-race)
-    team_name_mapping = {
-        'VISA KRÜ': 'KRÜ Esports',
-        'VISA KRÜ(KRÜ Esports)': 'KRÜ Esports',
-        'KRÜ Esports': 'KRÜ Esports',
-        'LEVIATÁN': 'Leviatán',
-        'LOUD': 'LOUD',
-        'FURIA': 'FURIA',
-        'FURIA Esports': 'FURIA',
-        'MIBR': 'MIBR',
-        'MIBR Esports': 'MIBR',
-        '100 Thieves': '100 Thieves',
-        '100T': '100 Thieves',
-        'Cloud9': 'Cloud9',
-        'C9': 'Cloud9',
-        'Evil Geniuses': 'Evil Geniuses',
-        'EG': 'Evil Geniuses',
-        'G2 Esports': 'G2 Esports',
-        'G2': 'G2 Esports',
-        'NRG Esports': 'NRG',
-        'NRG': 'NRG',
-        'Sentinels': 'Sentinels',
-        'SEN': 'Sentinels',
-        'FNATIC': 'FNATIC',
-        'FNC': 'FNATIC',
-        'FUT Esports': 'FUT Esports',
-        'FUT': 'FUT Esports',
-        'Guild Esports': 'Guild Esports',
-        'GUILD': 'Guild Esports',
-        'Team Liquid': 'Team Liquid',
-        'TL': 'Team Liquid',
-        'Team Vitality': 'Team Vitality',
-        'Vitality': 'Team Vitality',
-        'NaVi': 'Natus Vincere',
-        'Natus Vincere': 'Natus Vincere',
-        'NAVI': 'Natus Vincere',
-        'Fnatic': 'FNATIC',
-        'Paper Rex': 'Paper Rex',
-        'PRX': 'Paper Rex',
-        'DRX': 'DRX',
-        'DRX (V/S Gaming)': 'DRX',
-        'Dragon Ranger Gaming': 'Dragon Ranger Gaming',
-        'DRG': 'Dragon Ranger Gaming',
-        'ZETA DIVISION': 'ZETA DIVISION',
-        'ZETA': 'ZETA DIVISION',
-        'DetonatioN FocusMe': 'DetonatioN FocusMe',
-        'DFM': 'DetonatioN FocusMe',
-        'T1': 'T1',
-        'Gen.G': 'Gen.G',
-        'GenG': 'Gen.G',
-        'RRQ': 'Rex Regum Qeon',
-        'Rex Regum Qeon': 'Rex Regum Qeon',
-        'Talon Esports': 'TALON',
-        'TALON': 'TALON',
-        'TLN': 'TALON',
-        'Team Secret': 'Team Secret',
-        'TS': 'Team Secret',
-        'Global Esports': 'Global Esports',
-        'GE': 'Global Esports',
-        'BLEED': 'BLEED',
-        'Team BLEED': 'BLEED',
-        'Edward Gaming': 'Edward Gaming',
-        'EDG': 'Edward Gaming',
-        'FunPlus Phoenix': 'FunPlus Phoenix',
-        'FPX': 'FunPlus Phoenix',
-        'Bilibili Gaming': 'Bilibili Gaming',
-        'BG': 'Bilibili Gaming',
-        'Trace Esports': 'Trace Esports',
-        'TE': 'Trace Esports',
-        'JDG Gaming': 'JDG Esports',
-        'JDG Esports': 'JDG Esports',
-        'JDG': 'JDG Esports',
-        'Titan FC': 'Titan Esports Club',
-        'Titan Esports Club': 'Titan Esports Club',
-        'XLG': 'Xi Lai Gaming',
-        'Xi Lai Gaming': 'Xi Lai Gaming',
-        'Wolves Esports': 'Wolves Esports',
-        'WO': 'Wolves Esports',
-        'Nova Esports': 'Nova Esports',
-        'NOVA': 'Nova Esports',
-        'Attack All Around': 'Attack All Around',
-        'AAA': 'Attack All Around',
-        'ONIC G': 'ONIC G',
-        'ONIC': 'ONIC G',
-        'Alter Ego': 'Alter Ego',
-        'AE': 'Alter Ego',
-        'BOOM Esports': 'BOOM Esports',
-        'BOOM': 'BOOM Esports',
-        'Rise': 'Rise',
-        'XSET': 'XSET',
-        'The Guard': 'The Guard',
-        'Guard': 'The Guard',
-        'OpTic Gaming': 'OpTic Gaming',
-        'OpTic': 'OpTic Gaming',
-        'Optic': 'OpTic Gaming',
-        'Version1': 'Version1',
-        'V1': 'Version1',
-        'Gambit Esports': 'Gambit Esports',
-        'Gambit': 'Gambit Esports',
-        'Masters Seoul': 'Masters Seoul',
-        'Acend': 'Acend',
-        'ACE': 'Acend',
-        'SuperMassive Blaze': 'SuperMassive Blaze',
-        'SMB': 'SuperMassive Blaze',
-        'Oxygen Esports': 'Oxygen Esports',
-        'OXG': 'Oxygen Esports',
-        'G store in': 'G store in',
-        'G2 Gozen': 'G2 Gozen',
-        'GUILD EK': 'GUILD EK',
-        'FOKUS': 'FOKUS',
-        'FOKUS ME': 'FOKUS',
-        'Heretics': 'Team Heretics',
-        'Team Heretics': 'Team Heretics',
-        'TH': 'Team Heretics',
-        'KOI': 'KOI',
-        'Giants': 'Giants',
-        'GIANTX': 'Giants',
-        'GiantX': 'Giants',
-        'Giants Gaming': 'Giants',
-        'Vodafone Giants': 'Giants',
-        'BBL Esports': 'BBL Esports',
-        'BBL': 'BBL Esports',
-        'Fire Flux Esports': 'Fire Flux Esports',
-        'Fire Flux': 'Fire Flux Esports',
-        'S2V Esports': 'S2V Esports',
-        'S2V': 'S2V Esports',
-        'Case Esports': 'Case Esports',
-        'CASE': 'Case Esports',
-        'M3 Champions': 'M3 Champions',
-        'M3C': 'M3 Champions',
-        'LDLC OL': 'LDLC OL',
-        'LDLC': 'LDLC OL',
-        'Funplus Phoenix': 'FunPlus Phoenix',
-        'Liquid': 'Team Liquid',
-        'Navi': 'Natus Vincere',
-        'Secret': 'Team Secret',
-        'Talon': 'TALON',
-        'Rex Regum': 'Rex Regum Qeon',
-        'Paper': 'Paper Rex',
-        'DetonatioN': 'DetonatioN FocusMe',
-        'Edward': 'Edward Gaming',
-        'Bilibili': 'Bilibili Gaming',
-        'Wolves': 'Wolves Esports',
-        'TYLOO': 'TYLOO',
-        'TyLoo': 'TYLOO',
-        'Karmine Corp': 'Karmine Corp',
-        'KC': 'Karmine Corp',
-        'Gentle Mates': 'Gentle Mates',
-        'All Gamers': 'All Gamers',
-        'AG': 'All Gamers',
-        'Nongshim RedForce': 'Nongshim RedForce',
-        'NS': 'Nongshim RedForce',
-        '2Game Esports': '2Game Esports',
-        'Apeks': 'Apeks',
-    }
-    
-    # Team brand colors (same as team-race)
-    team_colors = {
-        'Paper Rex': '#FF69B4',           # Pink
-        'FNATIC': '#FF6B00',              # Orange
-        'Edward Gaming': '#FFFFFF',       # White
-        'DRX': '#003366',                 # Dark Blue
-        'Gen.G': '#FFD700',               # Gold
-        'Team Heretics': '#FFFF00',       # Yellow
-        'Sentinels': '#FF0000',           # Red
-        'T1': '#DC143C',                  # Red (slightly darker crimson)
-        'Team Liquid': '#0066CC',         # Blue
-        'G2 Esports': '#FF6B6B',          # Light Red
-        'NRG': '#FF8C00',                 # Orange (darker than FNATIC)
-        'Leviatán': '#87CEEB',            # Light Blue
-        'Bilibili Gaming': '#ADD8E6',     # Light Blue (slightly different)
-        'LOUD': '#00FF00',                # Green
-        'FUT Esports': '#808080',         # Grey
-        'Rex Regum Qeon': '#DAA520',      # Gold (slightly darker than Gen.G)
-        'Natus Vincere': '#FFD700',       # Yellow
-        'Evil Geniuses': '#20B2AA',       # Blueish Green
-        'Team Vitality': '#FFCC00',       # Yellow (slightly different)
-        '100 Thieves': '#B22222',         # Red (firebrick)
-        'KRÜ Esports': '#FF69B4',         # Pink
-        'MIBR': '#4169E1',                # Blue
-        'Cloud9': '#87CEEB',              # Light Blue
-        'Karmine Corp': '#1E90FF',        # Blue
-        'FunPlus Phoenix': '#FF4500',     # Red (orange-red)
-        'Trace Esports': '#FFFFFF',       # White
-        'Dragon Ranger Gaming': '#228B22',# Green (forest)
-        'TALON': '#FF4444',               # Red (bright)
-        'Team Secret': '#FFFFFF',         # White
-        'BBL Esports': '#FFD700',         # Gold
-        'ZETA DIVISION': '#FFFFFF',       # White
-        'Giants': '#9370DB',              # Any - purple
-        'FURIA': '#FF8C00',               # Any - orange
-        'DetonatioN FocusMe': '#0000CD',  # Blue (medium)
-        'TYLOO': '#8B0000',               # Dark Red
-        'Global Esports': '#00CED1',      # Any - dark turquoise
-        'KOI': '#4169E1',                 # Blue
-        'Wolves Esports': '#FFD700',      # Gold
-        'Nova Esports': '#800080',        # Purple
-        'JDG Esports': '#FF0000',         # Red
-        'Titan Esports Club': '#708090',  # Any - slate gray
-        'Xi Lai Gaming': '#32CD32',       # Green
-        'Gentle Mates': '#FFB6C1',        # Pink (light)
-        'All Gamers': '#FF0000',          # Red
-        'Nongshim RedForce': '#CC0000',   # Red
-        'Giants Gaming': '#BA55D3',       # Any - medium orchid
-        'BOOM Esports': '#8B0000',        # Dark Red
-        'BLEED': '#9932CC',               # Any - dark orchid
-        'Apeks': '#FFA500',               # Orange
-        '2Game Esports': '#8B008B',       # Purple (dark magenta)
-        # Additional teams
-        'XSET': '#800080',                # Purple
-        'OpTic Gaming': '#00FF00',        # Green
-        'The Guard': '#FFD700',           # Gold
-        'Version1': '#FF0000',            # Red
-        'Gambit Esports': '#FF0000',      # Red
-        'Acend': '#00FFFF',               # Cyan
-        'G2 Gozen': '#FF69B4',            # Pink
-        'Guild Esports': '#00FF00',       # Green
-        'SuperMassive Blaze': '#FF4500',  # Orange Red
-        'Oxygen Esports': '#00FFFF',      # Cyan
-        'Attack All Around': '#FFD700',   # Gold
-        'ONIC G': '#FFD700',              # Gold
-        'Alter Ego': '#FF0000',           # Red
-        'Rise': '#FFD700',                # Gold
-    }
+    return json_response(build_kd_race, snapshot.get_snapshot().generation)
+
+
+@lru_cache(maxsize=2)
+def build_kd_race(generation):
+    """
+    Cumulative K-D over time for the top players, from the snapshot's
+    precomputed series. Cached per data generation.
+    """
+    snap = snapshot.get_snapshot()
+    players = snap.values('player')
+    dates = snap.values('date')
     
-    def normalize_team_name(team_name):
-        """Normalize team name by mapping to canonical name and extracting from parentheses."""
-        if not team_name:
-            return team_name
-        
-        # Check if it's in our mapping
-        if team_name in team_name_mapping:
-            return team_name_mapping[team_name]
-        
-        # Try to extract name from parentheses like "VISA KRÜ(KRÜ Esports)"
-        match = re.search(r'\(([^)]+)\)', team_name)
-        if match:
-            extracted = match.group(1)
-            if extracted in team_name_mapping:
-                return team_name_mapping[extracted]
-            return extracted
-        
-        return team_name
-    
-    # Tournament dates (Masters, Champions, LOCK//IN)
-    tournaments = [
-        # LOCK//IN event (green background)
-        {'name': 'LOCK//IN 2023', 'start': '2023-02-13', 'end': '2023-03-04', 'type': 'lockin'},
-        # Champions events (yellow background)
-        {'name': 'Champions 2023', 'start': '2023-08-06', 'end': '2023-08-26', 'type': 'champions'},
-        {'name': 'Champions 2024', 'start': '2024-08-01', 'end': '2024-08-25', 'type': 'champions'},
-        {'name': 'Champions 2025', 'start': '2025-09-12', 'end': '2025-10-05', 'type': 'champions'},
-        {'name': 'Champions 2026', 'start': '2026-09-23', 'end': '2026-10-18', 'type': 'champions'},
-        # Masters events (purple background)
-        {'name': 'Masters Tokyo 2023', 'start': '2023-06-10', 'end': '2023-06-25', 'type': 'masters'},
-        {'name': 'Masters Madrid 2024', 'start': '2024-03-14', 'end': '2024-03-24', 'type': 'masters'},
-        {'name': 'Masters Shanghai 2024', 'start': '2024-05-23', 'end': '2024-06-09', 'type': 'masters'},
-        {'name': 'Masters Bangkok 2025', 'start': '2025-02-20', 'end': '2025-03-02', 'type': 'masters'},
-        {'name': 'Masters Toronto 2025', 'start': '2025-06-07', 'end': '2025-06-22', 'type': 'masters'},
-        {'name': 'Masters Santiago 2026', 'start': '2026-02-28', 'end': '2026-03-15', 'type': 'masters'},
-        {'name': 'Masters London 2026', 'start': '2026-06-05', 'end': '2026-06-21', 'type': 'masters'},
-    ]
-    
-    conn = database.get_db_connection()
-    
-    # Get top N players by maps played
-    top_players_query = '''
-        SELECT player, COUNT(*) as maps_played, SUM(kills) as total_kills, SUM(deaths) as total_deaths
-        FROM matches 
-        GROUP BY player 
-        ORDER BY maps_played DESC 
-        LIMIT ?
-    '''
-    top_players_rows = conn.execute(top_players_query, (track_n_players,)).fetchall()
-    tracked_players = [row['player'] for row in top_players_rows]
-    
-    # Get all matches for tracked players, ordered by date (include team)
-    placeholders = ','.join('?' * len(tracked_players))
-    matches_query = f'''
-        SELECT player, kills, deaths, match_date, team
-        FROM matches 
-        WHERE player IN ({placeholders})
-        ORDER BY match_date
-    '''
-    rows = conn.execute(matches_query, tracked_players).fetchall()
-    
-    conn.close()
-    
-    if not rows:
-        return jsonify({
+    if not len(snap.race_player_dates):
+        return {
             'dates': [],
             'players': [],
             'data': {},
             'kills_data': {},
             'player_dates': {},
-            'tournaments': tournaments
-        })
-    
-    # Process into date-based cumulative data
-    # First, aggregate kills and deaths per player per date
-    daily_stats = defaultdict(lambda: defaultdict(lambda: {'kills': 0, 'deaths': 0}))
-    all_dates_set = set()
-    
-    # Track first and last appearance for each player
-    player_first_date = {}
-    player_last_date = {}
-    # Track most recent team for each player (by date)
-    player_recent_team = {}
-    
-    for row in rows:
-        date = row['match_date']
-        player = row['player']
-        daily_stats[date][player]['kills'] += row['kills']
-        daily_stats[date][player]['deaths'] += row['deaths']
-        all_dates_set.add(date)
-        
-        # Track first appearance
-        if player not in player_first_date or date < player_first_date[player]:
-            player_first_date[player] = date
-        # Track last appearance and most recent team
-        if player not in player_last_date or date > player_last_date[player]:
-            player_last_date[player] = date
-            # Update most recent team when we see a newer date
-            if row['team']:
-                player_recent_team[player] = normalize_team_name(row['team'])
-        elif player in player_last_date and date == player_last_date[player]:
-            # Same date, still update team if available
-            if row['team']:
-                player_recent_team[player] = normalize_team_name(row['team'])
-    
-    all_dates = sorted(all_dates_set)
-    
-    # Create cumulative data (kills - deaths) and (total kills)
-    player_kills = defaultdict(int)
-    player_deaths = defaultdict(int)
-    date_data = {}
-    kills_data = {}
-    
-    for date in all_dates:
-        # Update cumulative stats for players who played on this date
-        for player in daily_stats[date]:
-            player_kills[player] += daily_stats[date][player]['kills']
-            player_deaths[player] += daily_stats[date][player]['deaths']
-        
-        # Store KD difference for each tracked player
-        date_data[date] = {
-            p: player_kills.get(p, 0) - player_deaths.get(p, 0) 
-            for p in tracked_players
-        }
-        
-        # Store total kills for each tracked player
-        kills_data[date] = {
-            p: player_kills.get(p, 0)
-            for p in tracked_players
+            'tournaments': RACE_TOURNAMENTS
         }
     
+    # Series are precomputed by the snapshot export (top players by maps played)
+    tracked_players = [players[p] for p in snap.race_player_codes.tolist()]
+    all_dates = [dates[d] for d in snap.race_player_dates.tolist()]
+    date_data, kills_data = snapshot.race_series_json(tracked_players, all_dates,
+                                             snap.race_player_cum_kills, snap.race_player_cum_deaths)
+    
     # Build response with player info including first/last dates and team color
     players_info = []
-    for row in top_players_rows:
-        kd = (row['total_kills'] or 0) - (row['total_deaths'] or 0)
-        player_team = player_recent_team.get(row['player'])
-        player_color = team_colors.get(player_team) if player_team else None
+    for i, player in enumerate(tracked_players):
+        player_team = str(snap.race_player_team[i]) or None
+        first, last = int(snap.race_player_first[i]), int(snap.race_player_last[i])
         players_info.append({
-            'player': row['player'],
-            'maps_played': row['maps_played'],
-            'kd': kd,
-            'total_kills': row['total_kills'] or 0,
-            'first_date': player_first_date.get(row['player']),
-            'last_date': player_last_date.get(row['player']),
+            'player': player,
+            'maps_played': int(snap.race_player_maps[i]),
+            'kd': int(snap.race_player_total_kills[i]) - int(snap.race_player_total_deaths[i]),
+            'total_kills': int(snap.race_player_total_kills[i]),
+            'first_date': dates[first] if first >= 0 else None,
+            'last_date': dates[last] if last >= 0 else None,
             'team': player_team,
-            'color': player_color
+            'color': TEAM_COLORS.get(player_team) if player_team else None
         })
     
-    return jsonify({
+    return {
         'dates': all_dates,
         'players': players_info,
         'data': date_data,
         'kills_data': kills_data,
         'max_date': all_dates[-1] if all_dates else None,
-        'tournaments': tournaments
-    })
+        'tournaments': RACE_TOURNAMENTS
+    }
 
 
 @app.route('/api/team-race')
 def api_team_race():
     """API endpoint for team K-D race chart data - returns cumulative K-D over time for top teams."""
-    from collections import defaultdict
-    import re
-    
-    # Configuration
-    min_maps_played = 4  # Minimum maps played to be included (filters out teams with 3 or less)
-    
-    # Team name mapping - maps alternate names to canonical name
-    team_name_mapping = {
-        'VISA KRÜ': 'KRÜ Esports',
-        'VISA KRÜ(KRÜ Esports)': 'KRÜ Esports',
-        'KRÜ Esports': 'KRÜ Esports',
-        'LEVIATÁN': 'Leviatán',
-        'LOUD': 'LOUD',
-        'FURIA': 'FURIA',
-        'FURIA Esports': 'FURIA',
-        'MIBR': 'MIBR',
-        'MIBR Esports': 'MIBR',
-        '100 Thieves': '100 Thieves',
-        '100T': '100 Thieves',
-        'Cloud9': 'Cloud9',
-        'C9': 'Cloud9',
-        'Evil Geniuses': 'Evil Geniuses',
-        'EG': 'Evil Geniuses',
-        'G2 Esports': 'G2 Esports',
-        'G2': 'G2 Esports',
-        'NRG Esports': 'NRG',
-        'NRG': 'NRG',
-        'Sentinels': 'Sentinels',
-        'SEN': 'Sentinels',
-        'FNATIC': 'FNATIC',
-        'FNC': 'FNATIC',
-        'FUT Esports': 'FUT Esports',
-        'FUT': 'FUT Esports',
-        'Guild Esports': 'Guild Esports',
-        'GUILD': 'Guild Esports',
-        'Team Liquid': 'Team Liquid',
-        'TL': 'Team Liquid',
-        'Team Vitality': 'Team Vitality',
-        'Vitality': 'Team Vitality',
-        'NaVi': 'Natus Vincere',
-        'Natus Vincere': 'Natus Vincere',
-        'NAVI': 'Natus Vincere',
-        'Fnatic': 'FNATIC',
-        'Paper Rex': 'Paper Rex',
-        'PRX': 'Paper Rex',
-        'DRX': 'DRX',
-        'DRX (V/S Gaming)': 'DRX',
-        'Dragon Ranger Gaming': 'Dragon Ranger Gaming',
-        'DRG': 'Dragon Ranger Gaming',
-        'ZETA DIVISION': 'ZETA DIVISION',
-        'ZETA': 'ZETA DIVISION',
-        'DetonatioN FocusMe': 'DetonatioN FocusMe',
-        'DFM': 'DetonatioN FocusMe',
-        'T1': 'T1',
-        'Gen.G': 'Gen.G',
-        'GenG': 'Gen.G',
-        'RRQ': 'Rex Regum Qeon',
-        'Rex Regum Qeon': 'Rex Regum Qeon',
-        'Talon Esports': 'TALON',
-        'TALON': 'TALON',
-        'TLN': 'TALON',
-        'Team Secret': 'Team Secret',
-        'TS': 'Team Secret',
-        'Global Esports': 'Global Esports',
-        'GE': 'Global Esports',
-        'BLEED': 'BLEED',
-        'Team BLEED': 'BLEED',
-        'Edward Gaming': 'Edward Gaming',
-        'EDG': 'Edward Gaming',
-        'FunPlus Phoenix': 'FunPlus Phoenix',
-        'FPX': 'FunPlus Phoenix',
-        'Bilibili Gaming': 'Bilibili Gaming',
-        'BG': 'Bilibili Gaming',
-        'Trace Esports': 'Trace Esports',
-        'TE': 'Trace Esports',
-        'JDG Gaming': 'JDG Esports',
-        'JDG Esports': 'JDG Esports',
-        'JDG': 'JDG Esports',
-        'Titan FC': 'Titan Esports Club',
-        'Titan Esports Club': 'Titan Esports Club',
-        'XLG': 'Xi Lai Gaming',
-        'Xi Lai Gaming': 'Xi Lai Gaming',
-        'Wolves Esports': 'Wolves Esports',
-        'WO': 'Wolves Esports',
-        'Nova Esports': 'Nova Esports',
-        'NOVA': 'Nova Esports',
-        'Attack All Around': 'Attack All Around',
-        'AAA': 'Attack All Around',
-        'ONIC G': 'ONIC G',
-        'ONIC': 'ONIC G',
-        'Alter Ego': 'Alter Ego',
-        'AE': 'Alter Ego',
-        'BOOM Esports': 'BOOM Esports',
-        'BOOM': 'BOOM Esports',
-        'Rise': 'Rise',
-        'XSET': 'XSET',
-        'The Guard': 'The Guard',
-        'Guard': 'The Guard',
-        'OpTic Gaming': 'OpTic Gaming',
-        'OpTic': 'OpTic Gaming',
-        'Optic': 'OpTic Gaming',
-        'Version1': 'Version1',
-        'V1': 'Version1',
-        'Gambit Esports': 'Gambit Esports',
-        'Gambit': 'Gambit Esports',
-        'Masters Seoul': 'Masters Seoul',
-        'Acend': 'Acend',
-        'ACE': 'Acend',
-        'SuperMassive Blaze': 'SuperMassive Blaze',
-        'SMB': 'SuperMassive Blaze',
-        'Oxygen Esports': 'Oxygen Esports',
-        'OXG': 'Oxygen Esports',
-        'G store in': 'G store in',
-        'G2 Gozen': 'G2 Gozen',
-        'GUILD EK': 'GUILD EK',
-        'FOKUS': 'FOKUS',
-        'FOKUS ME': 'FOKUS',
-        'Heretics': 'Team Heretics',
-        'Team Heretics': 'Team Heretics',
-        'TH': 'Team Heretics',
-        'KOI': 'KOI',
-        'Giants': 'Giants',
-        'GIANTX': 'Giants',
-        'GiantX': 'Giants',
-        'Giants Gaming': 'Giants',
-        'Vodafone Giants': 'Giants',
-        'BBL Esports': 'BBL Esports',
-        'BBL': 'BBL Esports',
-        'Fire Flux Esports': 'Fire Flux Esports',
-        'Fire Flux': 'Fire Flux Esports',
-        'S2V Esports': 'S2V Esports',
-        'S2V': 'S2V Esports',
-        'Case Esports': 'Case Esports',
-        'CASE': 'Case Esports',
-        'M3 Champions': 'M3 Champions',
-        'M3C': 'M3 Champions',
-        'LDLC OL': 'LDLC OL',
-        'LDLC': 'LDLC OL',
-        'Funplus Phoenix': 'FunPlus Phoenix',
-        'Liquid': 'Team Liquid',
-        'Vitality': 'Team Vitality',
-        'Navi': 'Natus Vincere',
-        'Secret': 'Team Secret',
-        'Talon': 'TALON',
-        'Rex Regum': 'Rex Regum Qeon',
-        'Paper': 'Paper Rex',
-        'DetonatioN': 'DetonatioN FocusMe',
-        'Edward': 'Edward Gaming',
-        'Bilibili': 'Bilibili Gaming',
-        'Wolves': 'Wolves Esports',
-        'TYLOO': 'TYLOO',
-        'TyLoo': 'TYLOO',
-        'Karmine Corp': 'Karmine Corp',
-        'KC': 'Karmine Corp',
-        'Gentle Mates': 'Gentle Mates',
-        'All Gamers': 'All Gamers',
-        'AG': 'All Gamers',
-        'Nongshim RedForce': 'Nongshim RedForce',
-        'NS': 'Nongshim RedForce',
-        '2Game Esports': '2Game Esports',
-        'Apeks': 'Apeks',
-    }
-    
-    # Team brand colors with variations
-    team_colors = {
-        'Paper Rex': '#FF69B4',           # Pink
-        'FNATIC': '#FF6B00',              # Orange
-        'Edward Gaming': '#FFFFFF',       # White
-        'DRX': '#003366',                 # Dark Blue
-        'Gen.G': '#FFD700',               # Gold
-        'Team Heretics': '#FFFF00',       # Yellow
-        'Sentinels': '#FF0000',           # Red
-        'T1': '#DC143C',                  # Red (slightly darker crimson)
-        'Team Liquid': '#0066CC',         # Blue
-        'G2 Esports': '#FF6B6B',          # Light Red
-        'NRG': '#FF8C00',                 # Orange (darker than FNATIC)
-        'Leviatán': '#87CEEB',            # Light Blue
-        'Bilibili Gaming': '#ADD8E6',     # Light Blue (slightly different)
-        'LOUD': '#00FF00',                # Green
-        'FUT Esports': '#808080',         # Grey
-        'Rex Regum Qeon': '#DAA520',      # Gold (slightly darker than Gen.G)
-        'Natus Vincere': '#FFD700',       # Yellow
-        'Evil Geniuses': '#20B2AA',       # Blueish Green
-        'Team Vitality': '#FFCC00',       # Yellow (slightly different)
-        '100 Thieves': '#B22222',         # Red (firebrick)
-        'KRÜ Esports': '#FF69B4',         # Pink
-        'MIBR': '#4169E1',                # Blue
-        'Cloud9': '#87CEEB',              # Light Blue
-        'Karmine Corp': '#1E90FF',        # Blue
-        'FunPlus Phoenix': '#FF4500',     # Red (orange-red)
-        'Trace Esports': '#FFFFFF',       # White
-        'Dragon Ranger Gaming': '#228B22',# Green (forest)
-        'TALON': '#FF4444',               # Red (bright)
-        'Team Secret': '#FFFFFF',         # White
-        'BBL Esports': '#FFD700',         # Gold
-        'ZETA DIVISION': '#FFFFFF',       # White
-        'Giants': '#9370DB',              # Any - purple
-        'FURIA': '#FF8C00',               # Any - orange
-        'DetonatioN FocusMe': '#0000CD',  # Blue (medium)
-        'TYLOO': '#8B0000',               # Dark Red
-        'Global Esports': '#00CED1',      # Any - dark turquoise
-        'KOI': '#4169E1',                 # Blue
-        'Wolves Esports': '#FFD700',      # Gold
-        'Nova Esports': '#800080',        # Purple
-        'JDG Esports': '#FF0000',         # Red
-        'Titan Esports Club': '#708090',  # Any - slate gray
-        'Xi Lai Gaming': '#32CD32',       # Green
-        'Gentle Mates': '#FFB6C1',        # Pink (light)
-        'All Gamers': '#FF0000',          # Red
-        'Nongshim RedForce': '#CC0000',   # Red
-        'Giants Gaming': '#BA55D3',       # Any - medium orchid
-        'BOOM Esports': '#8B0000',        # Dark Red
-        'BLEED': '#9932CC',               # Any - dark orchid
-        'Apeks': '#FFA500',               # Orange
-        '2Game Esports': '#8B008B',       # Purple (dark magenta)
-        # Additional teams
-        'XSET': '#800080',                # Purple
-        'OpTic Gaming': '#00FF00',        # Green
-        'The Guard': '#FFD700',           # Gold
-        'Version1': '#FF0000',            # Red
-        'Gambit Esports': '#FF0000',      # Red
-        'Acend': '#00FFFF',               # Cyan
-        'G2 Gozen': '#FF69B4',            # Pink
-        'Guild Esports': '#00FF00',       # Green
-        'SuperMassive Blaze': '#FF4500',  # Orange Red
-        'Oxygen Esports': '#00FFFF',      # Cyan
-        'Attack All Around': '#FFD700',   # Gold
-        'ONIC G': '#FFD700',              # Gold
-        'Alter Ego': '#FF0000',           # Red
-        'Rise': '#FFD700',                # Gold
-    }
-    
-    # Tournament dates (Masters, Champions, LOCK//IN)
-    tournaments = [
-        # LOCK//IN event (green background)
-        {'name': 'LOCK//IN 2023', 'start': '2023-02-13', 'end': '2023-03-04', 'type': 'lockin'},
-        # Champions events (yellow background)
-        {'name': 'Champions 2023', 'start': '2023-08-06', 'end': '2023-08-26', 'type': 'champions'},
-        {'name': 'Champions 2024', 'start': '2024-08-01', 'end': '2024-08-25', 'type': 'champions'},
-        {'name': 'Champions 2025', 'start': '2025-09-12', 'end': '2025-10-05', 'type': 'champions'},
-        {'name': 'Champions 2026', 'start': '2026-09-23', 'end': '2026-10-18', 'type': 'champions'},
-        # Masters events (purple background)
-        {'name': 'Masters Tokyo 2023', 'start': '2023-06-10', 'end': '2023-06-25', 'type': 'masters'},
-        {'name': 'Masters Madrid 2024', 'start': '2024-03-14', 'end': '2024-03-24', 'type': 'masters'},
-        {'name': 'Masters Shanghai 2024', 'start': '2024-05-23', 'end': '2024-06-09', 'type': 'masters'},
-        {'name': 'Masters Bangkok 2025', 'start': '2025-02-20', 'end': '2025-03-02', 'type': 'masters'},
-        {'name': 'Masters Toronto 2025', 'start': '2025-06-07', 'end': '2025-06-22', 'type': 'masters'},
-        {'name': 'Masters Santiago 2026', 'start': '2026-02-28', 'end': '2026-03-15', 'type': 'masters'},
-        {'name': 'Masters London 2026', 'start': '2026-06-05', 'end': '2026-06-21', 'type': 'masters'},
-    ]
-    
-    def normalize_team_name(team_name):
-        """Normalize team name by mapping to canonical name and extracting from parentheses."""
-        if not team_name:
-            return team_name
-        
-        # Check if it's in our mapping
-        if team_name in team_name_mapping:
-            return team_name_mapping[team_name]
-        
-        # Try to extract name from parentheses like "VISA KRÜ(KRÜ Esports)"
-        match = re.search(r'\(([^)]+)\)', team_name)
-        if match:
-            extracted = match.group(1)
-            if extracted in team_name_mapping:
-                return team_name_mapping[extracted]
-            return extracted
-        
-        return team_name
-    
-    conn = database.get_db_connection()
-    
-    # Get all matches with team info
-    all_matches_query = '''
-        SELECT team, kills, deaths, match_date
-        FROM matches 
-        WHERE team IS NOT NULL AND team != ''
-        ORDER BY match_date
-    '''
-    rows = conn.execute(all_matches_query).fetchall()
-    conn.close()
-    
-    if not rows:
-        return jsonify({
-            'dates': [],
-            'teams': [],
-            'data': {},
-            'kills_data': {},
-            'tournaments': tournaments,
-            'team_colors': team_colors
-        })
-    
-    # Normalize team names and aggregate
-    normalized_matches = []
-    for row in rows:
-        normalized_team = normalize_team_name(row['team'])
-        normalized_matches.append({
-            'team': normalized_team,
-            'kills': row['kills'],
-            'deaths': row['deaths'],
-            'match_date': row['match_date']
-        })
-    
-    # Count maps per normalized team
-    team_maps = defaultdict(int)
-    for match in normalized_matches:
-        team_maps[match['team']] += 1
-    
-    # Showmatch/exhibition teams to exclude (these are not real competitive teams)
-    showmatch_teams = {
-        'Team tarik',
-        'Team Alpha',
-        'Team EMEA',
-        'Team SuperBusS',
-        'Team FRTTT',
-        'Team Toast',
-        'Glory Once Again',
-        'Team Omega',
-        'Team France',
-        'Team World',
-        'Team Bunny',
-    }
-    
-    # Filter teams with minimum maps played AND not in showmatch teams
-    valid_teams = {
-        team for team, count in team_maps.items() 
-        if count >= min_maps_played and team not in showmatch_teams
-    }
-    
-    # Process into date-based cumulative data
-    daily_stats = defaultdict(lambda: defaultdict(lambda: {'kills': 0, 'deaths': 0}))
-    all_dates_set = set()
-    
-    # Track first and last appearance for each team
-    team_first_date = {}
-    team_last_date = {}
+    return json_response(build_team_race, snapshot.get_snapshot().generation)
+
+
+@lru_cache(maxsize=2)
+def build_team_race(generation):
+    """
+    Cumulative K-D over time for the tracked teams, from the snapshot's
+    precomputed series. Cached per data generation.
+    """
+    snap = snapshot.get_snapshot()
+    dates = snap.values('date')
     
-    for match in normalized_matches:
-        team = match['team']
-        if team not in valid_teams:
-            continue
-            
-        date = match['match_date']
-        daily_stats[date][team]['kills'] += match['kills']
-        daily_stats[date][team]['deaths'] += match['deaths']
-        all_dates_set.add(date)
-        
-        # Track first appearance
-        if team not in team_first_date or date < team_first_date[team]:
-            team_first_date[team] = date
-        # Track last appearance
-        if team not in team_last_date or date > team_last_date[team]:
-            team_last_date[team] = date
-    
-    all_dates = sorted(all_dates_set)
-    
-    if not all_dates:
-        return jsonify({
+    if not len(snap.race_team_dates):
+        return {
             'dates': [],
             'teams': [],
             'data': {},
             'kills_data': {},
-            'tournaments': tournaments,
-            'team_colors': team_colors
-        })
-    
-    # Create cumulative data (kills - deaths) and (total kills)
-    team_kills = defaultdict(int)
-    team_deaths = defaultdict(int)
-    date_data = {}
-    kills_data = {}
-    
-    for date in all_dates:
-        # Update cumulative stats for teams who played on this date
-        for team in daily_stats[date]:
-            team_kills[team] += daily_stats[date][team]['kills']
-            team_deaths[team] += daily_stats[date][team]['deaths']
-        
-        # Store KD difference for each valid team
-        date_data[date] = {
-            t: team_kills.get(t, 0) - team_deaths.get(t, 0) 
-            for t in valid_teams
-        }
-        
-        # Store total kills for each valid team
-        kills_data[date] = {
-            t: team_kills.get(t, 0)
-            for t in valid_teams
+            'tournaments': RACE_TOURNAMENTS,
+            'team_colors': TEAM_COLORS
         }
     
+    # Series are precomputed by the snapshot export (canonical team names,
+    # minimum maps played, showmatch teams excluded)
+    valid_teams = snap.race_team_values.tolist()
+    all_dates = [dates[d] for d in snap.race_team_dates.tolist()]
+    date_data, kills_data = snapshot.race_series_json(valid_teams, all_dates,
+                                             snap.race_team_cum_kills, snap.race_team_cum_deaths)
+    
     # Build response with team info sorted by maps played
     teams_info = []
-    for team in sorted(valid_teams, key=lambda t: team_maps[t], reverse=True):
+    for i, team in enumerate(valid_teams):
+        team_kills = int(snap.race_team_cum_kills[i, -1])
+        first, last = int(snap.race_team_first[i]), int(snap.race_team_last[i])
         teams_info.append({
             'team': team,
-            'maps_played': team_maps[team],
-            'kd': team_kills.get(team, 0) - team_deaths.get(team, 0),
-            'total_kills': team_kills.get(team, 0),
-            'first_date': team_first_date.get(team),
-            'last_date': team_last_date.get(team),
-            'color': team_colors.get(team)
+            'maps_played': int(snap.race_team_maps[i]),
+            'kd': team_kills - int(snap.race_team_cum_deaths[i, -1]),
+            'total_kills': team_kills,
+            'first_date': dates[first] if first >= 0 else None,
+            'last_date': dates[last] if last >= 0 else None,
+            'color': TEAM_COLORS.get(team)
         })
     
-    return jsonify({
+    return {
         'dates': all_dates,
         'teams': teams_info,
         'data': date_data,
         'kills_data': kills_data,
         'max_date': all_dates[-1] if all_dates else None,
-        'tournaments': tournaments,
-        'team_colors': team_colors
-    })
+        'tournaments': RACE_TOURNAMENTS,
+        'team_colors': TEAM_COLORS
+    }
+
+
+# Sub-query types accepted by /api/batch
+BATCH_QUERY_TYPES = ('grid', 'leaderboards', 'recent', 'cell', 'cube', 'maps',
+                     'rounds', 'round-cell', 'team-grid', 'team-cell', 'kd-race', 'team-race')
+
+# Most sub-queries one /api/batch request may carry
+BATCH_MAX_QUERIES = 20
+
+
+def run_batch_query(snap, query):
+    """
+    Run one /api/batch sub-query against a pinned snapshot, through the
+    same cached builders as the matching endpoints. cell also carries the
+    cell's row details, which the grid itself leaves out.
+    """
+    kind = query.get('type')
+    params = query.get('params') or {}
+    if not isinstance(params, dict):
+        raise TypeError('"params" must be an object')
+    
+    def getlist(name):
+        value = params.get(name)
+        if value is None:
+            return []
+        return [str(v) for v in value] if isinstance(value, list) else [str(value)]
+    
+    def getstr(name):
+        value = params.get(name)
+        if value is not None and not isinstance(value, str):
+            raise TypeError(f'"{name}" must be a string')
+        return value
+    
+    filters = parse_filters(getlist)
+    timeline_value = int(params.get('timeline', 100))
+    team1 = str(params.get('team1', 'all'))
+    team2 = str(params.get('team2', 'all'))
+    
+    def recent_page(page):
+        limit = min(max(int(params.get('limit', RECENT_SCORIGAMIS)), 1), RECENT_SCORIGAMIS_MAX)
+        return page(snap, limit, getstr('before'))
+    
+    if kind == 'recent':
+        page, cursor = recent_page(recent_scorigamis_page)
+        return {'recent_scorigamis': page, 'recent_cursor': cursor}
+    if kind == 'leaderboards':
+        limit = min(max(int(params.get('limit', LEADERBOARD_SIZE)), 1), LEADERBOARD_MAX)
+        boards = build_leaderboards(snap.generation, filters, timeline_value)
+        return {name: leaderboard_page(snap, boards[name], key, limit, max(int(params.get('offset', 0)), 0),
+                                       getstr('around'))[0]
+                for name, key in LEADERBOARDS.items()}
+    if kind in ('grid', 'cell'):
+        data = build_dashboard(snap.generation, filters, timeline_value)
+        if kind == 'grid':
+            return dashboard_grid_json(data)
+        cell = (int(params['kills']), int(params['deaths']))
+        return dict(kills=cell[0], deaths=cell[1], **data['scores'].get(cell, {'count': 0}),
+                    details=cell_details(snap, filters, timeline_value, *cell))
+    if kind == 'cube':
+        name = params.get('name', 'kills-deaths')
+        if name not in STAT_CUBES:
+            raise ValueError(f"Unknown grid '{name}'")
+        return build_stat_cube(snap.generation, *STAT_CUBES[name], filters, timeline_value)
+    if kind == 'maps':
+        return build_map_grids(snap.generation, filters, timeline_value)
+    if kind == 'rounds':
+        page, cursor = recent_page(round_scorigamis_page)
+        return dict(build_round_grid(snap.generation, team1, team2, timeline_value),
+                    recent_scorigamis=page, recent_cursor=cursor)
+    if kind == 'round-cell':
+        cell = (int(params['winning']), int(params['losing']))
+        return dict(winning=cell[0], losing=cell[1],
+                    details=round_cell_details(snap, team1, team2, timeline_value, *cell))
+    if kind == 'team-cell':
+        cell = (int(params['kills']), int(params['deaths']))
+        return dict(kills=cell[0], deaths=cell[1],
+                    details=team_cell_details(snap, team1, team2, timeline_value, *cell))
+    if kind == 'team-grid':
+        page, cursor = recent_page(team_scorigamis_page)
+        return dict(build_team_grid(snap.generation, team1, team2, timeline_value),
+                    recent_scorigamis=page, recent_cursor=cursor)
+    if kind == 'kd-race':
+        return build_kd_race(snap.generation)
+    if kind == 'team-race':
+        return build_team_race(snap.generation)
+    raise ValueError(f"Unknown query type '{kind}'")
+
+
+@app.route('/api/batch', methods=['POST'])
+def api_batch():
+    """
+    Run several dashboard queries in one round trip.
+    
+    Body: {"queries": [{"name": "main", "type": "grid", "params": {"player": ["X"], "timeline": 50}}, ...]}
+    with params named like the matching endpoint's query string (cell and
+    team-cell also take kills/deaths, round-cell winning/losing, cube
+    name). The *cell types return one grid cell's details, which the grid
+    payloads leave out. Every sub-query reads the same
+    snapshot, so the results are from one data version. Returns
+    {"generation": ..., "results": {name: result}}; a failing sub-query gets
+    {"error": ...} in place of its result.
+    """
+    body = request.get_json(silent=True)
+    queries = body.get('queries') if isinstance(body, dict) else None
+    if not isinstance(queries, list) or not queries:
+        return jsonify({'error': 'Expected an object with a non-empty "queries" list',
+                        'types': list(BATCH_QUERY_TYPES)}), 400
+    if len(queries) > BATCH_MAX_QUERIES:
+        return jsonify({'error': f'At most {BATCH_MAX_QUERIES} queries per batch'}), 400
+    for i, query in enumerate(queries):
+        if not isinstance(query, dict):
+            return jsonify({'error': f'Query {i} is not an object'}), 400
+    
+    snap = snapshot.get_snapshot()
+    results = {}
+    with snapshot.pinned(snap):
+        for i, query in enumerate(queries):
+            name = str(query.get('name', i))
+            try:
+                results[name] = run_batch_query(snap, query)
+            except (KeyError, TypeError, ValueError) as e:
+                results[name] = {'error': str(e) if not isinstance(e, KeyError) else f'Missing parameter {e}'}
+    
+    return jsonify({'generation': snap.generation, 'results': results})
 
 
 @app.route('/update', methods=['GET', 'POST'])
@@ -1378,16 +1577,18 @@ def update():
             deaths = int(deaths)
             if 0 <= kills <= 50 and 0 <= deaths <= 50:
                 description = f"{tournament} {stage} {match_type} {match_name}"
-                database.add_matches_batch([{
-                    'description': description,
-                    'map': map_name,
-                    'player': player,
-                    'kills': kills,
-                    'deaths': deaths,
-                    'match_date': match_date,
-                    'result': result,
-                    'team': team
-                }])
+                with database.staged_write():
+                    database.add_matches_batch([{
+                        'description': description,
+                        'map': map_name,
+                        'player': player,
+                        'kills': kills,
+                        'deaths': deaths,
+                        'match_date': match_date,
+                        'result': result,
+                        'team': team
+                    }])
+                snapshot.export_snapshot()
                 flash('Match added successfully!')
             else:
                 flash('Invalid kills or deaths. Must be between 0 and 50.')
@@ -1449,7 +1650,9 @@ def admin_fetch_tournament(tournament_id):
     try:
         matches = fetch_tournament_data(tournament_id)
         if matches:
-            inserted, skipped = database.add_matches_batch(matches)
+            with database.staged_write():
+                inserted, skipped = database.add_matches_batch(matches)
+            snapshot.export_snapshot()
             flash(f'Fetched {len(matches)} records. Inserted: {inserted}, Skipped: {skipped}')
         else:
             flash(f'No data found for tournament {tournament_id}')
@@ -1466,7 +1669,9 @@ def admin_fetch_all():
     try:
         matches = fetch_all_tier1_data(delay=0.5)
         if matches:
-            inserted, skipped = database.add_matches_batch(matches)
+            with database.staged_write():
+                inserted, skipped = database.add_matches_batch(matches)
+            snapshot.export_snapshot()
             flash(f'Fetched {len(matches)} records. Inserted: {inserted}, Skipped: {skipped}')
         else:
             flash('No data found')
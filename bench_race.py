@@ -0,0 +1,126 @@
+"""
+Race Chart Benchmark
+Times building the K-D race series two ways from the current snapshot's
+rows, at 1x and 10x their size: the original per-date loop (running totals
+in dicts, then a new dict over every tracked player for each date) and the
+snapshot engine (snapshot.cumulative_series - np.add.at into a dense
+entities x dates int32 matrix and np.cumsum along the dates - serialized by
+snapshot.race_series_json). Reports wall time and peak traced memory
+(tracemalloc) for each, and for the matrices alone, and checks both
+produce the same series.
+
+Larger scales repeat the rows with the dates shifted past the previous
+copy, as if the history were that many times longer.
+
+Usage:
+    python bench_race.py [--scales 1 10] [--repeat 3]
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+import numpy as np
+
+import snapshot
+
+
+def legacy_series(players, dates, kills, deaths, tracked):
+    """The original nested-loop race series: per-date dicts of cumulative K-D and kills."""
+    daily_stats = defaultdict(lambda: defaultdict(lambda: {'kills': 0, 'deaths': 0}))
+    for player, date, k, d in zip(players, dates, kills, deaths):
+        daily_stats[date][player]['kills'] += k
+        daily_stats[date][player]['deaths'] += d
+
+    player_kills = defaultdict(int)
+    player_deaths = defaultdict(int)
+    date_data = {}
+    kills_data = {}
+    for date in sorted(daily_stats):
+        for player in daily_stats[date]:
+            player_kills[player] += daily_stats[date][player]['kills']
+            player_deaths[player] += daily_stats[date][player]['deaths']
+        date_data[date] = {p: player_kills.get(p, 0) - player_deaths.get(p, 0) for p in tracked}
+        kills_data[date] = {p: player_kills.get(p, 0) for p in tracked}
+    return date_data, kills_data
+
+
+def numpy_series(slots, dates, kills, deaths, tracked):
+    """The snapshot engine plus the JSON shaping the race endpoints do."""
+    date_codes, cum_kills, cum_deaths = snapshot.cumulative_series(slots, dates, kills, deaths, len(tracked))
+    return snapshot.race_series_json(tracked, date_codes.tolist(), cum_kills, cum_deaths)
+
+
+def race_rows(snap, scale: int):
+    """
+    Dated rows of the tracked players (top RACE_TRACK_PLAYERS by maps), as
+    (tracked names, slot per row, date codes, kills, deaths), repeated scale
+    times with each copy's dates after the previous one's.
+    """
+    players = snap.values('player')
+    maps_played = np.bincount(snap.player_codes, minlength=len(players))
+    tracked = np.argsort(-maps_played, kind='stable')[:snapshot.RACE_TRACK_PLAYERS]
+    tracked = tracked[maps_played[tracked] > 0]
+    slot = np.full(len(players), -1, dtype=np.int32)
+    slot[tracked] = np.arange(len(tracked), dtype=np.int32)
+
+    rows = np.flatnonzero((slot[snap.player_codes] >= 0) & (snap.date_codes >= 0))
+    n_dates = len(snap.values('date'))
+    slots = np.tile(slot[snap.player_codes[rows]], scale)
+    dates = np.concatenate([snap.date_codes[rows] + i * n_dates for i in range(scale)]).astype(np.int32)
+    kills = np.tile(snap.kills[rows].astype(np.int32), scale)
+    deaths = np.tile(snap.deaths[rows].astype(np.int32), scale)
+    return [players[p] for p in tracked.tolist()], slots, dates, kills, deaths
+
+
+def measure(fn, repeat: int):
+    """Best wall time over repeat runs, peak traced memory of one run, and the result."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+        del result
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the K-D race series engines')
+    parser.add_argument('--scales', '-s', type=int, nargs='+', default=[1, 10],
+                        help='Data size multiples to run (default: 1 10)')
+    parser.add_argument('--repeat', '-r', type=int, default=3,
+                        help='Timed runs per engine; the best is reported (default: 3)')
+    args = parser.parse_args()
+
+    snap = snapshot.get_snapshot()
+    if snap is None:
+        print(f"No snapshot at {snapshot.SNAPSHOT_PATH} - run python snapshot.py first")
+        sys.exit(1)
+
+    print(f"{'scale':>6} {'rows':>10} {'dates':>7} {'engine':>8} {'time s':>9} {'peak MB':>9}")
+    for scale in args.scales:
+        tracked, slots, dates, kills, deaths = race_rows(snap, scale)
+        names = np.array(tracked)[slots].tolist()
+        engines = {
+            'loop': lambda: legacy_series(names, dates.tolist(), kills.tolist(), deaths.tolist(), tracked),
+            'numpy': lambda: numpy_series(slots, dates, kills, deaths, tracked),
+            # The matrices alone, without the per-date dicts the API returns
+            'matrix': lambda: snapshot.cumulative_series(slots, dates, kills, deaths, len(tracked)),
+        }
+        results = {}
+        for name, fn in engines.items():
+            elapsed, peak, results[name] = measure(fn, args.repeat)
+            print(f"{scale:>5}x {len(slots):>10} {len(np.unique(dates)):>7} {name:>8} "
+                  f"{elapsed:>9.3f} {peak / 1024 / 1024:>9.1f}")
+        if results['loop'] != results['numpy']:
+            print("  MISMATCH: engines produced different series")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
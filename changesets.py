@@ -0,0 +1,282 @@
+"""
+VCT Scorigami Changeset Log
+Keeps the database in git as an append-only log of text changesets instead
+of the binary matches.db, so each hourly commit only carries the new rows.
+
+Most tables the updater writes to are insert-only. The exceptions:
+  - series and games rows stored without a tournament, date, round scores
+    or winner get them filled in when the map is re-fetched. Every such
+    fill is logged as a row in series_updates/game_updates and applied
+    after the replay.
+  - quarantined_maps entries are replaced and deleted as maps are
+    re-fetched. It is a small table, so a changeset carries its full
+    contents whenever they changed, and replay keeps the last copy.
+Each changeset file holds the rows added since the previous one (plus any
+changed quarantined_maps contents), one JSON object per line with sorted
+keys, and replaying all files in order rebuilds the same database.
+
+Bootstrapping: on a database that has never written a changeset, `write`
+dumps every row into the first changeset. The update workflow's first run
+after the switch does this from the committed matches.db and untracks the
+binary file (git rm --cached) in the same commit.
+
+Usage:
+    python changesets.py rebuild   # replay changesets/ into matches.db
+    python changesets.py write     # append rows added since the last changeset
+"""
+import hashlib
+import json
+import os
+import sys
+from typing import Dict, List, Optional
+
+import database
+
+CHANGESET_DIR = 'changesets'
+
+# Tables captured in changesets, replayed in this order
+TRACKED_TABLES = ('series', 'games', 'series_updates', 'game_updates', 'matches', 'posted_scorigamis')
+
+# Tables updated in place, written whole whenever their contents change
+STATE_TABLES = ('quarantined_maps',)
+
+# Old table names that may appear in earlier changesets
+RENAMED_TABLES = {'game_score_updates': 'game_updates'}
+
+# Rows per executemany() while replaying
+REPLAY_CHUNK_SIZE = 50000
+
+
+def _init_tables(conn):
+    """Create the changeset bookkeeping table and the tables replay needs."""
+    # Same definition as twitter_bot / init_twitter_db
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS posted_scorigamis (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kills INTEGER NOT NULL,
+            deaths INTEGER NOT NULL,
+            tweet_id TEXT,
+            posted_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(kills, deaths)
+        )
+    ''')
+    # Highest id per table already written to a changeset
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS changeset_state (
+            table_name TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL
+        )
+    ''')
+    # Digest of each STATE_TABLES table as last written to a changeset
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS changeset_digests (
+            table_name TEXT PRIMARY KEY,
+            digest TEXT NOT NULL
+        )
+    ''')
+    for old, new in RENAMED_TABLES.items():
+        conn.execute('UPDATE OR IGNORE changeset_state SET table_name = ? WHERE table_name = ?', (new, old))
+    conn.commit()
+
+
+def _columns(conn, table: str) -> List[str]:
+    """Get a table's column names in schema order."""
+    return [row['name'] for row in conn.execute(f'PRAGMA table_info({table})')]
+
+
+def changeset_files(directory: str = CHANGESET_DIR) -> List[str]:
+    """List changeset files in replay order."""
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(name for name in os.listdir(directory) if name.endswith('.jsonl'))
+    return [os.path.join(directory, name) for name in names]
+
+
+def _set_state(conn, table: str, last_id: int):
+    conn.execute('''
+        INSERT INTO changeset_state (table_name, last_id) VALUES (?, ?)
+        ON CONFLICT(table_name) DO UPDATE SET last_id = excluded.last_id
+    ''', (table, last_id))
+
+
+def _set_digest(conn, table: str, digest: str):
+    conn.execute('''
+        INSERT INTO changeset_digests (table_name, digest) VALUES (?, ?)
+        ON CONFLICT(table_name) DO UPDATE SET digest = excluded.digest
+    ''', (table, digest))
+
+
+def _dump(record: Dict) -> str:
+    return json.dumps(record, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+
+def write_changeset(directory: str = CHANGESET_DIR) -> Optional[str]:
+    """
+    Append the rows added since the last changeset as a new changeset file.
+
+    Files are numbered sequentially and written deterministically (rows in id
+    order, keys sorted), so the same data always produces the same bytes. On
+    a database that has never written a changeset, the first file holds
+    every row. STATE_TABLES are written whole, as one line, when their
+    contents differ from the last changeset's.
+
+    Returns:
+        Path of the new changeset, or None if there was nothing new
+    """
+    database.ensure_schema()
+    with database.staged_write():
+        conn = database.get_db_connection()
+        try:
+            _init_tables(conn)
+            state = {row['table_name']: row['last_id']
+                     for row in conn.execute('SELECT table_name, last_id FROM changeset_state')}
+
+            digests = {row['table_name']: row['digest']
+                       for row in conn.execute('SELECT table_name, digest FROM changeset_digests')}
+
+            lines = []
+            rows_written = 0
+            new_state = {}
+            for table in TRACKED_TABLES:
+                last_id = state.get(table, 0)
+                cursor = conn.execute(f'SELECT * FROM {table} WHERE id > ? ORDER BY id', (last_id,))
+                for row in cursor:
+                    lines.append(_dump({'table': table, 'row': dict(row)}))
+                    last_id = row['id']
+                    rows_written += 1
+                new_state[table] = last_id
+            new_digests = {}
+            for table in STATE_TABLES:
+                rows = [dict(row) for row in conn.execute(f'SELECT * FROM {table} ORDER BY id')]
+                line = _dump({'table': table, 'rows': rows})
+                digest = hashlib.sha256(line.encode('utf-8')).hexdigest()
+                if digest != digests.get(table):
+                    lines.append(line)
+                    rows_written += len(rows)
+                    new_digests[table] = digest
+
+            if not lines:
+                return None
+
+            existing = changeset_files(directory)
+            number = int(os.path.basename(existing[-1]).split('.')[0]) + 1 if existing else 1
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f'{number:06d}.jsonl')
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8', newline='\n') as f:
+                f.write('\n'.join(lines) + '\n')
+            os.replace(tmp_path, path)
+
+            # Only advance the state once the file is in place
+            for table, last_id in new_state.items():
+                _set_state(conn, table, last_id)
+            for table, digest in new_digests.items():
+                _set_digest(conn, table, digest)
+            conn.commit()
+        finally:
+            conn.close()
+
+    print(f"Wrote {rows_written} rows to {path}")
+    return path
+
+
+def _replay_rows(conn, table: str, rows: List[Dict]):
+    """Insert changeset rows with their original ids, ignoring ones present."""
+    columns = [c for c in _columns(conn, table) if c in rows[0]]
+    sql = (f'INSERT OR IGNORE INTO {table} ({", ".join(columns)}) '
+           f'VALUES ({", ".join("?" * len(columns))})')
+    conn.executemany(sql, (tuple(map(row.get, columns)) for row in rows))
+
+
+def rebuild(directory: str = CHANGESET_DIR) -> Dict[str, int]:
+    """
+    Replay every changeset into the database.
+
+    Rows keep their original ids and already-present ids are skipped, so
+    replaying onto an existing database only adds what it is missing.
+    STATE_TABLES are replaced by their last copy in the log. The result is
+    published as a single atomic update.
+
+    Returns:
+        Dict of table name -> rows in the table after the rebuild
+    """
+    files = changeset_files(directory)
+    if not files:
+        print(f"No changesets in {directory}/ - keeping the existing database as is")
+    with database.staged_write():
+        database.init_db()
+        conn = database.get_db_connection()
+        try:
+            _init_tables(conn)
+            conn.execute('BEGIN IMMEDIATE')
+            last_match_id = database._max_match_id(conn)
+
+            pending = {table: [] for table in TRACKED_TABLES}
+            replayed_ids = {row['table_name']: row['last_id']
+                            for row in conn.execute('SELECT table_name, last_id FROM changeset_state')}
+            state_lines = {}
+            for path in files:
+                with open(path, encoding='utf-8') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        record = json.loads(line)
+                        table = RENAMED_TABLES.get(record['table'], record['table'])
+                        if table in STATE_TABLES:
+                            state_lines[table] = line.rstrip('\n')
+                            continue
+                        rows = pending[table]
+                        rows.append(record['row'])
+                        replayed_ids[table] = max(replayed_ids.get(table, 0), record['row']['id'])
+                        if len(rows) >= REPLAY_CHUNK_SIZE:
+                            _replay_rows(conn, table, rows)
+                            rows.clear()
+            for table, rows in pending.items():
+                if rows:
+                    _replay_rows(conn, table, rows)
+            for table, line in state_lines.items():
+                conn.execute(f'DELETE FROM {table}')
+                rows = json.loads(line)['rows']
+                if rows:
+                    _replay_rows(conn, table, rows)
+                _set_digest(conn, table, hashlib.sha256(line.encode('utf-8')).hexdigest())
+
+            database._apply_updates(conn)
+            # Series from changesets written before series.event existed
+            database._backfill_series_events(conn)
+            if database._max_match_id(conn) > last_match_id:
+                database._record_changes(conn, last_match_id)
+            # Summaries maintained at ingest aren't in the log. Rebuilt after
+            # _record_changes, which folds new rows into first_occurrences,
+            # so every summary ends up recomputed from the full tables.
+            database._rebuild_round_scores(conn)
+            database._rebuild_team_map_stats(conn)
+            database._rebuild_first_occurrences(conn)
+
+            # Rows the database had beyond the changesets stay unwritten
+            counts = {}
+            for table in TRACKED_TABLES + STATE_TABLES:
+                counts[table] = conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                if table in replayed_ids:
+                    _set_state(conn, table, replayed_ids[table])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    print(f"Replayed {len(files)} changesets: "
+          + ', '.join(f"{table} {count}" for table, count in counts.items()))
+    return counts
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'write'
+    if command == 'rebuild':
+        rebuild()
+    elif command == 'write':
+        write_changeset()
+    else:
+        print(__doc__)
+        sys.exit(1)
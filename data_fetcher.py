@@ -143,6 +143,62 @@ def extract_deaths_from_cell(cell) -> Optional[int]:
     return None
 
 
+def extract_stat_from_cell(cell) -> Optional[int]:
+    """Read an integer stat cell (both sides total, e.g. ACS, ADR, FK)."""
+    if cell is None:
+        return None
+    total_span = cell.find('span', class_='mod-both')
+    text = total_span.get_text(strip=True) if total_span else cell.get_text(strip=True)
+    match = re.search(r'^\d+', text)
+    return int(match.group()) if match else None
+
+
+# Stat cells without a class of their own, found by their scoreboard
+# header's text or title
+HEADER_STATS = {
+    'acs': ('ACS', 'Average Combat Score'),
+    'adr': ('ADR', 'Average Damage per Round'),
+}
+
+
+def find_stat_columns(table) -> Dict[str, int]:
+    """Map HEADER_STATS names to their column index in a scoreboard table's header."""
+    columns = {}
+    thead = table.find('thead')
+    header_row = thead.find('tr') if thead else None
+    if not header_row:
+        return columns
+    for i, th in enumerate(header_row.find_all(['th', 'td'])):
+        labels = {th.get_text(strip=True), th.get('title', '').strip()}
+        for stat, names in HEADER_STATS.items():
+            if stat not in columns and labels.intersection(names):
+                columns[stat] = i
+    return columns
+
+
+def extract_extra_stats(row, stat_columns: Dict[str, int]) -> Dict[str, Optional[int]]:
+    """
+    Get the scoreboard stats beyond kills/deaths for a player row.
+    Missing or unparseable cells, and stats whose column wasn't found in
+    the header (see find_stat_columns), come back as None.
+    """
+    cells = row.find_all('td')
+    
+    def by_column(stat):
+        i = stat_columns.get(stat)
+        if i is None or i >= len(cells):
+            return None
+        return extract_stat_from_cell(cells[i])
+    
+    return {
+        'assists': extract_stat_from_cell(row.find('td', class_='mod-vlr-assists')),
+        'acs': by_column('acs'),
+        'first_kills': extract_stat_from_cell(row.find('td', class_='mod-fb')),
+        'first_deaths': extract_stat_from_cell(row.find('td', class_='mod-fd')),
+        'adr': by_column('adr'),
+    }
+
+
 def parse_match_page(html: str, match_url: str) -> Tuple[List[Dict], str, Optional[str]]:
     soup = BeautifulSoup(html, 'html.parser')
     matches_data = []
@@ -222,9 +278,16 @@ def parse_match_page(html: str, match_url: str) -> Tuple[List[Dict], str, Option
             else:
                 result = "Tie"
             
+            # Round scores from this team's side, kept for the games table
+            if len(team_scores) >= 2 and team_idx < 2:
+                team_score, opponent_score = team_scores[team_idx], team_scores[1 - team_idx]
+            else:
+                team_score = opponent_score = None
+            
             tbody = table.find('tbody')
             if not tbody:
                 continue
+            stat_columns = find_stat_columns(table)
             
             rows = tbody.find_all('tr')
             
@@ -267,6 +330,7 @@ def parse_match_page(html: str, match_url: str) -> Tuple[List[Dict], str, Option
                 
                 match_data = {
                     'description': description,
+                    'event': tournament_name,
                     'map': map_name,
                     'player': player_name,
                     'kills': kills,
@@ -274,7 +338,10 @@ def parse_match_page(html: str, match_url: str) -> Tuple[List[Dict], str, Option
                     'match_date': match_date,
                     'result': result,
                     'team': team_name,
-                    'match_id': match_id
+                    'match_id': match_id,
+                    'team_score': team_score,
+                    'opponent_score': opponent_score,
+                    **extract_extra_stats(row, stat_columns)
                 }
                 matches_data.append(match_data)
     
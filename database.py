@@ -1,17 +1,270 @@
+import csv
+import json
+import os
 import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
 from typing import List, Dict, Tuple, Optional
 from datetime import datetime
+from urllib.parse import quote
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines - no cross-process publish lock
+    fcntl = None
+
+DB_PATH = 'matches.db'
+
+# Published-version marker, rewritten (atomically) every time a new
+# database file is swapped in
+VERSION_PATH = DB_PATH + '.version'
+STAGING_PATH = DB_PATH + '.staging'
+LOCK_PATH = DB_PATH + '.lock'
+
+# Bump when init_db changes the schema so ensure_schema() republishes
+SCHEMA_VERSION = 14
+
+# Per-player scoreboard stats beyond kills/deaths (NULL where the scraped
+# page didn't have them)
+STAT_COLUMNS = ('assists', 'acs', 'first_kills', 'first_deaths', 'adr')
+
+# How long a connection waits on a competing writer before giving up
+BUSY_TIMEOUT_MS = 30000
+
+# Whole-transaction retries when the busy timeout still isn't enough
+LOCK_RETRIES = 5
+
 
 def get_db_connection():
-    """Get a database connection."""
-    conn = sqlite3.connect('matches.db')
+    """
+    Get a read-write database connection.
+    
+    Inside staged_write() this opens the staging copy, which runs in WAL
+    mode (see init_db) while the update writes to it; _publish checkpoints
+    it and switches it back to a rollback journal before the swap. Web
+    readers never use this - they open the published file read-only with
+    immutable=1 (get_read_connection), so writers and readers share no
+    locks. synchronous=FULL fsyncs every commit so writes stay durable.
+    """
+    conn = sqlite3.connect(_write_path or DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000)
     conn.row_factory = sqlite3.Row
+    conn.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}')
+    conn.execute('PRAGMA synchronous = FULL')
     return conn
 
+def is_lock_error(error: Exception) -> bool:
+    """Check if an error is SQLite reporting a locked/busy database."""
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ('locked' in message or 'busy' in message)
+
+def retry_on_lock(operation, retries: int = LOCK_RETRIES):
+    """
+    Run a write operation, retrying the whole thing if the database is locked.
+    
+    The operation must open its own connection and roll back on failure, so
+    a retry always starts from a clean transaction.
+    """
+    for attempt in range(retries):
+        try:
+            return operation()
+        except sqlite3.OperationalError as e:
+            if not is_lock_error(e) or attempt == retries - 1:
+                raise
+            print(f"Database locked (attempt {attempt + 1}/{retries}), retrying: {e}")
+            time.sleep(2 ** attempt)
+
+# Set while a staged_write() is active: every get_db_connection() call then
+# targets the staging copy instead of the published file
+_write_path = None
+
+_read_local = threading.local()
+
+
+def published_version() -> int:
+    """
+    Get the version number of the published database file.
+    
+    Only a stat() when nothing changed; the marker is re-read when its
+    mtime/inode moves. Returns 0 if nothing has been published yet.
+    """
+    try:
+        st = os.stat(VERSION_PATH)
+    except FileNotFoundError:
+        return 0
+    key = (st.st_ino, st.st_mtime_ns, st.st_size)
+    cached = getattr(_read_local, 'version_key', None)
+    if cached != key:
+        with open(VERSION_PATH) as f:
+            _read_local.version = int(f.read().split()[0] or 0)
+        _read_local.version_key = key
+    return _read_local.version
+
+def get_read_connection():
+    """
+    Get a read-only connection to the published database.
+    
+    The published file is never modified in place - the updater swaps in a
+    new file with an atomic rename - so it is opened with immutable=1, which
+    skips all locking and change detection. The connection is cached per
+    thread and reopened only when the version marker changes. Callers must
+    not close it.
+    
+    Falls back to a regular connection when nothing has been published yet
+    (e.g. a local dev database).
+    """
+    if not os.path.exists(VERSION_PATH):
+        return get_db_connection()
+    
+    version = published_version()
+    conn = getattr(_read_local, 'conn', None)
+    if conn is not None and _read_local.conn_version == version:
+        return conn
+    if conn is not None:
+        conn.close()
+    
+    uri = f"file:{quote(os.path.abspath(DB_PATH))}?mode=ro&immutable=1"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    _read_local.conn = conn
+    _read_local.conn_version = version
+    return conn
+
+def reset_read_connection():
+    """
+    Forget this process's cached read connection.
+    
+    Call in a freshly forked worker (see gunicorn.conf.py): SQLite
+    connections must not be shared across fork().
+    """
+    global _read_local
+    _read_local = threading.local()
+
+def _fsync_path(path: str):
+    """fsync a file or directory so a rename survives a crash."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass  # Directories can't be fsynced on Windows
+    finally:
+        os.close(fd)
+
+def _publish(staging_path: str):
+    """Swap a finished staging file in as the published database."""
+    conn = sqlite3.connect(staging_path, timeout=BUSY_TIMEOUT_MS / 1000)
+    try:
+        # Immutable readers ignore the WAL, so everything has to be in the
+        # main file and the file must be back in rollback-journal mode
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        conn.execute('PRAGMA journal_mode = DELETE')
+    finally:
+        conn.close()
+    _fsync_path(staging_path)
+    
+    version = published_version() + 1
+    os.replace(staging_path, DB_PATH)
+    
+    tmp_version = VERSION_PATH + '.tmp'
+    with open(tmp_version, 'w') as f:
+        f.write(f"{version} {datetime.now().isoformat(timespec='seconds')}\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_version, VERSION_PATH)
+    _fsync_path(os.path.dirname(os.path.abspath(DB_PATH)))
+    print(f"Published database version {version}")
+
+@contextmanager
+def staged_write():
+    """
+    Run writes against a staging copy and publish it atomically.
+    
+    Copies the published database to a staging file, points every
+    get_db_connection() call at it for the duration of the block, then
+    renames it over the published file and bumps the version marker. If the
+    block raises, the staging file is discarded and readers never see a
+    partial update. Nested use just joins the outer stage.
+    
+    Usage:
+        with database.staged_write():
+            database.add_matches_batch(matches)
+    """
+    global _write_path
+    if _write_path is not None:
+        yield
+        return
+    
+    lock_file = open(LOCK_PATH, 'a')
+    try:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(STAGING_PATH + suffix):
+                os.remove(STAGING_PATH + suffix)
+        
+        staging = sqlite3.connect(STAGING_PATH)
+        if os.path.exists(DB_PATH):
+            source = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000)
+            source.backup(staging)
+            source.close()
+        staging.close()
+        
+        _write_path = STAGING_PATH
+        try:
+            yield
+        except BaseException:
+            _write_path = None
+            for suffix in ('', '-wal', '-shm', '-journal'):
+                if os.path.exists(STAGING_PATH + suffix):
+                    os.remove(STAGING_PATH + suffix)
+            raise
+        _write_path = None
+        _publish(STAGING_PATH)
+    finally:
+        _write_path = None
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
+
+def ensure_schema():
+    """
+    Make sure the published database has the current schema.
+    
+    For the web app: a read-only check of PRAGMA user_version, and a staged
+    init_db() + publish only when the schema is out of date.
+    """
+    if os.path.exists(DB_PATH):
+        conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000)
+        current = conn.execute('PRAGMA user_version').fetchone()[0]
+        conn.close()
+        if current >= SCHEMA_VERSION and os.path.exists(VERSION_PATH):
+            return
+    with staged_write():
+        init_db()
+
+# Keeps matches_fts in step with inserted rows. add_matches_bulk drops it
+# for the length of a load and rebuilds the index once at the end instead.
+FTS_INSERT_TRIGGER = '''
+    CREATE TRIGGER IF NOT EXISTS matches_fts_insert AFTER INSERT ON matches BEGIN
+        INSERT INTO matches_fts (rowid, description, player, team, map)
+        VALUES (new.id, new.description, new.player, new.team, new.map);
+    END
+'''
+
 def init_db():
     """Initialize the database with the updated schema."""
     conn = get_db_connection()
     
+    # WAL while writing; _publish switches the file back to a rollback
+    # journal for the immutable readers. Switching needs a moment with no
+    # other connections, hence the retry.
+    retry_on_lock(lambda: conn.execute('PRAGMA journal_mode = WAL').fetchone())
+    
     # Check if table exists with old schema
     cursor = conn.execute("PRAGMA table_info(matches)")
     columns = [col[1] for col in cursor.fetchall()]
@@ -31,7 +284,13 @@ def init_db():
                 team TEXT,
                 tournament_id INTEGER,
                 match_id TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                game_id INTEGER REFERENCES games(id),
+                assists INTEGER,
+                acs INTEGER,
+                first_kills INTEGER,
+                first_deaths INTEGER,
+                adr INTEGER
             )
         ''')
         print("Created new matches table with full schema")
@@ -53,11 +312,561 @@ def init_db():
     conn.execute('CREATE INDEX IF NOT EXISTS idx_match_date ON matches(match_date)')
     conn.execute('CREATE INDEX IF NOT EXISTS idx_match_id ON matches(match_id)')
     # FIXED: Include match_id in unique index to handle rematches
-    conn.execute('CREATE INDEX IF NOT EXISTS idx_unique_match ON matches(description, map, player, match_id)')
+    _ensure_unique_match_index(conn)
+    
+    # Series (one per vlr.gg match page) and games (one per map played),
+    # holding the match metadata and round scores once instead of on every
+    # player row. team1/team2 are stored in name order. event is the
+    # tournament name the description starts with.
+    #
+    # matches deliberately keeps its own description, match_date and
+    # tournament_id alongside game_id: manual entries have no series, the
+    # idx_unique_match duplicate check and matches_fts are keyed on the row's
+    # description, and export, get_scores and the snapshot's per-row dates
+    # read them straight off the player rows. Ingest writes both from the
+    # same scraped row; series fills (series_updates) don't touch the
+    # player rows.
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS series (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            match_id TEXT NOT NULL UNIQUE,
+            description TEXT,
+            tournament_id INTEGER,
+            match_date TEXT,
+            event TEXT
+        )
+    ''')
+    if 'event' not in [col[1] for col in conn.execute("PRAGMA table_info(series)")]:
+        conn.execute('ALTER TABLE series ADD COLUMN event TEXT')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS games (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            match_id TEXT NOT NULL REFERENCES series(match_id),
+            map TEXT NOT NULL,
+            team1 TEXT,
+            team2 TEXT,
+            team1_score INTEGER,
+            team2_score INTEGER,
+            winner TEXT,
+            UNIQUE(match_id, map)
+        )
+    ''')
+    if 'game_id' not in [col[1] for col in conn.execute("PRAGMA table_info(matches)")]:
+        conn.execute('ALTER TABLE matches ADD COLUMN game_id INTEGER REFERENCES games(id)')
+        games = _backfill_games(conn)
+        print(f"Backfilled {games} games from existing match rows")
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_game_id ON matches(game_id)')
+    _backfill_series_events(conn)
+    
+    # Values filled into series/games rows that already existed (a map
+    # re-fetched after being stored without them), so changesets can carry
+    # the in-place update. Each row holds the filled row's values after the
+    # fill.
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS series_updates (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            match_id TEXT NOT NULL REFERENCES series(match_id),
+            tournament_id TEXT,
+            match_date TEXT,
+            event TEXT
+        )
+    ''')
+    if 'event' not in [col[1] for col in conn.execute("PRAGMA table_info(series_updates)")]:
+        conn.execute('ALTER TABLE series_updates ADD COLUMN event TEXT')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS game_updates (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            game_id INTEGER NOT NULL REFERENCES games(id),
+            team1_score INTEGER,
+            team2_score INTEGER,
+            winner TEXT
+        )
+    ''')
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'game_score_updates'").fetchone():
+        # Score-only predecessor of game_updates (schema 12), same columns
+        conn.execute('''
+            INSERT OR IGNORE INTO game_updates (id, game_id, team1_score, team2_score, winner)
+            SELECT id, game_id, team1_score, team2_score, winner FROM game_score_updates
+        ''')
+        conn.execute('DROP TABLE game_score_updates')
+    
+    existing_columns = [col[1] for col in conn.execute("PRAGMA table_info(matches)")]
+    for column in STAT_COLUMNS:
+        if column not in existing_columns:
+            conn.execute(f'ALTER TABLE matches ADD COLUMN {column} INTEGER')
+    
+    # Round-score grid: one row per (winning, losing) map score with its game
+    # count and first occurrence, kept up to date as games get their scores
+    has_round_scores = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'round_scores'").fetchone()
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS round_scores (
+            winning_score INTEGER NOT NULL,
+            losing_score INTEGER NOT NULL,
+            games INTEGER NOT NULL,
+            first_game_id INTEGER REFERENCES games(id),
+            first_date TEXT,
+            PRIMARY KEY (winning_score, losing_score)
+        )
+    ''')
+    if not has_round_scores:
+        _rebuild_round_scores(conn)
+    
+    # Team-level map totals: one row per team per map, summed from the
+    # player rows, kept up to date as maps are inserted
+    has_team_map_stats = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'team_map_stats'").fetchone()
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS team_map_stats (
+            match_id TEXT NOT NULL,
+            map TEXT NOT NULL,
+            team TEXT NOT NULL,
+            kills INTEGER NOT NULL,
+            deaths INTEGER NOT NULL,
+            players INTEGER NOT NULL,
+            result TEXT,
+            match_date TEXT,
+            PRIMARY KEY (match_id, map, team)
+        )
+    ''')
+    if not has_team_map_stats:
+        _rebuild_team_map_stats(conn)
+    
+    # K/D cells: one row per (kills, deaths) with its row count and first
+    # occurrence (earliest date, then lowest id), kept up to date as rows
+    # are inserted
+    has_first_occurrences = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'first_occurrences'").fetchone()
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS first_occurrences (
+            kills INTEGER NOT NULL,
+            deaths INTEGER NOT NULL,
+            occurrences INTEGER NOT NULL,
+            first_row_id INTEGER NOT NULL REFERENCES matches(id),
+            first_date TEXT,
+            player TEXT,
+            PRIMARY KEY (kills, deaths)
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_first_occurrences_date ON first_occurrences(first_date)')
+    # Current scorigamis (cells seen once) in recent-first order
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_first_occurrences_scorigami
+        ON first_occurrences(first_date IS NULL, first_date DESC, first_row_id)
+        WHERE occurrences = 1
+    ''')
+    if not has_first_occurrences:
+        _rebuild_first_occurrences(conn)
+    
+    # Full-text index over the text columns. External content: the index
+    # stores only tokens and reads the text back from matches by rowid.
+    has_fts = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'matches_fts'").fetchone()
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS matches_fts USING fts5(
+            description, player, team, map,
+            content = 'matches', content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+        )
+    ''')
+    conn.execute(FTS_INSERT_TRIGGER)
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS matches_fts_delete AFTER DELETE ON matches BEGIN
+            INSERT INTO matches_fts (matches_fts, rowid, description, player, team, map)
+            VALUES ('delete', old.id, old.description, old.player, old.team, old.map);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS matches_fts_update AFTER UPDATE OF description, player, team, map ON matches BEGIN
+            INSERT INTO matches_fts (matches_fts, rowid, description, player, team, map)
+            VALUES ('delete', old.id, old.description, old.player, old.team, old.map);
+            INSERT INTO matches_fts (rowid, description, player, team, map)
+            VALUES (new.id, new.description, new.player, new.team, new.map);
+        END
+    ''')
+    if not has_fts:
+        conn.execute("INSERT INTO matches_fts (matches_fts) VALUES ('rebuild')")
+    
+    # Data generation counter - bumped by every write transaction that
+    # inserts rows or fills in game scores, so caches can key on it instead of polling COUNT(*)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS data_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('INSERT OR IGNORE INTO data_version (id, generation) VALUES (1, 0)')
+    
+    # Append-only log of inserted rows, one entry per row, tagged with the
+    # generation that inserted it
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS change_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            generation INTEGER NOT NULL,
+            match_row_id INTEGER NOT NULL,
+            kills INTEGER NOT NULL,
+            deaths INTEGER NOT NULL,
+            player TEXT,
+            team TEXT,
+            match_date TEXT
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_change_log_generation ON change_log(generation)')
+    
+    # Scraped maps that failed validation at ingest, kept out of matches
+    # until a later fetch of the same map passes
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS quarantined_maps (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            match_id TEXT NOT NULL,
+            map TEXT NOT NULL,
+            reason TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(match_id, map)
+        )
+    ''')
     
+    conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
     conn.commit()
     conn.close()
 
+def _ensure_unique_match_index(conn):
+    """
+    Make idx_unique_match a real UNIQUE index where the data allows it.
+    
+    UNIQUE treats NULL match_ids as distinct, which is exactly the
+    "match_id = ?" duplicate check add_matches_batch does, and lets the bulk
+    loader use INSERT OR IGNORE instead of a lookup per row. Databases that
+    already contain duplicates keep the plain index.
+    """
+    indexes = {row['name']: row['unique'] for row in conn.execute('PRAGMA index_list(matches)')}
+    if indexes.get('idx_unique_match'):
+        return
+    conn.execute('DROP INDEX IF EXISTS idx_unique_match')
+    try:
+        conn.execute('CREATE UNIQUE INDEX idx_unique_match ON matches(description, map, player, match_id)')
+    except sqlite3.IntegrityError:
+        print("Duplicate match rows found - keeping non-unique idx_unique_match")
+        conn.execute('CREATE INDEX idx_unique_match ON matches(description, map, player, match_id)')
+
+def _has_unique_match_index(conn) -> bool:
+    """Check whether idx_unique_match enforces uniqueness."""
+    return any(row['name'] == 'idx_unique_match' and row['unique']
+               for row in conn.execute('PRAGMA index_list(matches)'))
+
+def _backfill_games(conn) -> int:
+    """
+    Create series and games for match rows that have no game_id yet.
+    
+    Round scores aren't stored on player rows, so backfilled games only get
+    their teams and winner; the scores fill in if the map is fetched again.
+    
+    Returns:
+        Number of games created
+    """
+    conn.execute('''
+        INSERT OR IGNORE INTO series (match_id, description, tournament_id, match_date)
+        SELECT match_id, MIN(description), MIN(tournament_id), MIN(match_date)
+        FROM matches
+        WHERE game_id IS NULL AND match_id IS NOT NULL
+        GROUP BY match_id
+    ''')
+    games = conn.execute('''
+        INSERT OR IGNORE INTO games (match_id, map, team1, team2, winner)
+        SELECT match_id, map, MIN(team), MAX(team), MAX(CASE WHEN result = 'Win' THEN team END)
+        FROM matches
+        WHERE game_id IS NULL AND match_id IS NOT NULL
+        GROUP BY match_id, map
+    ''').rowcount
+    conn.execute('''
+        UPDATE matches SET game_id = (
+            SELECT g.id FROM games g WHERE g.match_id = matches.match_id AND g.map = matches.map
+        )
+        WHERE game_id IS NULL AND match_id IS NOT NULL
+    ''')
+    _backfill_series_events(conn)
+    return games
+
+def _backfill_series_events(conn) -> int:
+    """
+    Set the event of series stored without one (rows from before the
+    column, or loaded from exports that don't carry it).
+    
+    The scraper builds descriptions as "<event> - <team> vs <team>" with the
+    same team names the games store, so the event is the description with
+    that exact suffix removed. Descriptions without it are the event name
+    on its own.
+    
+    Returns:
+        Number of series updated
+    """
+    rows = conn.execute('''
+        SELECT s.id, s.description, MIN(g.team1) AS team1, MIN(g.team2) AS team2
+        FROM series s LEFT JOIN games g ON g.match_id = s.match_id
+        WHERE s.event IS NULL AND s.description IS NOT NULL
+        GROUP BY s.id
+    ''').fetchall()
+    updates = []
+    for row in rows:
+        event = row['description']
+        for first, second in ((row['team1'], row['team2']), (row['team2'], row['team1'])):
+            suffix = f" - {first} vs {second}"
+            if first and second and event.endswith(suffix):
+                event = event[:-len(suffix)]
+                break
+        updates.append((event, row['id']))
+    conn.executemany('UPDATE series SET event = ? WHERE id = ?', updates)
+    return len(updates)
+
+def backfill_games() -> int:
+    """Link match rows without a game to series/games (see _backfill_games)."""
+    conn = get_db_connection()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        games = _backfill_games(conn)
+        conn.commit()
+        return games
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def rebuild_summaries():
+    """
+    Recompute the summary tables maintained at ingest (round_scores,
+    team_map_stats, first_occurrences) from scratch, for loads that bypass
+    add_matches_batch.
+    """
+    conn = get_db_connection()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        _rebuild_round_scores(conn)
+        _rebuild_team_map_stats(conn)
+        _rebuild_first_occurrences(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def _store_games(conn, matches: List[Dict]) -> Dict[Tuple[str, str], int]:
+    """
+    Upsert the series and games that incoming rows belong to.
+    
+    Each player row carries its team's and the opponent's round score for
+    the map (team_score / opponent_score from the parser); they're stored
+    once per game here. The upserts only touch rows that gain a value, so
+    conn.total_changes moves only when something actually changed.
+    
+    Returns:
+        Dict of (match_id, map) -> games.id
+    """
+    maps = {}
+    for match in matches:
+        if match.get('match_id') is not None:
+            maps.setdefault((match['match_id'], match['map']), []).append(match)
+    
+    game_ids = {}
+    for (match_id, map_name), rows in maps.items():
+        first = rows[0]
+        series = conn.execute('SELECT match_date FROM series WHERE match_id = ?', (match_id,)).fetchone()
+        filled = conn.execute('''
+            INSERT INTO series (match_id, description, tournament_id, match_date, event) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(match_id) DO UPDATE SET
+                tournament_id = COALESCE(series.tournament_id, excluded.tournament_id),
+                match_date = COALESCE(series.match_date, excluded.match_date),
+                event = COALESCE(series.event, excluded.event)
+            WHERE (series.tournament_id IS NULL AND excluded.tournament_id IS NOT NULL)
+               OR (series.match_date IS NULL AND excluded.match_date IS NOT NULL)
+               OR (series.event IS NULL AND excluded.event IS NOT NULL)
+        ''', (match_id, first['description'], first.get('tournament_id'), first.get('match_date'),
+              first.get('event'))).rowcount
+        if series is not None and filled:
+            conn.execute('''
+                INSERT INTO series_updates (match_id, tournament_id, match_date, event)
+                SELECT match_id, tournament_id, match_date, event FROM series WHERE match_id = ?
+            ''', (match_id,))
+            if series['match_date'] is None:
+                _date_round_scores(conn, match_id)
+        
+        scores = {}
+        for row in rows:
+            scores.setdefault(row.get('team'), row.get('team_score'))
+        teams = sorted(t for t in scores if t is not None)
+        team1 = teams[0] if teams else None
+        team2 = teams[-1] if len(teams) > 1 else None
+        winner = next((row.get('team') for row in rows if row.get('result') == 'Win'), None)
+        existing = conn.execute(
+            'SELECT team1_score, team2_score FROM games WHERE match_id = ? AND map = ?',
+            (match_id, map_name)).fetchone()
+        had_scores = (existing is not None and existing['team1_score'] is not None
+                      and existing['team2_score'] is not None)
+        filled = conn.execute('''
+            INSERT INTO games (match_id, map, team1, team2, team1_score, team2_score, winner)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(match_id, map) DO UPDATE SET
+                team1_score = COALESCE(games.team1_score, excluded.team1_score),
+                team2_score = COALESCE(games.team2_score, excluded.team2_score),
+                winner = COALESCE(games.winner, excluded.winner)
+            WHERE (games.team1_score IS NULL AND excluded.team1_score IS NOT NULL)
+               OR (games.team2_score IS NULL AND excluded.team2_score IS NOT NULL)
+               OR (games.winner IS NULL AND excluded.winner IS NOT NULL)
+        ''', (match_id, map_name, team1, team2, scores.get(team1), scores.get(team2), winner)).rowcount
+        game = conn.execute(
+            'SELECT id, team1_score, team2_score FROM games WHERE match_id = ? AND map = ?',
+            (match_id, map_name)).fetchone()
+        game_ids[(match_id, map_name)] = game['id']
+        if not had_scores and game['team1_score'] is not None and game['team2_score'] is not None:
+            date = conn.execute('SELECT match_date FROM series WHERE match_id = ?', (match_id,)).fetchone()[0]
+            _count_round_score(conn, game['id'], game['team1_score'], game['team2_score'], date)
+        if existing is not None and filled:
+            conn.execute('''
+                INSERT INTO game_updates (game_id, team1_score, team2_score, winner)
+                SELECT id, team1_score, team2_score, winner FROM games WHERE id = ?
+            ''', (game['id'],))
+    
+    # Rows from callers that don't pass the event (manual batches, tests)
+    _backfill_series_events(conn)
+    return game_ids
+
+def _count_round_score(conn, game_id: int, score1: int, score2: int, date: Optional[str], games: int = 1):
+    """
+    Add a newly scored game to the round_scores summary. With games=0 only
+    the cell's first game is reconsidered (the game's date was filled in).
+    """
+    conn.execute('''
+        INSERT INTO round_scores (winning_score, losing_score, games, first_game_id, first_date)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(winning_score, losing_score) DO UPDATE SET
+            games = games + excluded.games,
+            first_game_id = CASE
+                WHEN excluded.first_date < round_scores.first_date
+                     OR (round_scores.first_date IS NULL AND excluded.first_date IS NOT NULL)
+                THEN excluded.first_game_id ELSE round_scores.first_game_id END,
+            first_date = CASE
+                WHEN excluded.first_date < round_scores.first_date
+                     OR (round_scores.first_date IS NULL AND excluded.first_date IS NOT NULL)
+                THEN excluded.first_date ELSE round_scores.first_date END
+    ''', (max(score1, score2), min(score1, score2), games, game_id, date))
+
+def _date_round_scores(conn, match_id: str):
+    """Reconsider round_scores first games after a series' date is filled in."""
+    rows = conn.execute('''
+        SELECT g.id, g.team1_score, g.team2_score, s.match_date
+        FROM games g JOIN series s ON s.match_id = g.match_id
+        WHERE g.match_id = ? AND g.team1_score IS NOT NULL AND g.team2_score IS NOT NULL
+    ''', (match_id,)).fetchall()
+    for row in rows:
+        _count_round_score(conn, row['id'], row['team1_score'], row['team2_score'], row['match_date'], games=0)
+
+def _apply_updates(conn):
+    """
+    Fill series and games values from series_updates/game_updates, for rows
+    replayed without them (see changesets.rebuild). Values already set are
+    kept.
+    """
+    conn.execute('''
+        UPDATE series SET
+            tournament_id = COALESCE(series.tournament_id, u.tournament_id),
+            match_date = COALESCE(series.match_date, u.match_date),
+            event = COALESCE(series.event, u.event)
+        FROM series_updates u
+        WHERE u.match_id = series.match_id
+    ''')
+    conn.execute('''
+        UPDATE games SET
+            team1_score = COALESCE(games.team1_score, u.team1_score),
+            team2_score = COALESCE(games.team2_score, u.team2_score),
+            winner = COALESCE(games.winner, u.winner)
+        FROM game_updates u
+        WHERE u.game_id = games.id
+    ''')
+
+def _rebuild_round_scores(conn):
+    """Recompute the round_scores summary from every scored game."""
+    conn.execute('DELETE FROM round_scores')
+    conn.execute('''
+        WITH scored AS (
+            SELECT g.id, MAX(g.team1_score, g.team2_score) AS winning_score,
+                   MIN(g.team1_score, g.team2_score) AS losing_score, s.match_date
+            FROM games g LEFT JOIN series s ON s.match_id = g.match_id
+            WHERE g.team1_score IS NOT NULL AND g.team2_score IS NOT NULL
+        ), ranked AS (
+            SELECT *,
+                   ROW_NUMBER() OVER (PARTITION BY winning_score, losing_score
+                                      ORDER BY match_date IS NULL, match_date, id) AS position,
+                   COUNT(*) OVER (PARTITION BY winning_score, losing_score) AS games
+            FROM scored
+        )
+        INSERT INTO round_scores (winning_score, losing_score, games, first_game_id, first_date)
+        SELECT winning_score, losing_score, games, id, match_date FROM ranked WHERE position = 1
+    ''')
+
+# Shared by the full rebuild and the per-map refresh of team_map_stats
+TEAM_MAP_STATS_SELECT = '''
+    SELECT match_id, map, team, SUM(kills), SUM(deaths), COUNT(*), MAX(result), MIN(match_date)
+    FROM matches
+'''
+
+def _rebuild_team_map_stats(conn):
+    """Recompute team_map_stats from every player row with a match_id."""
+    conn.execute('DELETE FROM team_map_stats')
+    conn.execute(f'''
+        INSERT INTO team_map_stats (match_id, map, team, kills, deaths, players, result, match_date)
+        {TEAM_MAP_STATS_SELECT}
+        WHERE match_id IS NOT NULL AND team IS NOT NULL
+        GROUP BY match_id, map, team
+    ''')
+
+def _refresh_team_map_stats(conn, maps):
+    """Recompute team_map_stats for the given (match_id, map) pairs."""
+    for match_id, map_name in maps:
+        conn.execute(f'''
+            INSERT OR REPLACE INTO team_map_stats (match_id, map, team, kills, deaths, players, result, match_date)
+            {TEAM_MAP_STATS_SELECT}
+            WHERE match_id = ? AND map = ? AND team IS NOT NULL
+            GROUP BY match_id, map, team
+        ''', (match_id, map_name))
+
+def _count_first_occurrences(conn, after_id: int):
+    """Fold the matches rows with id > after_id into first_occurrences."""
+    # New rows have higher ids, so an existing first occurrence only loses
+    # to a new row with an earlier date (or a date where it had none)
+    conn.execute('''
+        WITH ranked AS (
+            SELECT id, kills, deaths, player, match_date,
+                   ROW_NUMBER() OVER (PARTITION BY kills, deaths
+                                      ORDER BY match_date IS NULL, match_date, id) AS position,
+                   COUNT(*) OVER (PARTITION BY kills, deaths) AS occurrences
+            FROM matches WHERE id > ?
+        )
+        INSERT INTO first_occurrences (kills, deaths, occurrences, first_row_id, first_date, player)
+        SELECT kills, deaths, occurrences, id, match_date, player FROM ranked WHERE position = 1
+        ON CONFLICT(kills, deaths) DO UPDATE SET
+            occurrences = occurrences + excluded.occurrences,
+            first_row_id = CASE
+                WHEN excluded.first_date < first_occurrences.first_date
+                     OR (first_occurrences.first_date IS NULL AND excluded.first_date IS NOT NULL)
+                THEN excluded.first_row_id ELSE first_occurrences.first_row_id END,
+            player = CASE
+                WHEN excluded.first_date < first_occurrences.first_date
+                     OR (first_occurrences.first_date IS NULL AND excluded.first_date IS NOT NULL)
+                THEN excluded.player ELSE first_occurrences.player END,
+            first_date = CASE
+                WHEN excluded.first_date < first_occurrences.first_date
+                     OR (first_occurrences.first_date IS NULL AND excluded.first_date IS NOT NULL)
+                THEN excluded.first_date ELSE first_occurrences.first_date END
+    ''', (after_id,))
+
+def _rebuild_first_occurrences(conn):
+    """Recompute first_occurrences from every match row."""
+    conn.execute('DELETE FROM first_occurrences')
+    _count_first_occurrences(conn, 0)
+
 def match_exists(description: str, map_name: str, player: str, match_id: str = None) -> bool:
     """Check if a match record already exists."""
     conn = get_db_connection()
@@ -73,19 +882,26 @@ def add_match(description: str, map_name: str, player: str, kills: int, deaths:
               match_date: str = None, result: str = None, team: str = None,
               tournament_id: int = None, match_id: str = None) -> bool:
     """Add a single match record."""
-    conn = get_db_connection()
+    def insert():
+        conn = get_db_connection()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            last_id = _max_match_id(conn)
+            conn.execute('''
+                INSERT INTO matches (description, map, player, kills, deaths, match_date, result, team, tournament_id, match_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (description, map_name, player, kills, deaths, match_date, result, team, tournament_id, match_id))
+            _record_changes(conn, last_id)
+            conn.commit()
+        finally:
+            conn.close()
+    
     try:
-        conn.execute('''
-            INSERT INTO matches (description, map, player, kills, deaths, match_date, result, team, tournament_id, match_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (description, map_name, player, kills, deaths, match_date, result, team, tournament_id, match_id))
-        conn.commit()
+        retry_on_lock(insert)
         return True
     except Exception as e:
         print(f"Error adding match: {e}")
         return False
-    finally:
-        conn.close()
 
 def add_matches_batch(matches: List[Dict]) -> Tuple[int, int]:
     """
@@ -95,11 +911,122 @@ def add_matches_batch(matches: List[Dict]) -> Tuple[int, int]:
     Returns:
         Tuple of (inserted_count, skipped_count)
     """
+    return retry_on_lock(lambda: _add_matches_batch(matches))
+
+def _add_matches_batch(matches: List[Dict]) -> Tuple[int, int]:
+    """Insert a batch in a single write transaction (see add_matches_batch)."""
     conn = get_db_connection()
-    inserted = 0
-    skipped = 0
+    try:
+        # Take the write lock up front. A deferred transaction that reads
+        # first and then tries to write can fail with "database is locked"
+        # without ever waiting on the busy timeout.
+        conn.execute('BEGIN IMMEDIATE')
+        last_id = _max_match_id(conn)
+        inserted, skipped, games_changed = _insert_matches(conn, matches)
+        if inserted:
+            _record_changes(conn, last_id)
+        elif games_changed:
+            # Scores filled into known games change round_scores and the
+            # game cells without adding rows; readers still need a new
+            # generation to drop their caches
+            _bump_generation(conn)
+        conn.commit()
+        return inserted, skipped
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+# Players per team on a scraped map
+TEAM_SIZE = 5
+
+def validate_map(rows: List[Dict]) -> Optional[str]:
+    """
+    Check the player rows of one scraped map for consistency.
     
+    A map must have two teams of five, and each team's kills must equal the
+    other team's deaths.
+    
+    Returns:
+        A description of the first problem found, or None if the map is valid
+    """
+    teams = {}
+    for row in rows:
+        teams.setdefault(row.get('team'), []).append(row)
+    
+    if len(teams) != 2:
+        return f"expected 2 teams, found {len(teams)}"
+    if len(rows) != 2 * TEAM_SIZE:
+        return f"expected {2 * TEAM_SIZE} players, found {len(rows)}"
+    
+    (team_a, rows_a), (team_b, rows_b) = teams.items()
+    for team, team_rows in ((team_a, rows_a), (team_b, rows_b)):
+        if len(team_rows) != TEAM_SIZE:
+            return f"{team} has {len(team_rows)} players"
+    
+    kills_a, deaths_a = sum(r['kills'] for r in rows_a), sum(r['deaths'] for r in rows_a)
+    kills_b, deaths_b = sum(r['kills'] for r in rows_b), sum(r['deaths'] for r in rows_b)
+    if kills_a != deaths_b:
+        return f"{team_a} kills ({kills_a}) != {team_b} deaths ({deaths_b})"
+    if kills_b != deaths_a:
+        return f"{team_b} kills ({kills_b}) != {team_a} deaths ({deaths_a})"
+    return None
+
+def _quarantine_invalid_maps(conn, matches: List[Dict]) -> List[Dict]:
+    """
+    Validate incoming rows per (match_id, map) and quarantine failing maps.
+    
+    Only the rows being ingested are checked, so the cost scales with the
+    batch, not the table. Rows without a match_id (manual entries) are not
+    grouped into maps and pass through. A map that passes clears any earlier
+    quarantine entry for it. Nothing is printed here; the ingest scripts
+    log the quarantine from get_quarantined_maps after the insert.
+    
+    Returns:
+        The rows that passed validation
+    """
+    maps = {}
     for match in matches:
+        if match.get('match_id') is not None:
+            maps.setdefault((match['match_id'], match['map']), []).append(match)
+    
+    rejected = set()
+    for (match_id, map_name), rows in maps.items():
+        reason = validate_map(rows)
+        if reason is None:
+            conn.execute('DELETE FROM quarantined_maps WHERE match_id = ? AND map = ?',
+                         (match_id, map_name))
+            continue
+        rejected.add((match_id, map_name))
+        conn.execute('''
+            INSERT INTO quarantined_maps (match_id, map, reason, payload) VALUES (?, ?, ?, ?)
+            ON CONFLICT(match_id, map) DO UPDATE SET
+                reason = excluded.reason, payload = excluded.payload, created_at = CURRENT_TIMESTAMP
+        ''', (match_id, map_name, reason, json.dumps(rows, sort_keys=True)))
+    
+    if not rejected:
+        return matches
+    return [m for m in matches if (m.get('match_id'), m['map']) not in rejected]
+
+def _insert_matches(conn, matches: List[Dict]) -> Tuple[int, int, bool]:
+    """
+    Insert match records on an open transaction, skipping duplicates.
+    Rows of maps that fail validation are quarantined and counted as skipped.
+    
+    Returns:
+        Tuple of (inserted_count, skipped_count, whether any series/games
+        row was added or updated)
+    """
+    valid = _quarantine_invalid_maps(conn, matches)
+    changes = conn.total_changes
+    game_ids = _store_games(conn, valid)
+    games_changed = conn.total_changes != changes
+    inserted = 0
+    skipped = len(matches) - len(valid)
+    changed_maps = set()
+    
+    for match in valid:
         # FIXED: Include match_id in duplicate check
         cursor = conn.execute(
             'SELECT 1 FROM matches WHERE description = ? AND map = ? AND player = ? AND match_id = ? LIMIT 1',
@@ -111,8 +1038,9 @@ def add_matches_batch(matches: List[Dict]) -> Tuple[int, int]:
         
         try:
             conn.execute('''
-                INSERT INTO matches (description, map, player, kills, deaths, match_date, result, team, tournament_id, match_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                INSERT INTO matches (description, map, player, kills, deaths, match_date, result, team, tournament_id, match_id, game_id,
+                                     assists, acs, first_kills, first_deaths, adr)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 match['description'],
                 match['map'],
@@ -123,16 +1051,402 @@ def add_matches_batch(matches: List[Dict]) -> Tuple[int, int]:
                 match.get('result'),
                 match.get('team'),
                 match.get('tournament_id'),
-                match.get('match_id')
+                match.get('match_id'),
+                game_ids.get((match.get('match_id'), match['map'])),
+                *(match.get(column) for column in STAT_COLUMNS)
             ))
             inserted += 1
+            if match.get('match_id') is not None:
+                changed_maps.add((match['match_id'], match['map']))
         except Exception as e:
+            if is_lock_error(e):
+                raise
             print(f"Error inserting match: {e}")
             skipped += 1
     
-    conn.commit()
+    _refresh_team_map_stats(conn, changed_maps)
+    return inserted, skipped, games_changed
+
+def _max_match_id(conn) -> int:
+    """Get the highest matches.id (0 for an empty table)."""
+    return conn.execute('SELECT COALESCE(MAX(id), 0) FROM matches').fetchone()[0]
+
+def _bump_generation(conn) -> int:
+    """Bump the data generation on an open write transaction and return it."""
+    conn.execute('''
+        UPDATE data_version SET generation = generation + 1, updated_at = CURRENT_TIMESTAMP
+        WHERE id = 1
+    ''')
+    return conn.execute('SELECT generation FROM data_version WHERE id = 1').fetchone()[0]
+
+def _record_changes(conn, last_id: int) -> int:
+    """
+    Bump the data generation, log every row inserted after last_id and fold
+    those rows into first_occurrences.
+    
+    Must run inside the inserting transaction, which holds the write lock,
+    so every id above last_id belongs to this transaction.
+    
+    Returns:
+        The new generation number
+    """
+    generation = _bump_generation(conn)
+    conn.execute('''
+        INSERT INTO change_log (generation, match_row_id, kills, deaths, player, team, match_date)
+        SELECT ?, id, kills, deaths, player, team, match_date
+        FROM matches WHERE id > ?
+        ORDER BY id
+    ''', (generation, last_id))
+    _count_first_occurrences(conn, last_id)
+    return generation
+
+def current_generation() -> int:
+    """
+    Get the current data generation of the published database.
+    
+    A single-row primary key lookup; compare against a cached value to know
+    whether anything changed.
+    """
+    conn = get_read_connection()
+    row = conn.execute('SELECT generation FROM data_version WHERE id = 1').fetchone()
+    return row[0] if row else 0
+
+def changes_since(generation: int) -> Dict:
+    """
+    Summarize everything inserted after a given generation.
+    
+    Returns:
+        Dict with the current 'generation', the inserted 'row_ids', and the
+        affected 'cells' ([kills, deaths] pairs), 'players', 'teams' and
+        'dates' - enough for derived structures to refresh only what changed
+    """
+    conn = get_read_connection()
+    rows = conn.execute('''
+        SELECT generation, match_row_id, kills, deaths, player, team, match_date
+        FROM change_log WHERE generation > ?
+        ORDER BY id
+    ''', (generation,)).fetchall()
+    
+    cells = set()
+    players = set()
+    teams = set()
+    dates = set()
+    for row in rows:
+        cells.add((row['kills'], row['deaths']))
+        if row['player']:
+            players.add(row['player'])
+        if row['team']:
+            teams.add(row['team'])
+        if row['match_date']:
+            dates.add(row['match_date'])
+    
+    return {
+        'generation': max([generation] + [row['generation'] for row in rows]),
+        'row_ids': [row['match_row_id'] for row in rows],
+        'cells': [list(cell) for cell in sorted(cells)],
+        'players': sorted(players),
+        'teams': sorted(teams),
+        'dates': sorted(dates),
+    }
+
+# Columns carried by export/import (everything but the local id/created_at
+# and game_id, which imports re-derive)
+EXPORT_COLUMNS = ('description', 'map', 'player', 'kills', 'deaths', 'match_date',
+                  'result', 'team', 'tournament_id', 'match_id') + STAT_COLUMNS
+# The row's game score from its team's side, as the parser reports it; not
+# matches columns, so exports add them from games and imports put them back
+SCORE_COLUMNS = ('team_score', 'opponent_score')
+FILE_COLUMNS = EXPORT_COLUMNS + SCORE_COLUMNS
+INTEGER_COLUMNS = {'kills', 'deaths', 'tournament_id'} | set(STAT_COLUMNS) | set(SCORE_COLUMNS)
+
+def _detect_format(path: str, fmt: Optional[str]) -> str:
+    """Pick csv/jsonl from an explicit format or the file extension."""
+    if fmt:
+        return fmt
+    return 'jsonl' if path.endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+def export_matches(path: str, fmt: str = None) -> int:
+    """
+    Stream the matches table to a CSV or JSONL file ('-' for stdout).
+    
+    Each row carries its game's round score (SCORE_COLUMNS) so an import can
+    restore games and round_scores. Rows are read from the cursor and written one at a time, so memory use
+    doesn't depend on table size.
+    
+    Returns:
+        Number of rows written
+    """
+    fmt = _detect_format(path, fmt)
+    conn = get_db_connection()
+    out = sys.stdout if path == '-' else open(path, 'w', newline='', encoding='utf-8')
+    count = 0
+    try:
+        cursor = conn.execute(f'''
+            SELECT {', '.join('m.' + c for c in EXPORT_COLUMNS)},
+                   CASE m.team WHEN g.team1 THEN g.team1_score WHEN g.team2 THEN g.team2_score END,
+                   CASE m.team WHEN g.team1 THEN g.team2_score WHEN g.team2 THEN g.team1_score END
+            FROM matches m LEFT JOIN games g ON g.id = m.game_id
+            ORDER BY m.id
+        ''')
+        if fmt == 'csv':
+            writer = csv.writer(out)
+            writer.writerow(FILE_COLUMNS)
+            for row in cursor:
+                writer.writerow(['' if v is None else v for v in row])
+                count += 1
+        else:
+            for row in cursor:
+                out.write(json.dumps(dict(zip(FILE_COLUMNS, row)), ensure_ascii=False) + '\n')
+                count += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        conn.close()
+    return count
+
+def _read_rows(path: str, fmt: str):
+    """
+    Yield rows from a CSV or JSONL file ('-' for stdin), one at a time, as
+    tuples in FILE_COLUMNS order. Files exported before the score columns
+    existed read them as None.
+    """
+    src = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+    try:
+        if fmt == 'csv':
+            reader = csv.reader(src)
+            header = next(reader, [])
+            positions = [header.index(c) if c in header else None for c in FILE_COLUMNS]
+            integer = [c in INTEGER_COLUMNS for c in FILE_COLUMNS]
+            for record in reader:
+                row = []
+                for pos, is_int in zip(positions, integer):
+                    value = record[pos] if pos is not None and pos < len(record) else ''
+                    row.append(None if value == '' else int(value) if is_int else value)
+                yield tuple(row)
+        else:
+            loads = json.loads
+            for line in src:
+                if line.strip():
+                    yield tuple(map(loads(line).get, FILE_COLUMNS))
+    finally:
+        if src is not sys.stdin:
+            src.close()
+
+def add_matches_bulk(rows, chunk_size: int = 50000) -> Tuple[int, int]:
+    """
+    Insert a stream of match rows in chunked transactions.
+    
+    The bulk counterpart of add_matches_batch: rows (dicts, or tuples in
+    EXPORT_COLUMNS order) are consumed lazily and each chunk is a single
+    executemany() with the duplicate check folded into the INSERT - an
+    INSERT OR IGNORE against the UNIQUE idx_unique_match where available.
+    The change log is written per chunk. Memory stays bounded by chunk_size
+    however long the stream is.
+    
+    The full-text insert trigger is dropped while the chunks load (it
+    roughly triples load time) and put back afterwards, with one rebuild of
+    matches_fts covering every row inserted in between.
+    
+    Returns:
+        Tuple of (inserted_count, skipped_count)
+    """
+    columns = ', '.join(EXPORT_COLUMNS)
+    placeholders = ', '.join('?' * len(EXPORT_COLUMNS))
+    conn = get_db_connection()
+    unique_index = _has_unique_match_index(conn)
     conn.close()
-    return inserted, skipped
+    
+    if unique_index:
+        insert_sql = f'INSERT OR IGNORE INTO matches ({columns}) VALUES ({placeholders})'
+        params = tuple
+    else:
+        insert_sql = f'''
+            INSERT INTO matches ({columns})
+            SELECT {placeholders}
+            WHERE NOT EXISTS (
+                SELECT 1 FROM matches WHERE description = ? AND map = ? AND player = ? AND match_id = ?
+            )
+        '''
+        params = lambda row: tuple(row) + (row[0], row[1], row[2], row[9])
+    
+    def insert_chunk(chunk):
+        conn = get_db_connection()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            last_id = _max_match_id(conn)
+            inserted = conn.executemany(insert_sql, map(params, chunk)).rowcount
+            if inserted:
+                _record_changes(conn, last_id)
+            conn.commit()
+            return inserted
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    def set_fts_trigger(enabled: bool, rebuild: bool = False):
+        conn = get_db_connection()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute(FTS_INSERT_TRIGGER if enabled else 'DROP TRIGGER IF EXISTS matches_fts_insert')
+            if rebuild:
+                conn.execute("INSERT INTO matches_fts (matches_fts) VALUES ('rebuild')")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    inserted = 0
+    total = 0
+    chunk = []
+    retry_on_lock(lambda: set_fts_trigger(False))
+    try:
+        for row in rows:
+            if isinstance(row, dict):
+                row = tuple(row.get(c) for c in EXPORT_COLUMNS)
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                inserted += retry_on_lock(lambda: insert_chunk(chunk))
+                total += len(chunk)
+                chunk = []
+        if chunk:
+            inserted += retry_on_lock(lambda: insert_chunk(chunk))
+            total += len(chunk)
+    finally:
+        retry_on_lock(lambda: set_fts_trigger(True, rebuild=inserted > 0))
+    return inserted, total - inserted
+
+def _fill_game_scores(conn, scores: Dict[Tuple[str, str, str], Tuple[int, int]], last_game_id: int) -> int:
+    """
+    Fill missing games scores from per-team scores keyed by
+    (match_id, map, team), as carried by exported rows. Scores already set
+    are kept. Games up to last_game_id existed before this load, so their
+    fills go to game_updates like _store_games' do.
+    
+    Returns:
+        Number of games updated
+    """
+    unscored = [row[0] for row in conn.execute('''
+        SELECT id FROM games WHERE id <= ? AND (team1_score IS NULL OR team2_score IS NULL)
+    ''', (last_game_id,))]
+    updated = 0
+    for side, other in (('team1', 'team2'), ('team2', 'team1')):
+        updated += conn.executemany(f'''
+            UPDATE games SET {side}_score = ?, {other}_score = COALESCE({other}_score, ?)
+            WHERE match_id = ? AND map = ? AND {side} = ? AND {side}_score IS NULL
+        ''', ((score, opponent, match_id, map_name, team)
+              for (match_id, map_name, team), (score, opponent) in scores.items())).rowcount
+    conn.executemany('''
+        INSERT INTO game_updates (game_id, team1_score, team2_score, winner)
+        SELECT id, team1_score, team2_score, winner FROM games
+        WHERE id = ? AND team1_score IS NOT NULL AND team2_score IS NOT NULL
+    ''', ((game_id,) for game_id in unscored))
+    return updated
+
+def import_matches(path: str, fmt: str = None, chunk_size: int = 50000) -> Tuple[int, int]:
+    """
+    Stream a CSV/JSONL file into the matches table (see add_matches_bulk),
+    then link the imported rows to series/games, put the exported round
+    scores back on the games and refresh the summaries.
+    
+    Scores are collected once per (match_id, map, team) while the rows
+    stream, so memory grows with the number of games, not rows.
+    """
+    scores = {}
+    width = len(EXPORT_COLUMNS)
+    conn = get_db_connection()
+    last_game_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM games').fetchone()[0]
+    conn.close()
+    
+    def match_rows():
+        for row in _read_rows(path, _detect_format(path, fmt)):
+            team_score, opponent_score = row[width:]
+            if team_score is not None and row[9] is not None:
+                scores.setdefault((row[9], row[1], row[7]), (team_score, opponent_score))
+            yield row[:width]
+    
+    result = add_matches_bulk(match_rows(), chunk_size=chunk_size)
+    retry_on_lock(backfill_games)
+    
+    def fill_scores():
+        conn = get_db_connection()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            _fill_game_scores(conn, scores, last_game_id)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    if scores:
+        retry_on_lock(fill_scores)
+    retry_on_lock(rebuild_summaries)
+    return result
+
+def _fts_query(text: str) -> str:
+    """
+    Turn free text into an FTS5 query: every word must match, the last one
+    as a prefix. Words are quoted so FTS5 syntax in the input is literal.
+    """
+    words = [w.replace('"', '""') for w in text.split()]
+    if not words:
+        return ''
+    terms = [f'"{w}"' for w in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+# Most recent hits considered for ranking. A common word like a map name
+# matches a large share of the table and bm25 scores every hit, so ranking
+# is done over the newest SEARCH_CANDIDATES hits only.
+SEARCH_CANDIDATES = 2000
+
+def search_matches(text: str, limit: int = 20, offset: int = 0) -> Tuple[List[Dict], bool, bool]:
+    """
+    Full-text search over description, player, team and map.
+    
+    Results are ranked by bm25 (player and team hits weigh more than the
+    long description text), then newest first, over the most recent
+    SEARCH_CANDIDATES hits. Older hits are never returned; capped says
+    whether there were any.
+    
+    Returns:
+        Tuple of (rows on this page, whether another page follows, whether
+        hits older than the SEARCH_CANDIDATES window were left out)
+    """
+    query = _fts_query(text)
+    if not query:
+        return [], False, False
+    conn = get_read_connection()
+    # Oldest rowid in the candidate window and whether any hit is older;
+    # the FTS index walks rowids in order, so this doesn't score anything
+    window_end = conn.execute('''
+        SELECT rowid FROM matches_fts WHERE matches_fts MATCH ?
+        ORDER BY rowid DESC LIMIT 2 OFFSET ?
+    ''', (query, SEARCH_CANDIDATES - 1)).fetchall()
+    cutoff = window_end[0][0] if window_end else 0
+    capped = len(window_end) > 1
+    limit = max(0, min(limit, SEARCH_CANDIDATES - offset))
+    if not limit:
+        return [], False, capped
+    rows = conn.execute('''
+        WITH ranked AS (
+            SELECT rowid, bm25(matches_fts, 1.0, 4.0, 3.0, 2.0) AS rank
+            FROM matches_fts
+            WHERE matches_fts MATCH ? AND rowid >= ?
+            ORDER BY rank, rowid DESC
+            LIMIT ? OFFSET ?
+        )
+        SELECT m.id, m.description, m.map, m.player, m.kills, m.deaths, m.match_date,
+               m.result, m.team, m.match_id, ranked.rank
+        FROM ranked JOIN matches m ON m.id = ranked.rowid
+        ORDER BY ranked.rank, m.id DESC
+    ''', (query, cutoff, limit + 1, offset)).fetchall()
+    return [dict(row) for row in rows[:limit]], len(rows) > limit, capped
 
 def get_scores(player: str = None, tournament: str = None):
     """Get aggregated scores with optional filtering."""
@@ -218,6 +1532,17 @@ def get_unique_tournaments_list() -> List[str]:
     conn.close()
     return [row['description'] for row in rows]
 
+def get_quarantined_maps(limit: int = None) -> List[Dict]:
+    """Get quarantined maps, most recent first."""
+    conn = get_db_connection()
+    rows = conn.execute('''
+        SELECT id, match_id, map, reason, created_at FROM quarantined_maps
+        ORDER BY id DESC
+        LIMIT ?
+    ''', (limit or -1,)).fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
 def verify_kill_death_balance() -> int:
     """
     Verify that total kills equals total deaths.
@@ -262,9 +1587,53 @@ def get_unique_tournaments():
     return sorted(MASTERS_CHAMPIONS_TOURNAMENTS)
 
 
+def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='VCT Scorigami Database')
+    subparsers = parser.add_subparsers(dest='command')
+    
+    subparsers.add_parser('stats', help='Show database statistics (default)')
+    
+    export_parser = subparsers.add_parser('export', help='Stream matches to CSV/JSONL')
+    export_parser.add_argument('path', help="Output file ('-' for stdout)")
+    export_parser.add_argument('--format', '-f', choices=['csv', 'jsonl'],
+                               help='File format (default: from extension)')
+    
+    import_parser = subparsers.add_parser('import', help='Bulk load matches from CSV/JSONL')
+    import_parser.add_argument('path', help="Input file ('-' for stdin)")
+    import_parser.add_argument('--format', '-f', choices=['csv', 'jsonl'],
+                               help='File format (default: from extension)')
+    import_parser.add_argument('--chunk-size', '-c', type=int, default=50000,
+                               help='Rows per transaction (default: 50000)')
+    
+    args = parser.parse_args()
+    
+    if args.command == 'export':
+        start = time.perf_counter()
+        count = export_matches(args.path, args.format)
+        elapsed = time.perf_counter() - start
+        print(f"Exported {count} rows in {elapsed:.2f}s ({count / max(elapsed, 1e-9):,.0f} rows/sec)",
+              file=sys.stderr)
+    elif args.command == 'import':
+        import snapshot
+        
+        start = time.perf_counter()
+        with staged_write():
+            init_db()
+            inserted, skipped = import_matches(args.path, args.format, args.chunk_size)
+        elapsed = time.perf_counter() - start
+        total = inserted + skipped
+        print(f"Imported {inserted} rows, skipped {skipped} duplicates in {elapsed:.2f}s "
+              f"({total / max(elapsed, 1e-9):,.0f} rows/sec)", file=sys.stderr)
+        snapshot.export_snapshot()
+    else:
+        ensure_schema()
+        stats = get_database_stats()
+        print("\nDatabase Statistics:")
+        for key, value in stats.items():
+            print(f"  {key}: {value}")
+
+
 if __name__ == '__main__':
-    init_db()
-    stats = get_database_stats()
-    print("\nDatabase Statistics:")
-    for key, value in stats.items():
-        print(f"  {key}: {value}")
+    main()
\ No newline at end of file
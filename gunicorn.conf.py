@@ -0,0 +1,33 @@
+"""
+Gunicorn configuration for the VCT Scorigami web app.
+
+The app is preloaded in the master, which memory-maps the .npz snapshot
+(see snapshot.py) before forking. Workers inherit the read-only mapping, so
+they all share the same page-cache pages and adding workers adds throughput
+without multiplying memory.
+
+Usage:
+    gunicorn -c gunicorn.conf.py app:app
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+preload_app = True
+
+
+def when_ready(server):
+    """Build the snapshot's lookups in the master so workers inherit them."""
+    import snapshot
+    
+    snap = snapshot.get_snapshot()
+    if snap is not None:
+        snap.warm()
+        server.log.info(f"Snapshot mapped: {snap.size} rows, generation {snap.generation}")
+
+
+def post_fork(server, worker):
+    """Drop the master's SQLite connection - it must not be used across fork()."""
+    import database
+    
+    database.reset_read_connection()
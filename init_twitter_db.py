@@ -49,5 +49,6 @@ def init_posted_scorigamis():
     print("   The bot will only tweet NEW scorigamis going forward.")
 
 if __name__ == '__main__':
-    database.init_db()
-    init_posted_scorigamis()
\ No newline at end of file
+    with database.staged_write():
+        database.init_db()
+        init_posted_scorigamis()
\ No newline at end of file
@@ -0,0 +1,114 @@
+"""
+Gunicorn Worker Memory Measurement
+Starts the app under gunicorn with 1 and then 8 workers, warms every worker
+with requests, and reports per-worker RSS / PSS / shared memory from
+/proc/<pid>/smaps_rollup (Linux only).
+
+Warm-up covers the fixed endpoints plus the filter-keyed builders at
+--distinct timeline positions each, more than their per-worker caches
+hold, so the numbers include full caches rather than cold workers.
+
+PSS splits shared pages between the processes mapping them, so with the
+snapshot shared across workers the per-worker PSS should drop as workers
+are added while total memory grows far slower than workers x RSS.
+
+Usage:
+    python measure_rss.py [--workers 1 8] [--requests 200] [--distinct 32]
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+ENDPOINTS = ['/api/data', '/api/data?timeline=50', '/api/kd-race', '/api/team-race', '/']
+
+# Cached-per-filter endpoints, requested once per timeline position
+FILTERED_ENDPOINTS = ['/api/data?timeline={t}', '/api/leaderboards?timeline={t}',
+                      '/api/cube/kills-deaths?timeline={t}', '/api/grids/by-map?timeline={t}',
+                      '/api/rounds?timeline={t}', '/api/team-grid?timeline={t}&limit=3']
+
+
+def warm_paths(distinct: int) -> list:
+    """Filtered requests at distinct timeline positions (99, 98, ...)."""
+    return [path.format(t=99 - i) for i in range(distinct) for path in FILTERED_ENDPOINTS]
+
+
+def read_smaps(pid: int) -> dict:
+    """Read RSS/PSS/shared (in KB) for a process from smaps_rollup."""
+    stats = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:', 'Shared_Clean:', 'Shared_Dirty:'):
+                stats[parts[0].rstrip(':')] = int(parts[1])
+    stats['Shared'] = stats.pop('Shared_Clean', 0) + stats.pop('Shared_Dirty', 0)
+    return stats
+
+
+def child_pids(pid: int) -> list:
+    """Get the worker PIDs of a gunicorn master."""
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(p) for p in f.read().split()]
+
+
+def wait_for(url: str, timeout: float = 60.0):
+    """Poll until the server answers."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=5).read()
+            return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError(f"Server at {url} did not start")
+
+
+def measure(workers: int, requests: int, port: int, distinct: int = 0) -> list:
+    """Run gunicorn with N workers, warm it up and return per-worker stats."""
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), PORT=str(port))
+    master = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        base = f'http://127.0.0.1:{port}'
+        wait_for(base + '/api/data')
+        # Enough requests that every worker serves every endpoint
+        for i in range(requests):
+            urllib.request.urlopen(base + ENDPOINTS[i % len(ENDPOINTS)], timeout=60).read()
+        # Then fill the filter caches; each worker gets a share of these
+        for _ in range(workers):
+            for path in warm_paths(distinct):
+                urllib.request.urlopen(base + path, timeout=120).read()
+        time.sleep(1)
+        return [dict(pid=pid, **read_smaps(pid)) for pid in child_pids(master.pid)]
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure gunicorn per-worker memory')
+    parser.add_argument('--workers', '-w', type=int, nargs='+', default=[1, 8],
+                        help='Worker counts to compare (default: 1 8)')
+    parser.add_argument('--requests', '-r', type=int, default=200,
+                        help='Warm-up requests per run (default: 200)')
+    parser.add_argument('--distinct', '-d', type=int, default=32,
+                        help='Timeline positions per filtered endpoint in the warm-up (default: 32)')
+    parser.add_argument('--port', '-p', type=int, default=8765)
+    args = parser.parse_args()
+
+    for n in args.workers:
+        stats = measure(n, max(args.requests, n * len(ENDPOINTS) * 4), args.port, args.distinct)
+        print(f"\n{n} worker(s)")
+        print("-" * 50)
+        print(f"  {'pid':>8} {'RSS MB':>10} {'PSS MB':>10} {'Shared MB':>10}")
+        for s in stats:
+            print(f"  {s['pid']:>8} {s['Rss'] / 1024:>10.1f} {s['Pss'] / 1024:>10.1f} {s['Shared'] / 1024:>10.1f}")
+        total_pss = sum(s['Pss'] for s in stats) / 1024
+        print(f"  Total PSS: {total_pss:.1f} MB ({total_pss / len(stats):.1f} MB per worker)")
+
+
+if __name__ == '__main__':
+    main()
@@ -8,6 +8,7 @@ import sys
 from datetime import datetime
 
 import database
+import snapshot
 from data_fetcher import fetch_tournament_data, fetch_all_tier1_data
 from tournament_discovery import TIER1_TOURNAMENT_IDS, discover_all_tier1_tournaments
 
@@ -33,7 +34,7 @@ def run_scraper(tournament_ids=None, delay=1.0, dry_run=False):
         dry_run: If True, don't save to database
     """
     # Initialize database
-    database.init_db()
+    database.ensure_schema()
     
     # Get current stats
     stats_before = database.get_database_stats()
@@ -52,19 +53,27 @@ def run_scraper(tournament_ids=None, delay=1.0, dry_run=False):
         logger.info(f"DRY RUN: Would insert {len(all_matches)} records")
         return all_matches
     
-    # Save to database
+    # Save to database (staged, then published in one atomic swap)
     logger.info(f"Inserting {len(all_matches)} records into database...")
-    inserted, skipped = database.add_matches_batch(all_matches)
+    with database.staged_write():
+        inserted, skipped = database.add_matches_batch(all_matches)
+        
+        logger.info(f"Inserted: {inserted}, Skipped (duplicates): {skipped}")
+        
+        # Maps that failed per-map validation during the insert
+        quarantined = database.get_quarantined_maps()
+        if quarantined:
+            logger.warning(f"{len(quarantined)} map(s) in quarantine:")
+            for entry in quarantined:
+                logger.warning(f"  match {entry['match_id']} {entry['map']}: {entry['reason']}")
+        else:
+            logger.info("All maps passed validation")
+        
+        # Get new stats
+        stats_after = database.get_database_stats()
+        logger.info(f"Database stats after: {stats_after}")
     
-    logger.info(f"Inserted: {inserted}, Skipped (duplicates): {skipped}")
-    
-    # Verify data integrity
-    kd_balance = database.verify_kill_death_balance()
-    logger.info(f"Kill/Death balance: {kd_balance} (should be 0)")
-    
-    # Get new stats
-    stats_after = database.get_database_stats()
-    logger.info(f"Database stats after: {stats_after}")
+    snapshot.export_snapshot()
     
     return all_matches
 
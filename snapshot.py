@@ -0,0 +1,732 @@
+"""
+VCT Scorigami Snapshot Module
+Exports the matches table as a compact columnar NumPy snapshot (.npz) and
+memory-maps it back for the web app, so requests don't touch SQLite.
+"""
+import bisect
+import os
+import string
+import struct
+import threading
+import zipfile
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import numpy as np
+
+import database
+from teams import normalize_team_name, SHOWMATCH_TEAMS
+
+SNAPSHOT_PATH = 'matches.npz'
+
+# Race charts: track the top N players by maps played, and teams with at
+# least this many player-map rows
+RACE_TRACK_PLAYERS = 250
+RACE_MIN_TEAM_MAPS = 4
+
+# Filter masks kept per snapshot, least recently used dropped first. Each
+# is one bool per row (~0.5MB at 500k rows), so this bounds the cache at a
+# few MB per worker; a miss costs well under a millisecond for one value.
+MASK_CACHE_SIZE = 16
+
+# Text columns stored dictionary-encoded: an int32 code per row plus a
+# sorted vocabulary. NULLs are stored as ''.
+STRING_COLUMNS = ('player', 'team', 'map', 'description', 'result', 'match_id', 'event')
+
+# Case folding of SQL LIKE: ASCII letters only, so 'KRÜ' still doesn't match 'krü'
+ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def _encode(values, extra=()):
+    """
+    Dictionary-encode a list of strings into (codes, sorted vocabulary).
+    Strings in extra are added to the vocabulary without rows of their own.
+    """
+    vocab = sorted(set(values).union(extra))
+    index = {v: i for i, v in enumerate(vocab)}
+    codes = np.fromiter((index[v] for v in values), dtype=np.int32, count=len(values))
+    return codes, np.array(vocab, dtype=str)
+
+
+def export_snapshot(path: str = SNAPSHOT_PATH) -> Dict:
+    """
+    Write the current database out as an uncompressed .npz snapshot.
+
+    Columns:
+        id, kills, deaths, tournament_id - integer columns
+        assists, acs, first_kills, first_deaths, adr - database.STAT_COLUMNS
+            (-1 = not recorded)
+        <col>_codes / <col>_values - dictionary-encoded text columns (event
+            is the series' event, see database._backfill_series_events)
+        date_codes / date_values - match_date, with a sorted vocabulary so
+            comparing codes compares dates (-1 = no date)
+        cell - per-row index into the K/D cell table
+        cell_kills, cell_deaths, cell_count, cell_wins, cell_results,
+        cell_players, cell_owner - precomputed per-cell aggregates over all
+            rows (cell_owner is the only player with that cell, or -1)
+        race_player_* / race_team_* - cumulative race chart series (see
+            _race_arrays)
+        game_* / round_cell_* - scored games and the round-score cell table
+            (see _game_arrays)
+        team_map_* - team kills/deaths per map and their K/D cell table (see
+            _team_map_arrays)
+        h2h_* - team-map entries by canonical team and date (see
+            _head_to_head_arrays)
+        cell_first, scorigami_rows, scorigami_date_keys, first_date_codes,
+            first_cumulative - first occurrences, current scorigamis and the
+            distinct-cell series (see _first_occurrence_arrays)
+        player_rows, player_starts - row indices grouped by player code, and
+            where each player's run starts
+        generation - data generation the snapshot was built from
+
+    The file is written next to the target and renamed into place, so
+    readers never see a partial snapshot.
+
+    Returns:
+        Dict with row and cell counts
+    """
+    conn = database.get_db_connection()
+    # Rows without a series (manual entries) use their description as the event
+    rows = conn.execute(f'''
+        SELECT m.id, m.kills, m.deaths, m.tournament_id, m.match_date,
+               m.player, m.team, m.map, m.description, m.result, m.match_id,
+               COALESCE(s.event, m.description) AS event,
+               {', '.join('m.' + column for column in database.STAT_COLUMNS)}
+        FROM matches m LEFT JOIN series s ON s.match_id = m.match_id
+        ORDER BY m.id
+    ''').fetchall()
+    generation = conn.execute('SELECT generation FROM data_version WHERE id = 1').fetchone()
+    games = conn.execute('''
+        SELECT g.id, g.map, g.team1, g.team2, g.team1_score, g.team2_score,
+               s.match_date, s.description
+        FROM games g LEFT JOIN series s ON s.match_id = g.match_id
+        WHERE g.team1_score IS NOT NULL AND g.team2_score IS NOT NULL
+        ORDER BY g.id
+    ''').fetchall()
+    round_scores = conn.execute(
+        'SELECT winning_score, losing_score, games, first_game_id FROM round_scores').fetchall()
+    team_maps = conn.execute('''
+        SELECT t.map, t.team, t.kills, t.deaths, t.result, t.match_date, s.description,
+               opponent.team AS opponent
+        FROM team_map_stats t
+        LEFT JOIN series s ON s.match_id = t.match_id
+        LEFT JOIN team_map_stats opponent
+            ON opponent.match_id = t.match_id AND opponent.map = t.map AND opponent.team != t.team
+        ORDER BY t.match_id, t.map, t.team
+    ''').fetchall()
+    first_occurrences = conn.execute(
+        'SELECT kills, deaths, first_row_id FROM first_occurrences').fetchall()
+    # Most recent first, as recent scorigamis are listed (a scan of
+    # idx_first_occurrences_scorigami)
+    scorigamis = conn.execute('''
+        SELECT first_row_id FROM first_occurrences WHERE occurrences = 1
+        ORDER BY first_date IS NULL, first_date DESC, first_row_id
+    ''').fetchall()
+    conn.close()
+
+    arrays = {
+        'id': np.array([r['id'] for r in rows], dtype=np.int32),
+        'kills': np.array([r['kills'] for r in rows], dtype=np.int16),
+        'deaths': np.array([r['deaths'] for r in rows], dtype=np.int16),
+        'tournament_id': np.array([r['tournament_id'] if r['tournament_id'] is not None else -1 for r in rows],
+                                  dtype=np.int32),
+        'generation': np.array(generation[0] if generation else 0, dtype=np.int64),
+    }
+    for column in database.STAT_COLUMNS:
+        arrays[column] = np.array([r[column] if r[column] is not None else -1 for r in rows], dtype=np.int16)
+
+    # Game- and team-level text shares the row vocabularies
+    summary_text = {
+        'map': [g['map'] or '' for g in games] + [t['map'] or '' for t in team_maps],
+        'team': ([g['team1'] or '' for g in games] + [g['team2'] or '' for g in games]
+                 + [t['team'] or '' for t in team_maps] + [t['opponent'] or '' for t in team_maps]),
+        'description': [g['description'] or '' for g in games] + [t['description'] or '' for t in team_maps],
+        'result': [t['result'] or '' for t in team_maps],
+    }
+    for column in STRING_COLUMNS:
+        codes, values = _encode([r[column] or '' for r in rows], summary_text.get(column, ()))
+        arrays[f'{column}_codes'] = codes
+        arrays[f'{column}_values'] = values
+
+    dates = [r['match_date'] for r in rows]
+    date_values = np.array(sorted({d for d in dates if d}
+                                  | {g['match_date'] for g in games if g['match_date']}
+                                  | {t['match_date'] for t in team_maps if t['match_date']}), dtype=str)
+    date_index = {d: i for i, d in enumerate(date_values.tolist())}
+    arrays['date_codes'] = np.array([date_index[d] if d else -1 for d in dates], dtype=np.int32)
+    arrays['date_values'] = date_values
+
+    # K/D cell table: one entry per distinct (kills, deaths) pair
+    kills = arrays['kills'].astype(np.int32)
+    deaths = arrays['deaths'].astype(np.int32)
+    keys, cell = np.unique(kills * 1024 + deaths, return_inverse=True)
+    cell = cell.astype(np.int32)
+    n_cells = len(keys)
+    results = arrays['result_values'][arrays['result_codes']] if rows else np.array([], dtype=str)
+
+    arrays['cell'] = cell
+    arrays['cell_kills'] = (keys // 1024).astype(np.int16)
+    arrays['cell_deaths'] = (keys % 1024).astype(np.int16)
+    arrays['cell_count'] = np.bincount(cell, minlength=n_cells).astype(np.int32)
+    arrays['cell_wins'] = np.bincount(cell, weights=(results == 'Win'), minlength=n_cells).astype(np.int32)
+    arrays['cell_results'] = np.bincount(cell, weights=(results != ''), minlength=n_cells).astype(np.int32)
+
+    # Distinct players per cell, and the owner of single-player cells
+    players = arrays['player_codes']
+    pairs = np.unique(cell.astype(np.int64) * (len(arrays['player_values']) + 1) + players)
+    pair_cells = (pairs // (len(arrays['player_values']) + 1)).astype(np.int32)
+    pair_players = (pairs % (len(arrays['player_values']) + 1)).astype(np.int32)
+    arrays['cell_players'] = np.bincount(pair_cells, minlength=n_cells).astype(np.int32)
+    owner = np.full(n_cells, -1, dtype=np.int32)
+    single = arrays['cell_players'][pair_cells] == 1
+    owner[pair_cells[single]] = pair_players[single]
+    arrays['cell_owner'] = owner
+
+    arrays.update(_race_arrays(arrays))
+    arrays.update(_game_arrays(arrays, games, round_scores, date_index))
+    arrays.update(_team_map_arrays(arrays, team_maps, date_index))
+    arrays.update(_head_to_head_arrays(arrays))
+    arrays.update(_first_occurrence_arrays(arrays, first_occurrences, scorigamis))
+
+    # Rows grouped by player (see Snapshot._postings), built here once
+    # instead of by every worker
+    player_codes = arrays['player_codes']
+    arrays['player_rows'] = np.argsort(player_codes, kind='stable').astype(np.int32)
+    arrays['player_starts'] = np.concatenate((
+        [0], np.cumsum(np.bincount(player_codes, minlength=len(arrays['player_values']))))).astype(np.int64)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+    return {'rows': len(rows), 'cells': n_cells, 'generation': int(arrays['generation'])}
+
+
+def _game_arrays(arrays: Dict, games, round_scores, date_index: Dict) -> Dict:
+    """
+    Build the game-level arrays behind the round-score grid.
+
+    One entry per scored game (map codes, both teams and scores, winning /
+    losing score, date and description codes) plus a round-score cell table
+    taken from the round_scores summary the database maintains at ingest:
+    round_cell_winning / round_cell_losing / round_cell_count, and
+    round_cell_first, the game index of each score's first occurrence.
+    """
+    def lookup(column, values):
+        index = {v: i for i, v in enumerate(arrays[f'{column}_values'].tolist())}
+        return np.array([index[v or ''] for v in values], dtype=np.int32)
+
+    score1 = np.array([g['team1_score'] for g in games], dtype=np.int16)
+    score2 = np.array([g['team2_score'] for g in games], dtype=np.int16)
+    winning = np.maximum(score1, score2)
+    losing = np.minimum(score1, score2)
+    game_ids = np.array([g['id'] for g in games], dtype=np.int32)
+
+    # Cell table keyed like the K/D cells; the summary provides counts and
+    # first occurrences, the games only their cell index
+    summary_keys = np.array([r['winning_score'] * 1024 + r['losing_score'] for r in round_scores], dtype=np.int32)
+    game_keys = winning.astype(np.int32) * 1024 + losing
+    keys = np.union1d(summary_keys, game_keys).astype(np.int32)
+    count = np.zeros(len(keys), dtype=np.int32)
+    first = np.full(len(keys), -1, dtype=np.int32)
+    if len(round_scores):
+        slots = np.searchsorted(keys, summary_keys)
+        count[slots] = [r['games'] for r in round_scores]
+        first_ids = np.array([r['first_game_id'] or 0 for r in round_scores], dtype=np.int32)
+        positions = np.searchsorted(game_ids, first_ids).clip(0, max(len(game_ids) - 1, 0))
+        found = (game_ids[positions] == first_ids) if len(game_ids) else np.zeros(len(first_ids), dtype=bool)
+        first[slots[found]] = positions[found]
+
+    return {
+        'game_id': game_ids,
+        'game_map_codes': lookup('map', [g['map'] for g in games]),
+        'game_team1_codes': lookup('team', [g['team1'] for g in games]),
+        'game_team2_codes': lookup('team', [g['team2'] for g in games]),
+        'game_team1_score': score1,
+        'game_team2_score': score2,
+        'game_description_codes': lookup('description', [g['description'] for g in games]),
+        'game_date_codes': np.array([date_index[g['match_date']] if g['match_date'] else -1 for g in games],
+                                    dtype=np.int32),
+        'game_cell': np.searchsorted(keys, game_keys).astype(np.int32),
+        'round_cell_winning': (keys // 1024).astype(np.int16),
+        'round_cell_losing': (keys % 1024).astype(np.int16),
+        'round_cell_count': count,
+        'round_cell_first': first,
+    }
+
+
+def _team_map_arrays(arrays: Dict, team_maps, date_index: Dict) -> Dict:
+    """
+    Build the arrays behind the team-level K/D grid from team_map_stats.
+
+    One entry per team per map (team and opponent, map, result, date and
+    description codes, summed kills/deaths) plus the team K/D cell table:
+    team_map_cell per entry and team_map_cell_kills / _deaths / _count.
+    """
+    def lookup(column, key):
+        index = {v: i for i, v in enumerate(arrays[f'{column}_values'].tolist())}
+        return np.array([index[t[key] or ''] for t in team_maps], dtype=np.int32)
+
+    kills = np.array([t['kills'] for t in team_maps], dtype=np.int32)
+    deaths = np.array([t['deaths'] for t in team_maps], dtype=np.int32)
+    keys, cell = np.unique(kills * 1024 + deaths, return_inverse=True)
+    return {
+        'team_map_team_codes': lookup('team', 'team'),
+        'team_map_opponent_codes': lookup('team', 'opponent'),
+        'team_map_map_codes': lookup('map', 'map'),
+        'team_map_result_codes': lookup('result', 'result'),
+        'team_map_description_codes': lookup('description', 'description'),
+        'team_map_date_codes': np.array([date_index[t['match_date']] if t['match_date'] else -1 for t in team_maps],
+                                        dtype=np.int32),
+        'team_map_kills': kills.astype(np.int16),
+        'team_map_deaths': deaths.astype(np.int16),
+        'team_map_cell': cell.astype(np.int32),
+        'team_map_cell_kills': (keys // 1024).astype(np.int16),
+        'team_map_cell_deaths': (keys % 1024).astype(np.int16),
+        'team_map_cell_count': np.bincount(cell, minlength=len(keys)).astype(np.int32),
+    }
+
+
+def _head_to_head_arrays(arrays: Dict) -> Dict:
+    """
+    Index the team-map entries for the head-to-head matrix.
+
+    h2h_team_values are the canonical team names (normalize_team_name, as
+    the team race uses, showmatch teams left out); h2h_team / h2h_opponent
+    map each team-map entry to them (-1 if left out). h2h_order lists the
+    entries by date (undated first) with their date codes in h2h_dates, so
+    a date range is one contiguous slice.
+    """
+    team_values = arrays['team_values'].tolist()
+    entry_teams = np.concatenate((arrays['team_map_team_codes'], arrays['team_map_opponent_codes']))
+    canonical = sorted({normalize_team_name(team_values[c]) for c in np.unique(entry_teams).tolist()
+                        if team_values[c]} - set(SHOWMATCH_TEAMS))
+    canonical_index = {t: i for i, t in enumerate(canonical)}
+    team_to_canonical = np.array([canonical_index.get(normalize_team_name(t), -1) if t else -1
+                                  for t in team_values], dtype=np.int32)
+
+    date_codes = arrays['team_map_date_codes']
+    order = np.argsort(date_codes, kind='stable').astype(np.int32)
+    return {
+        'h2h_team_values': np.array(canonical, dtype=str),
+        'h2h_team': team_to_canonical[arrays['team_map_team_codes']],
+        'h2h_opponent': team_to_canonical[arrays['team_map_opponent_codes']],
+        'h2h_order': order,
+        'h2h_dates': date_codes[order],
+    }
+
+
+def _first_occurrence_arrays(arrays: Dict, first_occurrences, scorigamis) -> Dict:
+    """
+    Build the first-occurrence arrays from the first_occurrences summary.
+
+    cell_first is the row index of each K/D cell's first occurrence.
+    scorigami_rows are the rows of cells that occurred exactly once, most
+    recent first (undated last); scorigami_date_keys are their negated date
+    codes, which ascend in that order, for cursor binary searches. first_date_codes /
+    first_cumulative are the dates on which new cells appeared and the
+    distinct-cell count after each.
+    """
+    ids = arrays['id']
+
+    def row_index(first_ids):
+        """Rows are in id order, so ids map to row indices by binary search."""
+        rows = np.searchsorted(ids, first_ids).clip(0, max(len(ids) - 1, 0))
+        found = ids[rows] == first_ids if len(ids) else np.zeros(len(first_ids), dtype=bool)
+        return rows, found
+
+    cell_keys = arrays['cell_kills'].astype(np.int32) * 1024 + arrays['cell_deaths']
+    keys = np.array([r['kills'] * 1024 + r['deaths'] for r in first_occurrences], dtype=np.int32)
+    rows, found = row_index(np.array([r['first_row_id'] for r in first_occurrences], dtype=np.int32))
+    cells = np.searchsorted(cell_keys, keys).clip(0, max(len(cell_keys) - 1, 0))
+    found &= cell_keys[cells] == keys if len(cell_keys) else found
+    cell_first = np.full(len(cell_keys), -1, dtype=np.int32)
+    cell_first[cells[found]] = rows[found]
+
+    scorigami_rows, found = row_index(np.array([r['first_row_id'] for r in scorigamis], dtype=np.int32))
+    scorigami_rows = scorigami_rows[found].astype(np.int32)
+
+    first_dates = arrays['date_codes'][cell_first[cell_first >= 0]]
+    date_codes, new_cells = np.unique(first_dates[first_dates >= 0], return_counts=True)
+    return {
+        'cell_first': cell_first,
+        'scorigami_rows': scorigami_rows,
+        'scorigami_date_keys': -arrays['date_codes'][scorigami_rows],
+        'first_date_codes': date_codes.astype(np.int32),
+        'first_cumulative': np.cumsum(new_cells).astype(np.int32),
+    }
+
+
+def cumulative_series(entity, date, kills, deaths, n_entities):
+    """
+    Build cumulative kills/deaths per entity over the dates they played.
+
+    Args:
+        entity, date: Row-aligned entity index and date code arrays
+        kills, deaths: Row-aligned stat arrays
+        n_entities: Number of entities (rows of the output matrices)
+
+    Returns:
+        Tuple of (date_codes, cum_kills, cum_deaths) where the matrices are
+        (entities x dates) int32 running totals
+    """
+    dates, date_idx = np.unique(date, return_inverse=True)
+    daily_kills = np.zeros((n_entities, len(dates)), dtype=np.int32)
+    daily_deaths = np.zeros((n_entities, len(dates)), dtype=np.int32)
+    np.add.at(daily_kills, (entity, date_idx), kills)
+    np.add.at(daily_deaths, (entity, date_idx), deaths)
+    return (dates.astype(np.int32),
+            np.cumsum(daily_kills, axis=1, dtype=np.int32),
+            np.cumsum(daily_deaths, axis=1, dtype=np.int32))
+
+
+def race_series_json(names, date_values, cum_kills, cum_deaths):
+    """Turn (entities x dates) cumulative matrices into the race chart's per-date dicts."""
+    # One transpose + tolist per matrix; each date's column is then a ready list
+    kd_by_date = (cum_kills - cum_deaths).T.tolist()
+    kills_by_date = cum_kills.T.tolist()
+    date_data = {date: dict(zip(names, kd)) for date, kd in zip(date_values, kd_by_date)}
+    kills_data = {date: dict(zip(names, kills)) for date, kills in zip(date_values, kills_by_date)}
+    return date_data, kills_data
+
+
+def _first_last_dates(entity, date, n_entities):
+    """Get each entity's first and last date code (-1 if it never played)."""
+    first = np.full(n_entities, np.iinfo(np.int32).max, dtype=np.int32)
+    last = np.full(n_entities, -1, dtype=np.int32)
+    np.minimum.at(first, entity, date)
+    np.maximum.at(last, entity, date)
+    first[last < 0] = -1
+    return first, last
+
+
+def _race_arrays(arrays: Dict) -> Dict:
+    """
+    Precompute the K-D race chart series for players and teams.
+
+    Players: the RACE_TRACK_PLAYERS players with the most maps, with their
+    most recent (canonical) team. Teams: canonical team names with at least
+    RACE_MIN_TEAM_MAPS player-map rows, excluding showmatch teams. Rows
+    without a match date count towards totals but not the series.
+    """
+    player_codes = arrays['player_codes']
+    date_codes = arrays['date_codes']
+    kills = arrays['kills'].astype(np.int32)
+    deaths = arrays['deaths'].astype(np.int32)
+    dated = date_codes >= 0
+    out = {}
+
+    # Players
+    n_players = len(arrays['player_values'])
+    maps_played = np.bincount(player_codes, minlength=n_players)
+    tracked = np.argsort(-maps_played, kind='stable')[:RACE_TRACK_PLAYERS]
+    tracked = tracked[maps_played[tracked] > 0].astype(np.int32)
+    slot = np.full(n_players, -1, dtype=np.int32)
+    slot[tracked] = np.arange(len(tracked), dtype=np.int32)
+
+    rows = np.flatnonzero((slot[player_codes] >= 0) & dated)
+    race_dates, cum_kills, cum_deaths = cumulative_series(
+        slot[player_codes[rows]], date_codes[rows], kills[rows], deaths[rows], len(tracked))
+    first, last = _first_last_dates(slot[player_codes[rows]], date_codes[rows], len(tracked))
+
+    # Most recent team: the last row (by date, then id) that has a team
+    team_values = arrays['team_values'].tolist()
+    with_team = rows[arrays['team_codes'][rows] != (team_values.index('') if '' in team_values else -1)]
+    with_team = with_team[np.lexsort((arrays['id'][with_team], date_codes[with_team]))]
+    recent_team = [''] * len(tracked)
+    for i in with_team.tolist():
+        recent_team[slot[player_codes[i]]] = normalize_team_name(team_values[arrays['team_codes'][i]])
+
+    out['race_player_codes'] = tracked
+    out['race_player_maps'] = maps_played[tracked].astype(np.int32)
+    out['race_player_total_kills'] = np.bincount(player_codes, weights=kills, minlength=n_players)[tracked].astype(np.int32)
+    out['race_player_total_deaths'] = np.bincount(player_codes, weights=deaths, minlength=n_players)[tracked].astype(np.int32)
+    out['race_player_first'] = first
+    out['race_player_last'] = last
+    out['race_player_team'] = np.array(recent_team, dtype=str)
+    out['race_player_dates'] = race_dates
+    out['race_player_cum_kills'] = cum_kills
+    out['race_player_cum_deaths'] = cum_deaths
+
+    # Teams, by canonical name
+    canonical = sorted({normalize_team_name(t) for t in team_values if t})
+    canonical_index = {t: i for i, t in enumerate(canonical)}
+    team_to_canonical = np.array([canonical_index[normalize_team_name(t)] if t else -1 for t in team_values],
+                                 dtype=np.int32)
+    row_team = team_to_canonical[arrays['team_codes']] if len(team_values) else np.zeros(0, dtype=np.int32)
+    has_team = row_team >= 0
+    team_maps = np.bincount(row_team[has_team], minlength=len(canonical))
+    valid = [i for i in range(len(canonical))
+             if team_maps[i] >= RACE_MIN_TEAM_MAPS and canonical[i] not in SHOWMATCH_TEAMS]
+    valid.sort(key=lambda i: (-team_maps[i], canonical[i]))
+    team_slot = np.full(len(canonical) + 1, -1, dtype=np.int32)
+    team_slot[valid] = np.arange(len(valid), dtype=np.int32)
+
+    rows = np.flatnonzero(has_team & dated)
+    rows = rows[team_slot[row_team[rows]] >= 0]
+    race_dates, cum_kills, cum_deaths = cumulative_series(
+        team_slot[row_team[rows]], date_codes[rows], kills[rows], deaths[rows], len(valid))
+    first, last = _first_last_dates(team_slot[row_team[rows]], date_codes[rows], len(valid))
+
+    out['race_team_values'] = np.array([canonical[i] for i in valid], dtype=str)
+    out['race_team_maps'] = team_maps[valid].astype(np.int32) if valid else np.zeros(0, dtype=np.int32)
+    out['race_team_first'] = first
+    out['race_team_last'] = last
+    out['race_team_dates'] = race_dates
+    out['race_team_cum_kills'] = cum_kills
+    out['race_team_cum_deaths'] = cum_deaths
+    return out
+
+
+def _mmap_npz(path: str) -> Dict[str, np.ndarray]:
+    """
+    Memory-map every array in an uncompressed .npz.
+
+    np.load() ignores mmap_mode for .npz archives, but np.savez stores
+    members uncompressed, so each .npy payload sits at a fixed offset in the
+    file and can be mapped directly. Pages are then shared through the page
+    cache by every process that maps the file.
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as zf, open(path, 'rb') as f:
+        for info in zf.infolist():
+            name = info.filename[:-4] if info.filename.endswith('.npy') else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                arrays[name] = np.load(zf.open(info))
+                continue
+
+            # Skip the local file header to reach the .npy payload
+            f.seek(info.header_offset)
+            header = f.read(30)
+            name_len, extra_len = struct.unpack('<HH', header[26:30])
+            f.seek(info.header_offset + 30 + name_len + extra_len)
+
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+
+            if dtype.hasobject or not shape or 0 in shape:
+                # Scalars and empty arrays can't be mapped - just read them
+                arrays[name] = np.fromfile(f, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+                continue
+
+            arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=f.tell(), shape=shape,
+                                     order='F' if fortran_order else 'C')
+    return arrays
+
+
+class Snapshot:
+    """Read-only view over a memory-mapped snapshot file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.arrays = _mmap_npz(path)
+        self.generation = int(self.arrays['generation'])
+        self.size = len(self.arrays['id'])
+        self._lookups = {}
+        self._masks = OrderedDict()
+        self._substring_codes = OrderedDict()
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__['arrays'][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def values(self, column: str) -> list:
+        """Get the vocabulary of a dictionary-encoded column as Python strings."""
+        key = ('values', column)
+        if key not in self._lookups:
+            self._lookups[key] = self.arrays[f'{column}_values'].tolist()
+        return self._lookups[key]
+
+    def value_set(self, column: str) -> frozenset:
+        """Get the vocabulary of a dictionary-encoded column as a set, for membership tests."""
+        key = ('set', column)
+        if key not in self._lookups:
+            self._lookups[key] = frozenset(self.values(column))
+        return self._lookups[key]
+
+    def code(self, column: str, value: str) -> int:
+        """Get the code for a value of a dictionary-encoded column (-1 if absent)."""
+        key = ('index', column)
+        if key not in self._lookups:
+            self._lookups[key] = {v: i for i, v in enumerate(self.values(column))}
+        return self._lookups[key].get(value, -1)
+
+    def warm(self):
+        """
+        Build every vocabulary lookup now.
+
+        Called in the gunicorn master before forking so workers inherit the
+        lookups instead of each building their own copy.
+        """
+        for column in STRING_COLUMNS + ('date',):
+            self.code(column, '')
+        for column in ('player', 'team', 'map'):
+            self._prefix_index(column)
+        return self
+
+    def _prefix_index(self, column: str):
+        """
+        Case-folded sort of a column's non-empty values, for prefix lookups:
+        (folded keys, codes in that order, row count per code).
+        """
+        key = ('prefix', column)
+        if key not in self._lookups:
+            values = self.values(column)
+            order = sorted((v.casefold(), i) for i, v in enumerate(values) if v)
+            counts = np.bincount(self.arrays[f'{column}_codes'], minlength=len(values))
+            self._lookups[key] = ([k for k, _ in order], np.array([i for _, i in order], dtype=np.int32), counts)
+        return self._lookups[key]
+
+    def sorted_values(self, column: str) -> list:
+        """Non-empty values of a dictionary-encoded column in case-insensitive order."""
+        _, codes, _ = self._prefix_index(column)
+        values = self.values(column)
+        return [values[c] for c in codes.tolist()]
+
+    def suggest(self, column: str, prefix: str, limit: int = 10) -> list:
+        """
+        Values of a column starting with prefix (case-insensitive), most
+        frequent first. Two binary searches find the matching range of the
+        sorted index; only that range is ranked.
+        """
+        keys, codes, counts = self._prefix_index(column)
+        folded = prefix.casefold()
+        lo = bisect.bisect_left(keys, folded)
+        hi = bisect.bisect_left(keys, folded + '\U0010ffff') if folded else len(keys)
+        matches = codes[lo:hi]
+        if len(matches) > limit:
+            matches = matches[np.argpartition(-counts[matches], limit - 1)[:limit]]
+        values = self.values(column)
+        matches = sorted(matches.tolist(), key=lambda c: (-counts[c], values[c].casefold()))
+        return [values[c] for c in matches]
+
+    def _postings(self, column: str):
+        """Row indices grouped by code: (rows sorted by code, start offset per code)."""
+        key = ('postings', column)
+        if key not in self._lookups and f'{column}_rows' in self.arrays:
+            self._lookups[key] = (self.arrays[f'{column}_rows'], self.arrays[f'{column}_starts'])
+        if key not in self._lookups:
+            codes = self.arrays[f'{column}_codes']
+            order = np.argsort(codes, kind='stable').astype(np.int32)
+            counts = np.bincount(codes, minlength=len(self.values(column)))
+            starts = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+            self._lookups[key] = (order, starts)
+        return self._lookups[key]
+
+    def rows_of(self, column: str, value: str) -> np.ndarray:
+        """Row indices (in id order) whose column equals value, from the posting lists."""
+        code = self.code(column, value)
+        if code < 0:
+            return np.array([], dtype=np.int32)
+        order, starts = self._postings(column)
+        return order[starts[code]:starts[code + 1]]
+
+    def values_mask(self, column: str, codes) -> np.ndarray:
+        """
+        Boolean row mask for rows whose column has any of the given codes.
+
+        Built from the column's posting lists (no full-column compare) and
+        cached, so repeated filters cost one lookup. Treat it as read-only.
+        """
+        key = (column, tuple(sorted(set(codes))))
+        mask = self._masks.get(key)
+        if mask is not None:
+            self._masks.move_to_end(key)
+            return mask
+        order, starts = self._postings(column)
+        mask = np.zeros(self.size, dtype=bool)
+        for code in key[1]:
+            if code >= 0:
+                mask[order[starts[code]:starts[code + 1]]] = True
+        self._masks[key] = mask
+        if len(self._masks) > MASK_CACHE_SIZE:
+            self._masks.popitem(last=False)
+        return mask
+
+    def codes_containing(self, column: str, needle: str) -> tuple:
+        """
+        Codes of a column's values containing needle, ignoring ASCII case
+        like SQL LIKE '%needle%'. Cached per needle, least recently used
+        dropped first like the masks.
+        """
+        key = (column, needle.translate(ASCII_LOWER))
+        codes = self._substring_codes.get(key)
+        if codes is not None:
+            self._substring_codes.move_to_end(key)
+            return codes
+        folded_key = ('ascii_lower', column)
+        if folded_key not in self._lookups:
+            self._lookups[folded_key] = [v.translate(ASCII_LOWER) for v in self.values(column)]
+        codes = tuple(i for i, v in enumerate(self._lookups[folded_key]) if key[1] in v)
+        self._substring_codes[key] = codes
+        if len(self._substring_codes) > MASK_CACHE_SIZE:
+            self._substring_codes.popitem(last=False)
+        return codes
+
+    def date_cutoff_code(self, cutoff: str) -> int:
+        """Get the highest date code on or before a YYYY-MM-DD cutoff."""
+        return int(np.searchsorted(self.arrays['date_values'], cutoff, side='right')) - 1
+
+
+_loaded = None  # (file identity, Snapshot)
+
+# Snapshot pinned for the current thread by pinned()
+_pinned = threading.local()
+
+
+def get_snapshot(path: str = SNAPSHOT_PATH) -> Optional[Snapshot]:
+    """
+    Get the current snapshot, remapping it if the file was replaced.
+
+    One stat() per call; returns None if no snapshot exists.
+    """
+    global _loaded
+    pinned_snap = getattr(_pinned, 'snap', None)
+    if pinned_snap is not None and pinned_snap.path == path:
+        return pinned_snap
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    key = (path, st.st_ino, st.st_mtime_ns, st.st_size)
+    if _loaded is None or _loaded[0] != key:
+        _loaded = (key, Snapshot(path))
+    return _loaded[1]
+
+
+@contextmanager
+def pinned(snap: Snapshot):
+    """
+    Make get_snapshot() return snap in this thread until the block exits,
+    so several queries see one data version even if the file is replaced.
+    """
+    previous = getattr(_pinned, 'snap', None)
+    _pinned.snap = snap
+    try:
+        yield snap
+    finally:
+        _pinned.snap = previous
+
+
+def ensure_snapshot(path: str = SNAPSHOT_PATH) -> Snapshot:
+    """
+    Load the snapshot, (re)exporting it first if it is missing or was built
+    from an older data generation than the published database.
+    """
+    snap = get_snapshot(path)
+    if snap is None or snap.generation != database.current_generation():
+        export_snapshot(path)
+        snap = get_snapshot(path)
+    return snap
+
+
+if __name__ == '__main__':
+    info = export_snapshot()
+    print(f"Wrote {SNAPSHOT_PATH}: {info['rows']} rows, {info['cells']} cells (generation {info['generation']})")
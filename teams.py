@@ -0,0 +1,285 @@
+"""
+VCT Team Names Module
+Canonical team names, brand colors and race-chart event bands shared by the
+web app and the snapshot export.
+"""
+import re
+
+# Team name mapping - maps alternate names to canonical name
+TEAM_NAME_MAPPING = {
+    'VISA KRÜ': 'KRÜ Esports',
+    'VISA KRÜ(KRÜ Esports)': 'KRÜ Esports',
+    'KRÜ Esports': 'KRÜ Esports',
+    'LEVIATÁN': 'Leviatán',
+    'LOUD': 'LOUD',
+    'FURIA': 'FURIA',
+    'FURIA Esports': 'FURIA',
+    'MIBR': 'MIBR',
+    'MIBR Esports': 'MIBR',
+    '100 Thieves': '100 Thieves',
+    '100T': '100 Thieves',
+    'Cloud9': 'Cloud9',
+    'C9': 'Cloud9',
+    'Evil Geniuses': 'Evil Geniuses',
+    'EG': 'Evil Geniuses',
+    'G2 Esports': 'G2 Esports',
+    'G2': 'G2 Esports',
+    'NRG Esports': 'NRG',
+    'NRG': 'NRG',
+    'Sentinels': 'Sentinels',
+    'SEN': 'Sentinels',
+    'FNATIC': 'FNATIC',
+    'FNC': 'FNATIC',
+    'FUT Esports': 'FUT Esports',
+    'FUT': 'FUT Esports',
+    'Guild Esports': 'Guild Esports',
+    'GUILD': 'Guild Esports',
+    'Team Liquid': 'Team Liquid',
+    'TL': 'Team Liquid',
+    'Team Vitality': 'Team Vitality',
+    'Vitality': 'Team Vitality',
+    'NaVi': 'Natus Vincere',
+    'Natus Vincere': 'Natus Vincere',
+    'NAVI': 'Natus Vincere',
+    'Fnatic': 'FNATIC',
+    'Paper Rex': 'Paper Rex',
+    'PRX': 'Paper Rex',
+    'DRX': 'DRX',
+    'DRX (V/S Gaming)': 'DRX',
+    'Dragon Ranger Gaming': 'Dragon Ranger Gaming',
+    'DRG': 'Dragon Ranger Gaming',
+    'ZETA DIVISION': 'ZETA DIVISION',
+    'ZETA': 'ZETA DIVISION',
+    'DetonatioN FocusMe': 'DetonatioN FocusMe',
+    'DFM': 'DetonatioN FocusMe',
+    'T1': 'T1',
+    'Gen.G': 'Gen.G',
+    'GenG': 'Gen.G',
+    'RRQ': 'Rex Regum Qeon',
+    'Rex Regum Qeon': 'Rex Regum Qeon',
+    'Talon Esports': 'TALON',
+    'TALON': 'TALON',
+    'TLN': 'TALON',
+    'Team Secret': 'Team Secret',
+    'TS': 'Team Secret',
+    'Global Esports': 'Global Esports',
+    'GE': 'Global Esports',
+    'BLEED': 'BLEED',
+    'Team BLEED': 'BLEED',
+    'Edward Gaming': 'Edward Gaming',
+    'EDG': 'Edward Gaming',
+    'FunPlus Phoenix': 'FunPlus Phoenix',
+    'FPX': 'FunPlus Phoenix',
+    'Bilibili Gaming': 'Bilibili Gaming',
+    'BG': 'Bilibili Gaming',
+    'Trace Esports': 'Trace Esports',
+    'TE': 'Trace Esports',
+    'JDG Gaming': 'JDG Esports',
+    'JDG Esports': 'JDG Esports',
+    'JDG': 'JDG Esports',
+    'Titan FC': 'Titan Esports Club',
+    'Titan Esports Club': 'Titan Esports Club',
+    'XLG': 'Xi Lai Gaming',
+    'Xi Lai Gaming': 'Xi Lai Gaming',
+    'Wolves Esports': 'Wolves Esports',
+    'WO': 'Wolves Esports',
+    'Nova Esports': 'Nova Esports',
+    'NOVA': 'Nova Esports',
+    'Attack All Around': 'Attack All Around',
+    'AAA': 'Attack All Around',
+    'ONIC G': 'ONIC G',
+    'ONIC': 'ONIC G',
+    'Alter Ego': 'Alter Ego',
+    'AE': 'Alter Ego',
+    'BOOM Esports': 'BOOM Esports',
+    'BOOM': 'BOOM Esports',
+    'Rise': 'Rise',
+    'XSET': 'XSET',
+    'The Guard': 'The Guard',
+    'Guard': 'The Guard',
+    'OpTic Gaming': 'OpTic Gaming',
+    'OpTic': 'OpTic Gaming',
+    'Optic': 'OpTic Gaming',
+    'Version1': 'Version1',
+    'V1': 'Version1',
+    'Gambit Esports': 'Gambit Esports',
+    'Gambit': 'Gambit Esports',
+    'Masters Seoul': 'Masters Seoul',
+    'Acend': 'Acend',
+    'ACE': 'Acend',
+    'SuperMassive Blaze': 'SuperMassive Blaze',
+    'SMB': 'SuperMassive Blaze',
+    'Oxygen Esports': 'Oxygen Esports',
+    'OXG': 'Oxygen Esports',
+    'G store in': 'G store in',
+    'G2 Gozen': 'G2 Gozen',
+    'GUILD EK': 'GUILD EK',
+    'FOKUS': 'FOKUS',
+    'FOKUS ME': 'FOKUS',
+    'Heretics': 'Team Heretics',
+    'Team Heretics': 'Team Heretics',
+    'TH': 'Team Heretics',
+    'KOI': 'KOI',
+    'Giants': 'Giants',
+    'GIANTX': 'Giants',
+    'GiantX': 'Giants',
+    'Giants Gaming': 'Giants',
+    'Vodafone Giants': 'Giants',
+    'BBL Esports': 'BBL Esports',
+    'BBL': 'BBL Esports',
+    'Fire Flux Esports': 'Fire Flux Esports',
+    'Fire Flux': 'Fire Flux Esports',
+    'S2V Esports': 'S2V Esports',
+    'S2V': 'S2V Esports',
+    'Case Esports': 'Case Esports',
+    'CASE': 'Case Esports',
+    'M3 Champions': 'M3 Champions',
+    'M3C': 'M3 Champions',
+    'LDLC OL': 'LDLC OL',
+    'LDLC': 'LDLC OL',
+    'Funplus Phoenix': 'FunPlus Phoenix',
+    'Liquid': 'Team Liquid',
+    'Navi': 'Natus Vincere',
+    'Secret': 'Team Secret',
+    'Talon': 'TALON',
+    'Rex Regum': 'Rex Regum Qeon',
+    'Paper': 'Paper Rex',
+    'DetonatioN': 'DetonatioN FocusMe',
+    'Edward': 'Edward Gaming',
+    'Bilibili': 'Bilibili Gaming',
+    'Wolves': 'Wolves Esports',
+    'TYLOO': 'TYLOO',
+    'TyLoo': 'TYLOO',
+    'Karmine Corp': 'Karmine Corp',
+    'KC': 'Karmine Corp',
+    'Gentle Mates': 'Gentle Mates',
+    'All Gamers': 'All Gamers',
+    'AG': 'All Gamers',
+    'Nongshim RedForce': 'Nongshim RedForce',
+    'NS': 'Nongshim RedForce',
+    '2Game Esports': '2Game Esports',
+    'Apeks': 'Apeks',
+}
+
+# Team brand colors (keyed by canonical name)
+TEAM_COLORS = {
+    'Paper Rex': '#FF69B4',           # Pink
+    'FNATIC': '#FF6B00',              # Orange
+    'Edward Gaming': '#FFFFFF',       # White
+    'DRX': '#003366',                 # Dark Blue
+    'Gen.G': '#FFD700',               # Gold
+    'Team Heretics': '#FFFF00',       # Yellow
+    'Sentinels': '#FF0000',           # Red
+    'T1': '#DC143C',                  # Red (slightly darker crimson)
+    'Team Liquid': '#0066CC',         # Blue
+    'G2 Esports': '#FF6B6B',          # Light Red
+    'NRG': '#FF8C00',                 # Orange (darker than FNATIC)
+    'Leviatán': '#87CEEB',            # Light Blue
+    'Bilibili Gaming': '#ADD8E6',     # Light Blue (slightly different)
+    'LOUD': '#00FF00',                # Green
+    'FUT Esports': '#808080',         # Grey
+    'Rex Regum Qeon': '#DAA520',      # Gold (slightly darker than Gen.G)
+    'Natus Vincere': '#FFD700',       # Yellow
+    'Evil Geniuses': '#20B2AA',       # Blueish Green
+    'Team Vitality': '#FFCC00',       # Yellow (slightly different)
+    '100 Thieves': '#B22222',         # Red (firebrick)
+    'KRÜ Esports': '#FF69B4',         # Pink
+    'MIBR': '#4169E1',                # Blue
+    'Cloud9': '#87CEEB',              # Light Blue
+    'Karmine Corp': '#1E90FF',        # Blue
+    'FunPlus Phoenix': '#FF4500',     # Red (orange-red)
+    'Trace Esports': '#FFFFFF',       # White
+    'Dragon Ranger Gaming': '#228B22',# Green (forest)
+    'TALON': '#FF4444',               # Red (bright)
+    'Team Secret': '#FFFFFF',         # White
+    'BBL Esports': '#FFD700',         # Gold
+    'ZETA DIVISION': '#FFFFFF',       # White
+    'Giants': '#9370DB',              # Any - purple
+    'FURIA': '#FF8C00',               # Any - orange
+    'DetonatioN FocusMe': '#0000CD',  # Blue (medium)
+    'TYLOO': '#8B0000',               # Dark Red
+    'Global Esports': '#00CED1',      # Any - dark turquoise
+    'KOI': '#4169E1',                 # Blue
+    'Wolves Esports': '#FFD700',      # Gold
+    'Nova Esports': '#800080',        # Purple
+    'JDG Esports': '#FF0000',         # Red
+    'Titan Esports Club': '#708090',  # Any - slate gray
+    'Xi Lai Gaming': '#32CD32',       # Green
+    'Gentle Mates': '#FFB6C1',        # Pink (light)
+    'All Gamers': '#FF0000',          # Red
+    'Nongshim RedForce': '#CC0000',   # Red
+    'Giants Gaming': '#BA55D3',       # Any - medium orchid
+    'BOOM Esports': '#8B0000',        # Dark Red
+    'BLEED': '#9932CC',               # Any - dark orchid
+    'Apeks': '#FFA500',               # Orange
+    '2Game Esports': '#8B008B',       # Purple (dark magenta)
+    # Additional teams
+    'XSET': '#800080',                # Purple
+    'OpTic Gaming': '#00FF00',        # Green
+    'The Guard': '#FFD700',           # Gold
+    'Version1': '#FF0000',            # Red
+    'Gambit Esports': '#FF0000',      # Red
+    'Acend': '#00FFFF',               # Cyan
+    'G2 Gozen': '#FF69B4',            # Pink
+    'Guild Esports': '#00FF00',       # Green
+    'SuperMassive Blaze': '#FF4500',  # Orange Red
+    'Oxygen Esports': '#00FFFF',      # Cyan
+    'Attack All Around': '#FFD700',   # Gold
+    'ONIC G': '#FFD700',              # Gold
+    'Alter Ego': '#FF0000',           # Red
+    'Rise': '#FFD700',                # Gold
+}
+
+# Showmatch/exhibition teams to exclude (these are not real competitive teams)
+SHOWMATCH_TEAMS = {
+    'Team tarik',
+    'Team Alpha',
+    'Team EMEA',
+    'Team SuperBusS',
+    'Team FRTTT',
+    'Team Toast',
+    'Glory Once Again',
+    'Team Omega',
+    'Team France',
+    'Team World',
+    'Team Bunny',
+}
+
+# Tournament dates (Masters, Champions, LOCK//IN) shaded on the race charts
+RACE_TOURNAMENTS = [
+    # LOCK//IN event (green background)
+    {'name': 'LOCK//IN 2023', 'start': '2023-02-13', 'end': '2023-03-04', 'type': 'lockin'},
+    # Champions events (yellow background)
+    {'name': 'Champions 2023', 'start': '2023-08-06', 'end': '2023-08-26', 'type': 'champions'},
+    {'name': 'Champions 2024', 'start': '2024-08-01', 'end': '2024-08-25', 'type': 'champions'},
+    {'name': 'Champions 2025', 'start': '2025-09-12', 'end': '2025-10-05', 'type': 'champions'},
+    {'name': 'Champions 2026', 'start': '2026-09-23', 'end': '2026-10-18', 'type': 'champions'},
+    # Masters events (purple background)
+    {'name': 'Masters Tokyo 2023', 'start': '2023-06-10', 'end': '2023-06-25', 'type': 'masters'},
+    {'name': 'Masters Madrid 2024', 'start': '2024-03-14', 'end': '2024-03-24', 'type': 'masters'},
+    {'name': 'Masters Shanghai 2024', 'start': '2024-05-23', 'end': '2024-06-09', 'type': 'masters'},
+    {'name': 'Masters Bangkok 2025', 'start': '2025-02-20', 'end': '2025-03-02', 'type': 'masters'},
+    {'name': 'Masters Toronto 2025', 'start': '2025-06-07', 'end': '2025-06-22', 'type': 'masters'},
+    {'name': 'Masters Santiago 2026', 'start': '2026-02-28', 'end': '2026-03-15', 'type': 'masters'},
+    {'name': 'Masters London 2026', 'start': '2026-06-05', 'end': '2026-06-21', 'type': 'masters'},
+]
+
+
+def normalize_team_name(team_name):
+    """Normalize team name by mapping to canonical name and extracting from parentheses."""
+    if not team_name:
+        return team_name
+    
+    # Check if it's in our mapping
+    if team_name in TEAM_NAME_MAPPING:
+        return TEAM_NAME_MAPPING[team_name]
+    
+    # Try to extract name from parentheses like "VISA KRÜ(KRÜ Esports)"
+    match = re.search(r'\(([^)]+)\)', team_name)
+    if match:
+        extracted = match.group(1)
+        if extracted in TEAM_NAME_MAPPING:
+            return TEAM_NAME_MAPPING[extracted]
+        return extracted
+    
+    return team_name
@@ -0,0 +1,46 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+
+
+def map_rows(match_id, map_name, date='2024-01-01', winner_score=13, loser_score=11,
+             kills=(20, 18, 15, 12, 10), event='Test Event', teams=('Alpha', 'Bravo'), **extra):
+    """
+    Player rows of one scraped map: five players a side, each team's kills
+    matching the other's deaths (the winner's kills are the loser's deaths).
+    """
+    rows = []
+    for side, (team, opponent) in enumerate((teams, teams[::-1])):
+        won = side == 0
+        for i, k in enumerate(kills):
+            rows.append({
+                'description': f"{event} - {teams[0]} vs {teams[1]}",
+                'event': event,
+                'map': map_name,
+                'player': f"{team}{i}",
+                'kills': k if won else kills[-1 - i] - 1,
+                'deaths': kills[-1 - i] - 1 if won else k,
+                'match_date': date,
+                'result': 'Win' if won else 'Loss',
+                'team': team,
+                'tournament_id': 1,
+                'match_id': match_id,
+                'team_score': winner_score if won else loser_score,
+                'opponent_score': loser_score if won else winner_score,
+                **extra,
+            })
+    return rows
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A fresh database (and snapshot path) in a temporary directory."""
+    monkeypatch.chdir(tmp_path)
+    database.init_db()
+    yield tmp_path
+    database.reset_read_connection()
@@ -0,0 +1,79 @@
+import importlib
+
+import pytest
+
+import database
+import snapshot
+from conftest import map_rows
+
+
+@pytest.fixture(scope='module')
+def client(tmp_path_factory):
+    """Test client over a small database and its snapshot."""
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.chdir(tmp_path_factory.mktemp('batch'))
+        database.init_db()
+        database.add_matches_batch(map_rows('1', 'Bind', date='2024-01-01'))
+        database.add_matches_batch(map_rows('2', 'Haven', date='2024-01-02', kills=(25, 20, 15, 10, 5)))
+        snapshot.export_snapshot()
+        app = importlib.import_module('app')
+        yield app.app.test_client()
+        database.reset_read_connection()
+
+
+def batch(client, body):
+    response = client.post('/api/batch', json=body)
+    return response.status_code, response.get_json()
+
+
+@pytest.mark.parametrize('body', [
+    ['not', 'an', 'object'],
+    {'queries': []},
+    {'queries': {'type': 'recent'}},
+    {'queries': ['recent']},
+    {'queries': [{'type': 'recent'}] * 100},
+])
+def test_malformed_bodies_are_rejected(client, body):
+    status, payload = batch(client, body)
+    assert status == 400
+    assert 'error' in payload
+
+
+def test_non_json_body_is_rejected(client):
+    response = client.post('/api/batch', data='queries', content_type='text/plain')
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('query, error', [
+    ({'type': 'recent', 'params': ['limit', 5]}, '"params" must be an object'),
+    ({'type': 'recent', 'params': {'before': 5}}, '"before" must be a string'),
+    ({'type': 'team-grid', 'params': {'before': ['2024-01-01']}}, '"before" must be a string'),
+    ({'type': 'leaderboards', 'params': {'around': {'player': 'Alpha0'}}}, '"around" must be a string'),
+    ({'type': 'recent', 'params': {'limit': 'many'}}, None),
+    ({'type': 'cell', 'params': {'kills': 20}}, "Missing parameter 'deaths'"),
+    ({'type': 'nope'}, "Unknown query type 'nope'"),
+])
+def test_bad_sub_queries_fail_on_their_own(client, query, error):
+    status, payload = batch(client, {'queries': [dict(query, name='bad'), {'name': 'ok', 'type': 'recent'}]})
+    assert status == 200
+    assert 'error' in payload['results']['bad']
+    if error:
+        assert payload['results']['bad']['error'] == error
+    assert 'recent_scorigamis' in payload['results']['ok']
+
+
+def test_recent_pages_follow_the_cursor(client):
+    seen = []
+    before = None
+    while True:
+        status, payload = batch(client, {'queries': [{'name': 'r', 'type': 'recent',
+                                                      'params': {'limit': 3, 'before': before}}]})
+        assert status == 200
+        page = payload['results']['r']
+        seen += [row['id'] for row in page['recent_scorigamis']]
+        before = page['recent_cursor']
+        if not before:
+            break
+    status, payload = batch(client, {'queries': [{'name': 'r', 'type': 'recent', 'params': {'limit': 500}}]})
+    assert len(seen) > 3
+    assert seen == [row['id'] for row in payload['results']['r']['recent_scorigamis']]
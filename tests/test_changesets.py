@@ -0,0 +1,71 @@
+import shutil
+import sqlite3
+
+import changesets
+import database
+from conftest import map_rows
+
+COMPARED_TABLES = ('series', 'games', 'matches', 'quarantined_maps',
+                   'round_scores', 'team_map_stats', 'first_occurrences')
+
+
+def dump(path):
+    """Every compared table's rows, leaving out insert timestamps."""
+    conn = sqlite3.connect(path)
+    try:
+        tables = {}
+        for table in COMPARED_TABLES:
+            columns = [row[1] for row in conn.execute(f'PRAGMA table_info({table})') if row[1] != 'created_at']
+            tables[table] = sorted(conn.execute(f'SELECT {", ".join(columns)} FROM {table}'), key=repr)
+        return tables
+    finally:
+        conn.close()
+
+
+def quarantined(match_id, map_name, **kwargs):
+    rows = map_rows(match_id, map_name, **kwargs)
+    rows[0]['kills'] += 1
+    return rows
+
+
+def test_refetch_fills_series_and_games_and_logs_the_fill(db):
+    database.add_matches_batch(map_rows('1', 'Bind', date=None, winner_score=None, loser_score=None,
+                                        tournament_id=None))
+    database.add_matches_batch(map_rows('1', 'Bind', date='2024-01-01'))
+
+    conn = database.get_db_connection()
+    try:
+        series = conn.execute('SELECT tournament_id, match_date, event FROM series').fetchone()
+        game = conn.execute('SELECT team1_score, team2_score, winner FROM games').fetchone()
+        assert tuple(series) == (1, '2024-01-01', 'Test Event')
+        assert tuple(game) == (13, 11, 'Alpha')
+        assert conn.execute('SELECT COUNT(*) FROM series_updates').fetchone()[0] == 1
+        assert conn.execute('SELECT COUNT(*) FROM game_updates').fetchone()[0] == 1
+    finally:
+        conn.close()
+
+
+def test_replay_rebuilds_the_same_database(db, tmp_path_factory, monkeypatch):
+    database.add_matches_batch(map_rows('1', 'Bind', date=None, winner_score=None, loser_score=None,
+                                        tournament_id=None))
+    database.add_matches_batch(quarantined('2', 'Haven'))
+    changesets.write_changeset()
+
+    # In-place fills, a quarantine cleared and a new one
+    database.add_matches_batch(map_rows('1', 'Bind', date='2024-01-01'))
+    database.add_matches_batch(map_rows('2', 'Haven', date='2024-01-02', winner_score=14, loser_score=12))
+    database.add_matches_batch(quarantined('3', 'Lotus'))
+    changesets.write_changeset()
+    assert changesets.write_changeset() is None
+
+    original = dump(db / database.DB_PATH)
+    replay_dir = tmp_path_factory.mktemp('replay')
+    shutil.copytree(db / changesets.CHANGESET_DIR, replay_dir / changesets.CHANGESET_DIR)
+    monkeypatch.chdir(replay_dir)
+    database.reset_read_connection()
+    changesets.rebuild()
+
+    assert dump(replay_dir / database.DB_PATH) == original
+    assert [row[1] for row in original['quarantined_maps']] == ['3']
+    # Replay leaves the bookkeeping caught up, so there's nothing to write
+    assert changesets.write_changeset() is None
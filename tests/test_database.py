@@ -0,0 +1,31 @@
+import database
+from conftest import map_rows
+
+
+def test_validate_map_accepts_balanced_map():
+    assert database.validate_map(map_rows('1', 'Bind')) is None
+
+
+def test_validate_map_reports_kill_death_mismatch():
+    rows = map_rows('1', 'Bind')
+    rows[0]['kills'] += 1
+    assert database.validate_map(rows) == 'Alpha kills (76) != Bravo deaths (75)'
+
+
+def test_validate_map_reports_team_shape():
+    rows = map_rows('1', 'Bind')
+    assert database.validate_map(rows[:9]) == 'expected 10 players, found 9'
+    assert database.validate_map(rows[:5]) == 'expected 2 teams, found 1'
+    rows[4]['team'] = 'Bravo'
+    assert database.validate_map(rows) == 'Alpha has 4 players'
+
+
+def test_invalid_map_is_quarantined_until_it_passes(db):
+    rows = map_rows('1', 'Bind')
+    rows[0]['kills'] += 1
+    assert database.add_matches_batch(rows) == (0, 10)
+    assert [(q['match_id'], q['map']) for q in database.get_quarantined_maps()] == [('1', 'Bind')]
+    assert database.get_total_matches() == 0
+
+    assert database.add_matches_batch(map_rows('1', 'Bind')) == (10, 0)
+    assert database.get_quarantined_maps() == []
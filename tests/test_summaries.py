@@ -0,0 +1,34 @@
+import database
+from conftest import map_rows
+
+
+def summaries():
+    conn = database.get_db_connection()
+    try:
+        return {
+            'round_scores': conn.execute('SELECT * FROM round_scores ORDER BY winning_score, losing_score').fetchall(),
+            'team_map_stats': conn.execute('SELECT * FROM team_map_stats ORDER BY match_id, map, team').fetchall(),
+            'first_occurrences': conn.execute('SELECT * FROM first_occurrences ORDER BY kills, deaths').fetchall(),
+        }
+    finally:
+        conn.close()
+
+
+def as_tuples(tables):
+    return {name: [tuple(row) for row in rows] for name, rows in tables.items()}
+
+
+def test_incremental_summaries_match_full_rebuild(db):
+    # Undated and unscored first fetches, later filled in; repeated and
+    # unique round scores; a map added to an existing series
+    database.add_matches_batch(map_rows('1', 'Bind', date=None, winner_score=None, loser_score=None))
+    database.add_matches_batch(map_rows('2', 'Haven', date='2024-02-01', kills=(25, 20, 15, 10, 5)))
+    database.add_matches_batch(map_rows('3', 'Ascent', date='2024-01-15', winner_score=14, loser_score=12))
+    database.add_matches_batch(map_rows('1', 'Bind', date='2024-01-01'))
+    database.add_matches_batch(map_rows('2', 'Lotus', date='2024-02-01', winner_score=13, loser_score=3,
+                                        teams=('Bravo', 'Alpha')))
+    incremental = as_tuples(summaries())
+
+    database.rebuild_summaries()
+    assert incremental == as_tuples(summaries())
+    assert incremental['round_scores'][0][:3] == (13, 3, 1)
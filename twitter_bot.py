@@ -373,7 +373,7 @@ def main():
     args = parser.parse_args()
     
     # Initialize database
-    database.init_db()
+    database.ensure_schema()
     
     if args.test:
         bot = ScorigamiTwitterBot()
@@ -383,8 +383,10 @@ def main():
             print("❌ Twitter authentication failed. Check your credentials.")
         return
     
-    # Check and post new scorigamis
-    new_scorigamis = check_and_post_new_scorigamis(dry_run=args.dry_run)
+    # Check and post new scorigamis (posted_scorigamis writes are staged
+    # and published like any other update)
+    with database.staged_write():
+        new_scorigamis = check_and_post_new_scorigamis(dry_run=args.dry_run)
     
     if new_scorigamis:
         print(f"\n{'='*50}")
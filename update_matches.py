@@ -8,6 +8,7 @@ import sys
 from datetime import datetime, timedelta
 
 import database
+import snapshot
 from data_fetcher import fetch_tournament_data
 from tournament_discovery import TIER1_TOURNAMENT_IDS
 
@@ -86,7 +87,24 @@ def init_twitter_tracking():
 
 
 def update_matches(tournament_ids=None, delay=0.5):
-    """Fetch new matches for specified tournaments."""
+    """
+    Fetch new matches for specified tournaments.
+    
+    All writes go to a staging copy of the database, which is published with
+    an atomic rename once the run finishes, so the web app only ever sees
+    complete updates. The web app's .npz snapshot is re-exported afterwards.
+    """
+    with database.staged_write():
+        total_new = _update_matches(tournament_ids, delay)
+    
+    # Refresh the columnar snapshot the web app memory-maps
+    info = snapshot.export_snapshot()
+    logger.info(f"Snapshot exported: {info['rows']} rows, {info['cells']} cells")
+    return total_new
+
+
+def _update_matches(tournament_ids, delay):
+    """Run the update against the active (staging) database."""
     logger.info("="*60)
     logger.info(f"VCT Scorigami Update Started: {datetime.now()}")
     logger.info("="*60)
@@ -133,6 +151,13 @@ def update_matches(tournament_ids=None, delay=0.5):
     
     stats_after = database.get_database_stats()
     
+    # Maps that failed per-map validation, this run or earlier
+    quarantined = database.get_quarantined_maps()
+    if quarantined:
+        logger.warning(f"{len(quarantined)} map(s) in quarantine:")
+        for entry in quarantined:
+            logger.warning(f"  match {entry['match_id']} {entry['map']}: {entry['reason']}")
+    
     logger.info("\n" + "="*60)
     logger.info("UPDATE COMPLETE")
     logger.info("="*60)